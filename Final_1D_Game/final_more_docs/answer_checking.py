@@ -0,0 +1,138 @@
+import re
+from fractions import Fraction
+from functools import lru_cache
+
+from expressions import parse
+
+# ========== Answer checking ==========
+# Open-ended answers used to be compared as exact strings, so "(3,4)" did not match "(3, 4)" and "12.50" did
+# not match "12.5". An answer is now parsed once into a typed key (number, vector, expression or text) and
+# every guess is parsed with the key's own pattern and compared to it by value. Keys are cached by answer
+# text, so checking a guess against a question that was already answered costs one cache lookup, one regex
+# match (or memoized expression parse) and one comparison.
+#
+# Each key also has an identity, a hashable value shared by all spellings of the same answer, which
+# distractors.py uses to keep MCQ options distinct.
+
+# All answers are rounded to 2 decimal places (rule 3), so a guess within half of the last place is right.
+ANSWER_DECIMALS = 2
+FLOAT_TOLERANCE = 0.5 * 10 ** -ANSWER_DECIMALS + 1e-9
+KEY_CACHE_SIZE = 4096
+
+_NUMBER = r"[-+]?(?:\d+\.?\d*|\.\d+)"
+_INT_RE = re.compile(r"[-+]?\d+")
+_NUMBER_RE = re.compile(_NUMBER)
+_VECTOR_RE = re.compile(rf"\(\s*({_NUMBER})\s*,\s*({_NUMBER})\s*\)")
+_EXPRESSION_RE = re.compile(r"[0-9a-z^*/+\-(). ]*x[0-9a-z^*/+\-(). ]*")
+
+
+class NumberKey(object):
+    """ An int or float answer, matched by value: "12.5" == "12.50", and "6" == "6.0" for int answers. """
+    def __init__(self, value, tolerance):
+        self.value = value
+        self.tolerance = tolerance
+        self.identity = value
+
+    def matches(self, guess):
+        guess = guess.strip()
+        if _NUMBER_RE.fullmatch(guess) is None:
+            return False
+        if isinstance(self.value, int):
+            # Exact, pnc answers can be too large for floats: "6.0" is right for 6, 20! + 0.5 is not 20!
+            try:
+                if _INT_RE.fullmatch(guess):
+                    return int(guess) == self.value
+                return Fraction(guess) == self.value
+            except ValueError:
+                # More digits than int() converts, longer than any answer
+                return False
+        return abs(float(guess) - self.value) <= self.tolerance
+
+
+class VectorKey(object):
+    """ A vector answer (x, y), matched by value with any spacing around the components. """
+    def __init__(self, values, tolerance):
+        self.values = values
+        self.tolerance = tolerance
+        self.identity = values
+
+    def matches(self, guess):
+        match = _VECTOR_RE.fullmatch(guess.strip())
+        if match is None:
+            return False
+        return all(abs(float(component) - value) <= self.tolerance
+                   for component, value in zip(match.groups(), self.values))
+
+
+class ExpressionKey(object):
+    """
+    An expression in x, e.g a derivative, matched by its normal form (see expressions.py),
+    so "5*3*(2+3x)^4" == "15(3x+2)^4". Normal forms are hash-consed, comparing them is an identity check.
+    """
+    def __init__(self, node):
+        self.node = node
+        self.identity = node
+
+    def matches(self, guess):
+        try:
+            return parse(guess) is self.node
+        except ValueError:
+            return False
+
+
+class TextKey(object):
+    """ Any other answer, e.g "scalar", matched ignoring case and surrounding or repeated spaces. """
+    def __init__(self, text):
+        self.text = " ".join(text.lower().split())
+        self.identity = self.text
+
+    def matches(self, guess):
+        return " ".join(guess.lower().split()) == self.text
+
+
+@lru_cache(maxsize=KEY_CACHE_SIZE)
+def answer_key(answer):
+    """
+    Parses the answer of an open-ended question into its typed key.
+
+    Parameters
+    ----------
+    answer: str
+        The answer, as stored on the Question.
+
+    Returns
+    -------
+    NumberKey, VectorKey, ExpressionKey or TextKey
+        Object whose matches(guess) method checks a player's guess.
+    """
+    text = answer.strip()
+    if _INT_RE.fullmatch(text):
+        return NumberKey(int(text), None)
+    if _NUMBER_RE.fullmatch(text):
+        return NumberKey(float(text), FLOAT_TOLERANCE)
+    match = _VECTOR_RE.fullmatch(text)
+    if match is not None:
+        groups = match.groups()
+        tolerance = 0 if all(_INT_RE.fullmatch(group) for group in groups) else FLOAT_TOLERANCE
+        return VectorKey(tuple(float(group) for group in groups), tolerance)
+    if _EXPRESSION_RE.fullmatch(text.lower()):
+        try:
+            return ExpressionKey(parse(text))
+        except ValueError:
+            pass
+    return TextKey(text)
+
+
+def answer_identity(answer):
+    """ Hashable value shared by all spellings of an answer, e.g 12.5 for "12.5" and "12.50". """
+    return answer_key(answer).identity
+
+
+def check_open(answer, guess):
+    """ If a guess is right for an open-ended question with the given answer. """
+    return answer_key(answer).matches(guess)
+
+
+def check_mcq(answer, guess):
+    """ If a guess picks the right option number of an MCQ, e.g " 2" for "2". """
+    return guess.strip() == answer
@@ -0,0 +1,105 @@
+import math
+from functools import lru_cache
+from itertools import product
+
+# ========== Answer tables ==========
+# Most int-only templates have tiny input domains: pnc_4 draws three ints from 1-5, 125 combinations in
+# all. For those the answer string of every combination is computed once, up front, into a table keyed by
+# the inputs, so an answer costs one lookup whatever the callback does. Domains over MAX_TABLE_SIZE
+# (vector_1 has 20^4 combinations) and float inputs keep calling the callback, through a bounded LRU memo.
+#
+# The table is a plain dict that is never evicted from. Inputs from outside the ranges (graded submissions)
+# go to a separate memo of MEMO_SIZE answers, so however many of them there are, the domain stays a lookup.
+# The memo is typed: 3.0 and 3 are different inputs to a callback and can have different answer strings. The
+# table is looked up by value, so an integral float in the domain gets the int's answer (grader.py passes the
+# ints of int ranges as ints anyway).
+#
+# Functions are cached by callback and ranges, like the answer pools of distractors.py, so templates stay
+# plain data and every bank holding the same template shares them.
+
+MAX_TABLE_SIZE = 1 << 16
+MEMO_SIZE = 4096
+
+_functions = {}
+
+
+def int_domain(args_ranges):
+    """
+    The finite domain of a template's inputs.
+
+    Returns
+    -------
+    list
+        range of every argument, None unless all arguments are ints.
+    """
+    if not all(rng_type == "int" for rng_type, _ in args_ranges):
+        return None
+    return [range(int(start), int(stop) + 1) for _, (start, stop) in args_ranges]
+
+
+def _memo(callback, size):
+    @lru_cache(maxsize=size, typed=True)
+    def answer(*args):
+        return str(callback(*args))
+    return answer
+
+
+def _ranges_key(args_ranges):
+    return tuple((rng_type, start, stop) for rng_type, (start, stop) in args_ranges)
+
+
+def answer_table(callback, domain):
+    """
+    The answers of a template over its whole int domain.
+
+    Parameters
+    ----------
+    callback: function
+        The template's callback.
+    domain: list
+        range of every argument, see int_domain.
+
+    Returns
+    -------
+    function
+        Called with the inputs, returns str(callback(*inputs)), looked up for inputs in the domain and memoized
+        for any others.
+    """
+    table = {args: str(callback(*args)) for args in product(*domain)}
+    memo = _memo(callback, MEMO_SIZE)
+
+    def answer(*args):
+        found = table.get(args)
+        return memo(*args) if found is None else found
+    return answer
+
+
+def answer_function(template, callback):
+    """
+    The fastest way to the answer string of a dynamic template, built on first use and then cached.
+
+    Parameters
+    ----------
+    template: dictionary
+        The template, e.g main.QN_ANS.template(key). Only its "args_ranges" are read.
+    callback: function
+        The template's callback.
+
+    Returns
+    -------
+    function
+        Called with the random inputs, returns str(callback(*random_inputs)). A precomputed table for small
+        int domains, else a memo of the callback.
+    """
+    args_ranges = template["args_ranges"]
+    key = (callback, _ranges_key(args_ranges))
+    function = _functions.get(key)
+    if function is None:
+        domain = int_domain(args_ranges)
+        if domain is not None and math.prod(len(values) for values in domain) <= MAX_TABLE_SIZE:
+            function = answer_table(callback, domain)
+        else:
+            function = _memo(callback, MEMO_SIZE)
+        # Two threads may both build it, either one is kept
+        function = _functions.setdefault(key, function)
+    return function
@@ -0,0 +1,319 @@
+import mmap
+import os
+import string
+import struct
+
+import callback_registry
+
+# ===== Precompiled question bank =====
+# qn_ans.json stays the authoring format. compile_bank turns it into a .qbank file that can be
+# memory-mapped at startup: no JSON parsing, callbacks resolved once per record, format templates already
+# split around their {} fields and argument ranges stored as typed numbers.
+#
+# File layout (little-endian):
+#   header     MAGIC, version (H), number of entries (I), offset of the callback table (I)
+#   index      one record offset (I) per entry
+#   records    key (str), question_type (B), answer_type (B), callback index (h, -1 if none),
+#              question parts (H count + str...), args ranges (H count + (B type, d start, d stop)...),
+#              answer (str), options (H count + str...)
+#   callbacks  H count + callback names (str...)
+# where str is a H byte length followed by UTF-8 bytes.
+
+MAGIC = b"QBNK"
+VERSION = 1
+_HEADER = struct.Struct("<4sHII")
+_U16 = struct.Struct("<H")
+_U32 = struct.Struct("<I")
+_RECORD_HEAD = struct.Struct("<BBh")
+_RANGE = struct.Struct("<Bdd")
+
+QUESTION_TYPES = ["dynamic", "static"]
+ANSWER_TYPES = ["open", "mcq"]
+RNG_TYPES = ["int", "float"]
+
+
+def compiled_path(json_path):
+    """ Path of the compiled bank that belongs to a JSON bank, e.g qn_ans.json -> qn_ans.qbank. """
+    return os.path.splitext(os.path.normpath(json_path))[0] + ".qbank"
+
+
+def _modified_time(json_path):
+    """ Last modification of a JSON bank, the newest of its shards for a directory. """
+    if not os.path.isdir(json_path):
+        return os.path.getmtime(json_path)
+    return max([os.path.getmtime(json_path)] + [os.path.getmtime(os.path.join(json_path, name))
+                                                for name in os.listdir(json_path) if name.endswith(".json")])
+
+
+def fresh_bank_path(json_path):
+    """
+    Picks the file to load a question bank from.
+
+    Returns
+    -------
+    str
+        The compiled bank if it exists and is at least as new as the JSON file, else the JSON file itself.
+    """
+    qbank_path = compiled_path(json_path)
+    if not os.path.exists(qbank_path):
+        return json_path
+    if os.path.exists(json_path) and _modified_time(json_path) > os.path.getmtime(qbank_path):
+        return json_path
+    return qbank_path
+
+
+def split_template(question):
+    """
+    Splits a question template around its {} fields.
+
+    Returns
+    -------
+    parts: list
+        Literal text between the fields, one more element than there are fields.
+        E.g "Cube of length {}?" -> ["Cube of length ", "?"]
+    """
+    parts = [""]
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(question):
+        parts[-1] += literal
+        if field_name is None:
+            continue
+        if field_name != "" or format_spec or conversion:
+            raise ValueError(f"only plain {{}} fields are supported, got {{{field_name}}} in {question!r}")
+        parts.append("")
+    return parts
+
+
+def format_parts(parts, args):
+    """ Inverse of split_template, same result as question.format(*args). """
+    pieces = [parts[0]]
+    for arg, literal in zip(args, parts[1:]):
+        pieces.append(str(arg))
+        pieces.append(literal)
+    return "".join(pieces)
+
+
+def _pack_str(out, text):
+    data = text.encode("utf-8")
+    out += _U16.pack(len(data))
+    out += data
+
+
+def _pack_record(key, entry, callback_ids):
+    out = bytearray()
+    _pack_str(out, key)
+    callback_func = entry.get("callback_func")
+    callback_id = -1
+    if callback_func is not None:
+        if not callback_registry.exists(callback_func):
+            raise ValueError(f"question {key}: unknown callback_func {callback_func!r}")
+        callback_id = callback_ids.setdefault(callback_func, len(callback_ids))
+    out += _RECORD_HEAD.pack(QUESTION_TYPES.index(entry["question_type"]),
+                             ANSWER_TYPES.index(entry["answer_type"]), callback_id)
+
+    parts = split_template(entry["question"]) if entry["question_type"] == "dynamic" else [entry["question"]]
+    out += _U16.pack(len(parts))
+    for part in parts:
+        _pack_str(out, part)
+
+    args_ranges = entry.get("args_ranges", [])
+    if entry["question_type"] == "dynamic" and len(args_ranges) != len(parts) - 1:
+        raise ValueError(f"question {key}: {len(parts) - 1} fields in the question but {len(args_ranges)} args_ranges")
+    out += _U16.pack(len(args_ranges))
+    for rng_type, (start, stop) in args_ranges:
+        out += _RANGE.pack(RNG_TYPES.index(rng_type), start, stop)
+
+    _pack_str(out, entry.get("answer", ""))
+    options = entry.get("options", [])
+    out += _U16.pack(len(options))
+    for option in options:
+        _pack_str(out, option)
+    return bytes(out)
+
+
+def compile_bank(json_path, out_path=None):
+    """
+    Compiles a JSON question bank into the binary .qbank format.
+
+    Parameters
+    ----------
+    json_path: str
+        Path to the question bank JSON file, or a directory of JSON shards (see bank_loader.py).
+    out_path: str
+        Where to write the compiled bank. Defaults to compiled_path(json_path).
+
+    Returns
+    -------
+    out_path: str
+        Path of the written file.
+    """
+    import shutil
+    from bank_loader import iter_bank
+    out_path = compiled_path(json_path) if out_path is None else out_path
+    callback_ids = {}
+    # Records are streamed to a scratch file as the bank is read and validated, only their lengths are kept
+    tmp_path = out_path + ".tmp"
+    records_path = out_path + ".records.tmp"
+    lengths = []
+    try:
+        with open(records_path, "w+b") as records_file:
+            for key, entry in iter_bank(json_path):
+                record = _pack_record(key, entry, callback_ids)
+                lengths.append(len(record))
+                records_file.write(record)
+
+            offset = _HEADER.size + _U32.size * len(lengths)
+            offsets = []
+            for length in lengths:
+                offsets.append(offset)
+                offset += length
+            callback_table = bytearray(_U16.pack(len(callback_ids)))
+            for name in callback_ids:
+                _pack_str(callback_table, name)
+
+            # Written next to the target and renamed, so a running loader never maps a half written file.
+            with open(tmp_path, "wb") as out_file:
+                out_file.write(_HEADER.pack(MAGIC, VERSION, len(lengths), offset))
+                out_file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+                records_file.seek(0)
+                shutil.copyfileobj(records_file, out_file)
+                out_file.write(callback_table)
+        os.replace(tmp_path, out_path)
+    finally:
+        os.remove(records_path)
+    return out_path
+
+
+class CompiledBank(object):
+    """
+    Read-only, memory-mapped view of a compiled .qbank file.
+
+    Behaves like the dictionary loaded from the JSON file: indexing by question number gives a template
+    dictionary of the same form, with two extra keys filled in at load time:
+        "callback": the resolved callback function (dynamic questions only)
+        "question_parts": the question template split around its {} fields, see split_template
+    Records are decoded on first access only.
+    """
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as in_file:
+            self._buffer = mmap.mmap(in_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, callbacks_offset = _HEADER.unpack_from(self._buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} compiled question bank")
+        self._offsets = struct.unpack_from(f"<{count}I", self._buffer, _HEADER.size)
+
+        callback_count, = _U16.unpack_from(self._buffer, callbacks_offset)
+        position = callbacks_offset + _U16.size
+        self.callbacks = []
+        for _ in range(callback_count):
+            name, position = self._read_str(position)
+            self.callbacks.append(name)
+
+        self._keys = {}
+        for i, offset in enumerate(self._offsets):
+            key, _ = self._read_str(offset)
+            self._keys[key] = i
+        self._entries = {}
+
+    def _read_str(self, position):
+        length, = _U16.unpack_from(self._buffer, position)
+        start = position + _U16.size
+        return str(self._buffer[start:start + length], "utf-8"), start + length
+
+    def _read_strs(self, position):
+        count, = _U16.unpack_from(self._buffer, position)
+        position += _U16.size
+        values = []
+        for _ in range(count):
+            value, position = self._read_str(position)
+            values.append(value)
+        return values, position
+
+    def _decode(self, offset):
+        _, position = self._read_str(offset)
+        question_type, answer_type, callback_id = _RECORD_HEAD.unpack_from(self._buffer, position)
+        position += _RECORD_HEAD.size
+        parts, position = self._read_strs(position)
+
+        range_count, = _U16.unpack_from(self._buffer, position)
+        position += _U16.size
+        args_ranges = []
+        for _ in range(range_count):
+            rng_type, start, stop = _RANGE.unpack_from(self._buffer, position)
+            position += _RANGE.size
+            if RNG_TYPES[rng_type] == "int":
+                start, stop = int(start), int(stop)
+            args_ranges.append([RNG_TYPES[rng_type], [start, stop]])
+        answer, position = self._read_str(position)
+        options, position = self._read_strs(position)
+
+        entry = {
+            "question": "{}".join(part.replace("{", "{{").replace("}", "}}") for part in parts),
+            "question_type": QUESTION_TYPES[question_type],
+            "answer_type": ANSWER_TYPES[answer_type],
+        }
+        if callback_id >= 0:
+            entry["callback_func"] = self.callbacks[callback_id]
+            # Resolved when the record is first read, so only the topic packs of the questions asked are imported
+            entry["callback"] = callback_registry.get(entry["callback_func"])
+        if entry["question_type"] == "dynamic":
+            entry["args_ranges"] = args_ranges
+            entry["question_parts"] = parts
+        else:
+            entry["question"] = parts[0]
+            entry["answer"] = answer
+            if options:
+                entry["options"] = options
+        return entry
+
+    def metadata(self, key):
+        """
+        The question type, answer type and callback name of a record, read from its head only: no question
+        text is decoded and the callback is not resolved, so its topic pack is not imported.
+        """
+        position = self._offsets[self._keys[key]]
+        _, position = self._read_str(position)
+        question_type, answer_type, callback_id = _RECORD_HEAD.unpack_from(self._buffer, position)
+        entry = {"question_type": QUESTION_TYPES[question_type], "answer_type": ANSWER_TYPES[answer_type]}
+        if callback_id >= 0:
+            entry["callback_func"] = self.callbacks[callback_id]
+        return entry
+
+    def __getitem__(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = self._decode(self._offsets[self._keys[key]])
+        return entry
+
+    def __contains__(self, key):
+        return key in self._keys
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def keys(self):
+        return self._keys.keys()
+
+    def items(self):
+        return ((key, self[key]) for key in self._keys)
+
+    def close(self):
+        self._buffer.close()
+
+
+def main():
+    # Imported here rather than at the top, this module is on the path of every import main
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile a JSON question bank into a memory-mappable .qbank file")
+    parser.add_argument("json_path", nargs="?", default="qn_ans.json")
+    parser.add_argument("-o", "--output", help="output path, defaults to the JSON path with a .qbank extension")
+    args = parser.parse_args()
+    out_path = compile_bank(args.json_path, args.output)
+    print(f"Compiled {args.json_path} -> {out_path} ({os.path.getsize(out_path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,367 @@
+import json
+import os
+import re
+
+import callback_registry
+from bank_compiler import ANSWER_TYPES, QUESTION_TYPES, RNG_TYPES, split_template
+
+# ========== Streaming question bank loader ==========
+# json.load reads a whole bank into memory before anything looks at it, and a bad template (a reversed range,
+# a missing callback) only shows up when a player happens to draw it. iter_bank reads a bank a chunk at a
+# time, decodes one "key": {template} entry at a time and validates it before moving on, so memory stays
+# bounded by CHUNK_SIZE plus the largest entry, and the first bad entry stops the load with its file, line and
+# question number.
+#
+# A bank is either one JSON file or a directory of JSON shards, read in file name order, e.g
+#     bank/
+#         000_geometry.json    {"1": {...}, "2": {...}}
+#         001_vectors.json     {"3": {...}}
+# Question numbers must be unique across all shards.
+#
+# load_bank does not keep what it streams: it only keeps the byte span of every template in its file and the
+# few fields the sampler indexes (see METADATA_FIELDS), and a template is decoded again from its span the
+# first time it is used. Files are read as latin-1, one character per byte, so positions in the decoded
+# text are byte offsets. The bank files must not change while a loaded bank is in use.
+
+CHUNK_SIZE = 1 << 16
+# A single entry larger than this is treated as a broken file (e.g an unterminated string) rather than read on
+MAX_ENTRY_SIZE = 1 << 20
+# Options shown for an MCQ, see main.MCQ_STRING
+MCQ_OPTIONS = 4
+# Template fields JsonBank.metadata keeps for every template, see sampler.BankIndex
+METADATA_FIELDS = ("question_type", "answer_type", "callback_func", "difficulty", "weight")
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+_decoder = json.JSONDecoder()
+
+
+class BankValidationError(ValueError):
+    """ A question bank that cannot be read or holds an invalid template. """
+    def __init__(self, message, path=None, line=None, key=None):
+        self.path = path
+        self.line = line
+        self.key = key
+        where = ":".join(str(part) for part in (path, line) if part is not None)
+        if key is not None:
+            message = f"question {key}: {message}"
+        super().__init__(f"{where}: {message}" if where else message)
+
+
+def _is_number(value):
+    # JSON numbers decode to exactly int or float, and bool is an int subclass
+    return type(value) in (int, float)
+
+
+def _validate_range(i, args_range):
+    if not isinstance(args_range, list) or len(args_range) != 2 or not isinstance(args_range[1], list) \
+            or len(args_range[1]) != 2:
+        raise ValueError(f"args_ranges[{i}] must be [type, [start, stop]], got {args_range!r}")
+    rng_type, (start, stop) = args_range
+    if rng_type not in RNG_TYPES:
+        raise ValueError(f"args_ranges[{i}] type must be one of {RNG_TYPES}, got {rng_type!r}")
+    if not _is_number(start) or not _is_number(stop):
+        raise ValueError(f"args_ranges[{i}] bounds must be numbers, got {args_range[1]!r}")
+    if start > stop:
+        raise ValueError(f"args_ranges[{i}] is reversed, {start} > {stop}")
+    if rng_type == "int" and not (float(start).is_integer() and float(stop).is_integer()):
+        raise ValueError(f"args_ranges[{i}] is an int range with fractional bounds {args_range[1]!r}")
+
+
+def validate_entry(key, entry):
+    """
+    Checks that a template can be turned into a Question.
+
+    Parameters
+    ----------
+    key: str
+        Question number of the template.
+    entry: dictionary
+        The template, in the form documented on main.Question.
+
+    Raises
+    ------
+    ValueError
+        Describing the first problem found.
+    """
+    if not isinstance(entry, dict):
+        raise ValueError(f"template must be an object, got {type(entry).__name__}")
+    for field, allowed in (("question_type", QUESTION_TYPES), ("answer_type", ANSWER_TYPES)):
+        if entry.get(field) not in allowed:
+            raise ValueError(f"{field} must be one of {allowed}, got {entry.get(field)!r}")
+    if not isinstance(entry.get("question"), str):
+        raise ValueError("question must be a string")
+
+    callback_func = entry.get("callback_func")
+    if entry["question_type"] == "dynamic" and callback_func is None:
+        raise ValueError("dynamic questions need a callback_func")
+    # Static questions may name the callback their answer came from, it must still exist
+    if callback_func is not None and not callback_registry.exists(str(callback_func)):
+        raise ValueError(f"unknown callback_func {callback_func!r}")
+
+    if entry["question_type"] == "dynamic":
+        args_ranges = entry.get("args_ranges")
+        if not isinstance(args_ranges, list):
+            raise ValueError("dynamic questions need an args_ranges list")
+        for i, args_range in enumerate(args_ranges):
+            _validate_range(i, args_range)
+        fields = len(split_template(entry["question"])) - 1
+        if fields != len(args_ranges):
+            raise ValueError(f"{fields} fields in the question but {len(args_ranges)} args_ranges")
+        return
+
+    if not isinstance(entry.get("answer"), str):
+        raise ValueError("static questions need an answer string")
+    if entry["answer_type"] == "mcq":
+        options = entry.get("options")
+        if not isinstance(options, list) or len(options) != MCQ_OPTIONS \
+                or not all(isinstance(option, str) for option in options):
+            raise ValueError(f"static MCQs need a list of {MCQ_OPTIONS} option strings")
+        if entry["answer"] not in options:
+            raise ValueError(f"answer {entry['answer']!r} is not one of the options")
+
+
+def shard_paths(path):
+    """ The JSON files of a bank, path itself or the *.json files of a directory in name order. """
+    if not os.path.isdir(path):
+        return [path]
+    paths = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json"))
+    if not paths:
+        raise BankValidationError("no .json shards in the directory", path)
+    return paths
+
+
+class _Reader(object):
+    """ Chunked reader over one JSON file, keeping the line number of its read position. """
+    def __init__(self, in_file, path):
+        self.in_file = in_file
+        self.path = path
+        self.buffer = ""
+        # Byte offset of buffer[0] in the file
+        self.offset = 0
+        self.position = 0
+        self.line = 1
+        self.eof = False
+
+    def error(self, message, position=None, key=None):
+        position = self.position if position is None else position
+        return BankValidationError(message, self.path, self.line + self.buffer.count("\n", self.position, position), key)
+
+    def advance(self, position):
+        self.line += self.buffer.count("\n", self.position, position)
+        self.position = position
+
+    def read_more(self):
+        if self.eof:
+            return False
+        if len(self.buffer) - self.position > MAX_ENTRY_SIZE:
+            raise self.error(f"entry larger than {MAX_ENTRY_SIZE} bytes")
+        chunk = self.in_file.read(CHUNK_SIZE)
+        # Drop what has been consumed, so the buffer only ever holds the current entry and one chunk
+        self.buffer = self.buffer[self.position:] + chunk
+        self.offset += self.position
+        self.position = 0
+        self.eof = not chunk
+        return not self.eof
+
+    def skip_whitespace(self):
+        while True:
+            position = _WHITESPACE.match(self.buffer, self.position).end()
+            self.advance(position)
+            if position < len(self.buffer) or not self.read_more():
+                return
+
+    def expect(self, characters):
+        """ Consumes the next non-whitespace character, one of characters, and returns it. """
+        self.skip_whitespace()
+        if self.position >= len(self.buffer):
+            raise self.error(f"unexpected end of file, expected one of {characters!r}")
+        character = self.buffer[self.position]
+        if character not in characters:
+            raise self.error(f"expected one of {characters!r}, got {character!r}")
+        self.advance(self.position + 1)
+        return character
+
+    def value(self, key=None):
+        """ Decodes the next JSON value, reading more of the file until it is complete. Returns it, its line
+        and its byte span in the file. """
+        self.skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as error:
+                if self.read_more():
+                    continue
+                raise self.error(error.msg, error.pos, key) from None
+            # A number can end at the buffer's edge and go on in the next chunk
+            if end == len(self.buffer) and self.read_more():
+                continue
+            text = self.buffer[self.position:end]
+            if not text.isascii():
+                # Strings holding UTF-8 sequences were decoded byte by byte, decode them again properly
+                value = json.loads(text.encode("latin-1"))
+            line, span = self.line, (self.offset + self.position, self.offset + end)
+            self.advance(end)
+            return value, line, span
+
+    def peek(self):
+        self.skip_whitespace()
+        return self.buffer[self.position] if self.position < len(self.buffer) else ""
+
+
+def iter_file(path):
+    """
+    Reads the entries of one JSON bank file in order, without validating them.
+
+    Yields
+    ------
+    key: str
+        Question number.
+    entry: dictionary
+        Its template.
+    line: int
+        Line of the file the entry starts on.
+    """
+    for key, entry, line, _ in _iter_spans(path):
+        yield key, entry, line
+
+
+def _iter_spans(path):
+    """ Same as iter_file, also yielding the byte span of each template in the file. """
+    # latin-1 and no newline translation, so string positions are byte offsets (UTF-8 is decoded in value())
+    with open(path, encoding="latin-1", newline="") as in_file:
+        reader = _Reader(in_file, path)
+        reader.expect("{")
+        if reader.peek() == "}":
+            reader.expect("}")
+        else:
+            while True:
+                key, line, _ = reader.value()
+                if not isinstance(key, str):
+                    raise reader.error(f"question numbers must be strings, got {key!r}")
+                reader.expect(":")
+                entry, _, span = reader.value(key)
+                yield key, entry, line, span
+                if reader.expect(",}") == "}":
+                    break
+        if reader.peek():
+            raise reader.error("unexpected data after the question bank")
+
+
+def iter_bank(path):
+    """
+    Streams the validated templates of a bank, one JSON file or a directory of shards.
+
+    Parameters
+    ----------
+    path: str
+        Path to a JSON bank file or a directory of them.
+
+    Yields
+    ------
+    key: str
+        Question number.
+    entry: dictionary
+        Its template, checked with validate_entry.
+
+    Raises
+    ------
+    BankValidationError
+        On the first malformed file, invalid template or question number seen twice, with its file and line.
+    """
+    for _, key, entry, _ in _iter_validated(path):
+        yield key, entry
+
+
+def _iter_validated(path):
+    """ Same as iter_bank, also yielding the index of the shard and the byte span of each template. """
+    seen = set()
+    for shard, shard_path in enumerate(shard_paths(path)):
+        for key, entry, line, span in _iter_spans(shard_path):
+            if key in seen:
+                raise BankValidationError("duplicate question number", shard_path, line, key)
+            seen.add(key)
+            try:
+                validate_entry(key, entry)
+            except ValueError as error:
+                raise BankValidationError(str(error), shard_path, line, key) from None
+            yield shard, key, entry, span
+
+
+class JsonBank(object):
+    """
+    Read-only view of a validated JSON bank, behaving like the dictionary of its templates.
+
+    The bank is streamed and validated once, keeping the position of every template. A template is read
+    back from its file and decoded on first access only, like CompiledBank does with its records.
+
+    Methods
+    -------
+    metadata(self, key): dictionary
+        The METADATA_FIELDS of a template, without reading it back.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._paths = shard_paths(path)
+        # Question number -> (shard, start, end) and -> metadata, in bank order
+        self._spans = {}
+        self._metadata = {}
+        for shard, key, entry, span in _iter_validated(path):
+            self._spans[key] = (shard,) + span
+            self._metadata[key] = {field: entry[field] for field in METADATA_FIELDS if field in entry}
+        self._entries = {}
+
+    def _read(self, key):
+        shard, start, end = self._spans[key]
+        with open(self._paths[shard], "rb") as in_file:
+            in_file.seek(start)
+            return json.loads(in_file.read(end - start))
+
+    def metadata(self, key):
+        return self._metadata[key]
+
+    def __getitem__(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = self._read(key)
+        return entry
+
+    def __contains__(self, key):
+        return key in self._spans
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def keys(self):
+        return self._spans.keys()
+
+    def items(self):
+        return ((key, self[key]) for key in self._spans)
+
+
+def load_bank(path):
+    """
+    The validated templates of a bank, keyed by question number, as a JsonBank: only their positions and
+    metadata stay in memory, and each template is decoded when it is first used.
+    """
+    return JsonBank(path)
+
+
+def main():
+    # Imported here rather than at the top, this module is on the path of every import main
+    import argparse
+    parser = argparse.ArgumentParser(description="Validate a question bank file or directory of shards")
+    parser.add_argument("path", nargs="?", default="qn_ans.json")
+    args = parser.parse_args()
+    try:
+        count = sum(1 for _ in iter_bank(args.path))
+    except BankValidationError as error:
+        print(error)
+        exit(1)
+    print(f"{args.path}: {count} valid templates")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cold-start benchmark: how long a fresh interpreter takes to import main.py
+# (and, optionally, to get its first question), measured in new processes.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SNIPPETS = {
+    "interpreter": "pass",
+    "import": "import main",
+    "first_question": "import main; main.QN_ANS['1'].get_question()",
+}
+
+
+def time_snippet(snippet, runs):
+    """
+    Runs a snippet in a fresh interpreter several times.
+
+    Parameters
+    ----------
+    snippet: str
+        Python source to run with python -c, from the directory of main.py.
+    runs: int
+        Number of fresh processes to start.
+
+    Returns
+    -------
+    timings: list
+        Wall clock time of each run in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", snippet], cwd=HERE, check=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def slowest_imports(count):
+    """ Top modules by cumulative import time, using python -X importtime. """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            cwd=HERE, check=True, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start import latency of main.py")
+    parser.add_argument("--runs", type=int, default=20, help="fresh processes per measurement")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--record", help="append the results as a JSON line to this file")
+    args = parser.parse_args()
+
+    results = {}
+    for name, snippet in SNIPPETS.items():
+        timings = time_snippet(snippet, args.runs)
+        results[name] = {"min_ms": round(min(timings), 2), "median_ms": round(statistics.median(timings), 2)}
+        print(f"{name:>15}: min {results[name]['min_ms']:8.2f} ms   median {results[name]['median_ms']:8.2f} ms")
+
+    print("\nSlowest imports (cumulative):")
+    for cumulative_us, name in slowest_imports(args.top):
+        print(f"{cumulative_us / 1000:8.2f} ms  {name}")
+
+    if args.record:
+        with open(args.record, "a") as out_file:
+            out_file.write(json.dumps({"time": time.time(), "runs": args.runs, "results": results}) + "\n")
+
+
+if __name__ == "__main__":
+    main()
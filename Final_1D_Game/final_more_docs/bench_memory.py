@@ -0,0 +1,52 @@
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+import main
+from compact_question import CompactQuestion
+
+# Memory benchmark: bytes held per pre-generated question, Question against CompactQuestion.
+# Both are drawn from generators with the same seed, so they hold the same questions.
+
+
+def build(factory, count, seed):
+    """ count questions over all templates in turn, with the allocated size and time it took. """
+    keys = list(main.QN_ANS.keys())
+    rng = random.Random(seed)
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    questions = [factory(keys[i % len(keys)], rng) for i in range(count)]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return questions, size, elapsed
+
+
+def same_questions(questions, compact_questions):
+    return all(question.get_question() == compact.get_question() and question.answer == compact.answer
+               for question, compact in zip(questions, compact_questions))
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Compare the memory held by Question and CompactQuestion")
+    parser.add_argument("--count", type=int, default=100000, help="questions generated of each kind")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    # Warm up the answer pools and templates so they are not counted against either class
+    build(main.QN_ANS.generate, len(main.QN_ANS) * 4, args.seed)
+
+    questions, size, elapsed = build(main.QN_ANS.generate, args.count, args.seed)
+    print(f"Question:        {size / args.count:8.1f} bytes/question   {elapsed / args.count * 1e6:6.2f} us/question")
+    compact_questions, compact_size, compact_elapsed = build(
+        lambda key, rng: CompactQuestion.generate(main.QN_ANS, key, rng), args.count, args.seed)
+    print(f"CompactQuestion: {compact_size / args.count:8.1f} bytes/question   "
+          f"{compact_elapsed / args.count * 1e6:6.2f} us/question")
+    print(f"{size / compact_size:.1f}x less memory, same questions: {same_questions(questions, compact_questions)}")
+
+
+if __name__ == "__main__":
+    run()
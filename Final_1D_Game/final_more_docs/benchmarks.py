@@ -0,0 +1,238 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import timeit
+
+# The game loop is benchmarked without the typewriter delays, this must be set before main is imported
+os.environ.setdefault("FRESHMORE_HEADLESS", "1")
+
+import callback_registry
+import main
+from bench_import import time_snippet
+from game_engine import GameSession
+from rng_streams import stream
+
+# ========== Benchmark suite ==========
+# Micro and macro benchmarks of the hot paths: input generation, question generation for every template,
+# every callback, answer checking, headless game rounds and cold import. Every benchmark runs on inputs
+# drawn from a fixed seed, timeit picks a number of loops lasting at least MIN_TIME and the median of
+# REPEAT timings is kept, so numbers are repeatable on a quiet machine.
+#
+#   python benchmarks.py --save              record a baseline (benchmarks_baseline.json)
+#   python benchmarks.py --compare           fail (exit code 1) if anything got slower than THRESHOLD
+#   python benchmarks.py -k callback/        only benchmarks whose name contains "callback/"
+#
+# benchmarks_baseline.json is the committed baseline, with the Python version and platform it was taken on.
+# Timings only compare on the same machine: re-save it there before relying on --compare, and commit it
+# again after an intended slowdown.
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, "benchmarks_baseline.json")
+SEED = 2021
+REPEAT = 5
+MIN_TIME = 0.2
+# Relative slowdown of the median reported as a regression
+THRESHOLD = 0.15
+# Inputs prepared per benchmark, cycled through by one timed call
+BATCH = 256
+IMPORT_RUNS = 10
+
+
+def _templates():
+    return [(key, main.QN_ANS.template(key)) for key in main.QN_ANS.keys()]
+
+
+def bench_parse_random_rng():
+    rng = random.Random(SEED)
+    ranges = [template["args_ranges"] for _, template in _templates() if template["question_type"] == "dynamic"]
+
+    def run():
+        rng.seed(SEED)
+        for args_ranges in ranges:
+            main.Question._parse_random_rng(args_ranges, rng)
+    return run, len(ranges)
+
+
+def bench_question(template):
+    rng = random.Random(SEED)
+    factory = main.Question.from_dynamic if template["question_type"] == "dynamic" else main.Question.from_static
+
+    def run():
+        rng.seed(SEED)
+        for _ in range(BATCH):
+            factory(template, rng)
+    return run, BATCH
+
+
+def bench_callback(template):
+    rng = random.Random(SEED)
+    callback = callback_registry.get(template["callback_func"])
+    inputs = [main.Question._parse_random_rng(template["args_ranges"], rng) for _ in range(BATCH)]
+
+    def run():
+        for args in inputs:
+            callback(*args)
+    return run, BATCH
+
+
+def bench_check_answer(answer_type, correct):
+    rng = random.Random(SEED)
+    templates = [template for _, template in _templates() if template["answer_type"] == answer_type]
+    pairs = []
+    for i in range(BATCH):
+        question = main.Question.from_template(templates[i % len(templates)], rng)
+        pairs.append((question, question.answer if correct else "0"))
+
+    def run():
+        for question, guess in pairs:
+            question.check_answer(guess)
+    return run, BATCH
+
+
+def bench_game_update(rounds=10):
+    """ Full rounds of Game.update, with input() answering "1" and the output discarded. """
+    def run():
+        main.input = lambda prompt="": "1"
+        try:
+            with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+                for i in range(rounds):
+                    game = main.Game(10, stream(SEED, "round", i))
+                    while game.update() is None:
+                        pass
+        finally:
+            del main.input
+    return run, rounds
+
+
+def bench_game_session(sessions=10):
+    """ Whole GameSession games (3 rounds and bootcamp), as played on the quiz server. """
+    def run():
+        for i in range(sessions):
+            session = GameSession(main.Game, total_qns=10, seed=stream(SEED, "session", i).getrandbits(32))
+            session.start()
+            while not session.done:
+                session.send("1")
+    return run, sessions
+
+
+def benchmarks():
+    """ Name -> factory returning (function to time, number of operations per call). """
+    suite = {"parse_random_rng": bench_parse_random_rng}
+    for key, template in _templates():
+        suite[f"question/{key}"] = lambda template=template: bench_question(template)
+    for key, template in _templates():
+        if template["question_type"] == "dynamic":
+            suite[f"callback/{template['callback_func']}"] = lambda template=template: bench_callback(template)
+    for answer_type in ("open", "mcq"):
+        for correct in (True, False):
+            name = f"check_answer/{answer_type}/{'right' if correct else 'wrong'}"
+            suite[name] = lambda answer_type=answer_type, correct=correct: bench_check_answer(answer_type, correct)
+    suite["game/update_round"] = bench_game_update
+    suite["game/session"] = bench_game_session
+    return suite
+
+
+def measure(factory, repeat=REPEAT, min_time=MIN_TIME):
+    """
+    Times one benchmark.
+
+    Returns
+    -------
+    dictionary
+        Median and minimum time per operation in nanoseconds.
+    """
+    function, operations = factory()
+    timer = timeit.Timer(function)
+    function()
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    timings = [timing / number / operations * 1e9 for timing in timer.repeat(repeat, number)]
+    return {"median_ns": round(statistics.median(timings), 1), "min_ns": round(min(timings), 1)}
+
+
+def measure_import(runs=IMPORT_RUNS):
+    timings = [timing * 1e6 for timing in time_snippet("import main", runs)]
+    return {"median_ns": round(statistics.median(timings), 1), "min_ns": round(min(timings), 1)}
+
+
+def run_suite(pattern=None, repeat=REPEAT, min_time=MIN_TIME, import_runs=IMPORT_RUNS):
+    results = {}
+    for name, factory in benchmarks().items():
+        if pattern is None or pattern in name:
+            results[name] = measure(factory, repeat, min_time)
+            print(f"{name:<32} {_format_ns(results[name]['median_ns']):>12}")
+    if pattern is None or pattern in "import":
+        results["import"] = measure_import(import_runs)
+        print(f"{'import':<32} {_format_ns(results['import']['median_ns']):>12}")
+    return results
+
+
+def _format_ns(ns):
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f} {unit}"
+    return f"{ns:.0f} ns"
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """
+    Compares results to a saved baseline.
+
+    Returns
+    -------
+    list
+        Names of the benchmarks whose median is more than threshold slower than the baseline.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<32} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before, now = baseline[name]["median_ns"], result["median_ns"]
+        change = now / before - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<32} {_format_ns(before):>12} {_format_ns(now):>12} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Benchmark question generation, answer checking and the game loop")
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="minimum seconds per timing")
+    parser.add_argument("--import-runs", type=int, default=IMPORT_RUNS)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="save the results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="compare to the baseline, exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    args = parser.parse_args()
+
+    results = run_suite(args.pattern, args.repeat, args.min_time, args.import_runs)
+    if args.compare:
+        with open(args.baseline) as in_file:
+            baseline = json.load(in_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+    if args.save:
+        with open(args.baseline, "w") as out_file:
+            json.dump({"time": time.time(), "python": platform.python_version(), "platform": platform.platform(),
+                       "results": results}, out_file, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,90 @@
+import importlib
+
+# ========== Question callback registry ==========
+# Templates name their callback ("callback_func": "geom_3"). Callbacks live in topic packs, one module per
+# topic under topics/, and register themselves by name with the @register decorator when their pack is
+# imported:
+#
+#     from callback_registry import register
+#
+#     @register
+#     def geom_3(radius, height):
+#         ...
+#
+# Nothing is imported up front. get("geom_3") is a dict hit once the geom pack is loaded, and the first
+# lookup of a name imports the pack of its prefix (the part before the first "_"), so startup does not
+# grow with the number of packs and a game only loads the topics of the questions it asks. A new topic is
+# a new module in topics/ plus a line in TOPIC_PACKS, or a register_pack call from outside this file.
+
+# Callback name prefix -> module of its topic pack
+TOPIC_PACKS = {
+    "deriv": "topics.derivatives",
+    "geom": "topics.geometry",
+    "pnc": "topics.pnc",
+    "trigo": "topics.trigonometry",
+    "vector": "topics.vectors",
+}
+
+_callbacks = {}
+
+
+def register(func):
+    """
+    Decorator adding a question callback to the registry, under its function name.
+
+    Raises
+    ------
+    ValueError
+        If another function is already registered under the same name.
+    """
+    registered = _callbacks.setdefault(func.__name__, func)
+    if registered is not func:
+        raise ValueError(f"callback {func.__name__!r} is already registered by {registered.__module__}")
+    return func
+
+
+def register_pack(prefix, module):
+    """ Makes callbacks named <prefix>_... load from module, e.g register_pack("stats", "topics.statistics"). """
+    TOPIC_PACKS[prefix] = module
+
+
+def pack_of(name):
+    """ Module of the topic pack a callback name belongs to, None if no pack claims its prefix. """
+    return TOPIC_PACKS.get(name.split("_")[0])
+
+
+def get(name):
+    """
+    The callback registered under name, importing its topic pack on first use.
+
+    Raises
+    ------
+    KeyError
+        If no pack registers a callback of that name.
+    """
+    try:
+        return _callbacks[name]
+    except KeyError:
+        pass
+    module = pack_of(name)
+    if module is not None:
+        importlib.import_module(module)
+    try:
+        return _callbacks[name]
+    except KeyError:
+        raise KeyError(f"unknown callback {name!r}") from None
+
+
+def exists(name):
+    try:
+        get(name)
+    except KeyError:
+        return False
+    return True
+
+
+def load_all():
+    """ Imports every topic pack. Returns all registered callbacks, by name. """
+    for module in list(TOPIC_PACKS.values()):
+        importlib.import_module(module)
+    return dict(_callbacks)
@@ -0,0 +1,174 @@
+import struct
+import sys
+from itertools import permutations
+
+import callback_registry
+from answer_checking import check_mcq, check_open
+from answer_tables import answer_function
+from bank_compiler import format_parts
+from distractors import answer_pool
+from main import Question
+
+# ========== Compact questions ==========
+# A Question keeps its formatted text, a list of option strings and its answer in a __dict__, several hundred
+# bytes per instance. A CompactQuestion only keeps what the question was drawn from: the template key, the
+# random inputs packed as doubles in one bytes object, and one small int holding the option order and the
+# distractor refs (see distractors.py). Text, options and answer are rebuilt from the template on access.
+#
+# CompactQuestion.generate makes the same draws as Question.from_template, so with generators in the same
+# state both give the same question.
+
+_PERMUTATIONS = list(permutations(range(4)))
+_PERMUTATION_INDEX = {permutation: i for i, permutation in enumerate(_PERMUTATIONS)}
+# Distractor refs are stored as unsigned bytes, offset by 128
+_REF_OFFSET = 128
+_REF_BITS = 8
+_ORDER_BITS = 5
+
+
+def _pack_choices(order, refs=(0, 0, 0)):
+    """ One int holding the option order (index of the permutation) and three distractor refs. """
+    choices = _PERMUTATION_INDEX[tuple(order)]
+    for i, ref in enumerate(refs):
+        if not -_REF_OFFSET <= ref < _REF_OFFSET:
+            raise ValueError(f"distractor ref {ref} does not fit in a byte")
+        choices |= (ref + _REF_OFFSET) << (_ORDER_BITS + _REF_BITS * i)
+    return choices
+
+
+def _unpack_choices(choices):
+    order = _PERMUTATIONS[choices & ((1 << _ORDER_BITS) - 1)]
+    refs = [((choices >> (_ORDER_BITS + _REF_BITS * i)) & 0xFF) - _REF_OFFSET for i in range(3)]
+    return order, refs
+
+
+class CompactQuestion(object):
+    """
+    Memory-light stand-in for Question, with the same interface.
+
+    Attributes
+    ----------
+    question, options, answer, question_type
+        Same as on Question, built from the template every time they are read.
+
+    Methods
+    -------
+    generate(cls, bank, key, rng): CompactQuestion
+        Draws a question of a template, like Question.from_template.
+
+    to_question(self): Question
+        The equivalent, fully formatted Question.
+    """
+    __slots__ = ("bank", "key", "packed_args", "choices")
+
+    def __init__(self, bank, key, packed_args, choices):
+        """
+        Parameters
+        ----------
+        bank: QuestionBank
+            Bank holding the template.
+        key: str
+            Question number of the template.
+        packed_args: bytes
+            Random inputs of a dynamic template as little-endian doubles, empty for static templates.
+        choices: int
+            Packed option order and distractor refs of an MCQ, None for open-ended questions.
+        """
+        self.bank = bank
+        self.key = key
+        self.packed_args = packed_args
+        self.choices = choices
+
+    @classmethod
+    def generate(cls, bank, key, rng):
+        template = bank.template(key)
+        key = sys.intern(key)
+        if template["question_type"] != "dynamic":
+            if template["answer_type"] != "mcq":
+                return cls(bank, key, b"", None)
+            order = [0, 1, 2, 3]
+            rng.shuffle(order)
+            return cls(bank, key, b"", _pack_choices(order))
+        args_ranges = template["args_ranges"]
+        random_inputs = Question._parse_random_rng(args_ranges, rng)
+        packed_args = struct.pack(f"<{len(random_inputs)}d", *random_inputs)
+        if template["answer_type"] != "mcq":
+            return cls(bank, key, packed_args, None)
+        callback = cls._callback(template)
+        answer = answer_function(template, callback)(*random_inputs)
+        refs = answer_pool(callback, args_ranges).pick(answer, rng)
+        # Shuffling the indices draws the same numbers as shuffling the options in Question.from_dynamic
+        order = [0, 1, 2, 3]
+        rng.shuffle(order)
+        return cls(bank, key, packed_args, _pack_choices(order, refs))
+
+    @staticmethod
+    def _callback(template):
+        return template.get("callback") or callback_registry.get(template["callback_func"])
+
+    def _template(self):
+        return self.bank.template(self.key)
+
+    def _random_inputs(self, template):
+        values = struct.unpack(f"<{len(self.packed_args) // 8}d", self.packed_args)
+        return [int(value) if rng_type == "int" else value
+                for (rng_type, _), value in zip(template["args_ranges"], values)]
+
+    def _unshuffled(self, template):
+        """ Options in their original order (the answer first for dynamic MCQs) and the correct answer. """
+        if template["question_type"] != "dynamic":
+            return template.get("options"), template["answer"]
+        callback = self._callback(template)
+        answer = answer_function(template, callback)(*self._random_inputs(template))
+        if self.choices is None:
+            return None, answer
+        pool = answer_pool(callback, template["args_ranges"])
+        _, refs = _unpack_choices(self.choices)
+        return [answer] + [pool.resolve(ref, answer) for ref in refs], answer
+
+    @property
+    def question_type(self):
+        return "open" if self.choices is None else "mcq"
+
+    @property
+    def question(self):
+        template = self._template()
+        if template["question_type"] != "dynamic":
+            return template["question"]
+        random_inputs = self._random_inputs(template)
+        if "question_parts" in template:
+            return format_parts(template["question_parts"], random_inputs)
+        return template["question"].format(*random_inputs)
+
+    @property
+    def options(self):
+        if self.choices is None:
+            return []
+        options, _ = self._unshuffled(self._template())
+        order, _ = _unpack_choices(self.choices)
+        return [options[i] for i in order]
+
+    @property
+    def answer(self):
+        template = self._template()
+        options, answer = self._unshuffled(template)
+        if self.choices is None:
+            return answer
+        order, _ = _unpack_choices(self.choices)
+        return str(order.index(options.index(answer)) + 1)
+
+    def get_question(self):
+        if self.choices is None:
+            return {"question": self.question}
+        return {"question": self.question, "options": self.options}
+
+    def get_question_type(self):
+        return self.question_type
+
+    def check_answer(self, guess):
+        if self.choices is None:
+            return check_open(self.answer, guess)
+        return check_mcq(self.answer, guess)
+
+    def to_question(self):
+        return Question(self.question, self.options, self.answer)
@@ -0,0 +1,146 @@
+import random
+import re
+
+from answer_checking import answer_identity
+
+# ===== MCQ distractors =====
+# Drawing three fresh random inputs per question often repeats the answer for small domains
+# (pnc_4 has ranges 1-5), which makes options.index(answer) ambiguous. Instead every template gets
+# a pool of distinct answers sampled once, and distractors are drawn from the pool with a bounded
+# number of tries. If that is not enough, numbers in the answer are nudged to build distinct options.
+# Options are distinct by value, not spelling (answer_checking.answer_identity), so "15(3x+2)^4" and
+# "5*3*(2+3x)^4" can not both be shown.
+#
+# A distractor is referred to by a small int: i >= 0 is the i-th pool answer, -k is the k-th nudge of
+# the correct answer. Compact question storage keeps these refs instead of the option strings.
+
+# Answers sampled per template, and callback calls allowed to find them.
+POOL_SIZE = 64
+POOL_ATTEMPTS = 4 * POOL_SIZE
+# Random pool draws per question before falling back to nudged answers.
+SAMPLING_BUDGET = 12
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_pools = {}
+
+
+def _random_inputs(args_ranges, rng):
+    """ Same draws as Question._parse_random_rng, from the given generator. """
+    random_inputs = []
+    for rng_type, val_range in args_ranges:
+        if rng_type == "int":
+            random_inputs.append(rng.randint(*map(int, val_range)))
+        else:
+            random_inputs.append(round(rng.uniform(*val_range), 2))
+    return random_inputs
+
+
+def _ranges_key(args_ranges):
+    """ args_ranges as a string that is the same whether the bounds were read as ints or floats. """
+    return repr([(rng_type, float(start), float(stop)) for rng_type, (start, stop) in args_ranges])
+
+
+def nudge(answer, k):
+    """
+    The k-th (k >= 1) variation of an answer, made by shifting the first number in it.
+    Offsets go +1, -1, +2, -2... steps, so every k gives a different string.
+
+    E.g nudge("12.5", 1) -> "13.7", nudge("(3, 4)", 2) -> "(2, 4)"
+    """
+    match = _NUMBER.search(answer)
+    if match is None:
+        raise ValueError(f"cannot build a distinct option from {answer!r}, it has no number to vary")
+    text = match.group()
+    offset = (k + 1) // 2 * (1 if k % 2 else -1)
+    if "." in text:
+        decimals = len(text) - text.index(".") - 1
+        value = float(text)
+        step = max(round(abs(value) * 0.1, decimals), 10 ** -decimals)
+        new_text = str(round(value + offset * step, decimals))
+    else:
+        value = int(text)
+        step = max(1, abs(value) // 10)
+        new_text = str(value + offset * step)
+    return answer[:match.start()] + new_text + answer[match.end():]
+
+
+class AnswerPool(object):
+    """
+    Distinct answers of one dynamic template, sampled once per process.
+
+    The sampling generator is seeded from the template, so every process builds the same pool and refs
+    into it can be shared between processes.
+
+    Methods
+    -------
+    pick(self, answer, rng): list
+        Refs of three distractors, all distinct from each other and from the answer.
+
+    resolve(self, ref, answer): str
+        Option text of a ref.
+
+    distractors(self, answer, rng): list
+        Option texts of three distractors.
+    """
+    def __init__(self, callback, args_ranges, size=POOL_SIZE, attempts=POOL_ATTEMPTS):
+        """
+        Parameters
+        ----------
+        callback: function
+            The template's callback, called with the random inputs.
+        args_ranges: list
+            The template's args_ranges.
+        size: int
+            Number of distinct answers to collect.
+        attempts: int
+            Maximum number of callback calls spent collecting them.
+        """
+        sampler = random.Random(f"{callback.__name__}:{_ranges_key(args_ranges)}")
+        answers = {}
+        for _ in range(attempts):
+            answer = str(callback(*_random_inputs(args_ranges, sampler)))
+            answers.setdefault(answer_identity(answer), answer)
+            if len(answers) >= size:
+                break
+        self.answers = list(answers.values())
+
+    def __len__(self):
+        return len(self.answers)
+
+    def pick(self, answer, rng=random, count=3, budget=SAMPLING_BUDGET):
+        refs = []
+        seen = {answer_identity(answer)}
+        if len(self.answers) > count:
+            for _ in range(budget):
+                ref = rng.randrange(len(self.answers))
+                identity = answer_identity(self.answers[ref])
+                if identity not in seen:
+                    refs.append(ref)
+                    seen.add(identity)
+                    if len(refs) == count:
+                        return refs
+        k = 0
+        while len(refs) < count:
+            k += 1
+            identity = answer_identity(nudge(answer, k))
+            if identity not in seen:
+                refs.append(-k)
+                seen.add(identity)
+        return refs
+
+    def resolve(self, ref, answer):
+        if ref >= 0:
+            return self.answers[ref]
+        return nudge(answer, -ref)
+
+    def distractors(self, answer, rng=random, count=3):
+        return [self.resolve(ref, answer) for ref in self.pick(answer, rng, count)]
+
+
+def answer_pool(callback, args_ranges):
+    """ The AnswerPool of a template, built on first use and then cached. """
+    key = (callback.__name__, _ranges_key(args_ranges))
+    pool = _pools.get(key)
+    if pool is None:
+        pool = _pools[key] = AnswerPool(callback, args_ranges)
+    return pool
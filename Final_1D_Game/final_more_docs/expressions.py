@@ -0,0 +1,410 @@
+import re
+import weakref
+from fractions import Fraction
+from functools import lru_cache
+
+# ========== Expression engine for the derivative questions ==========
+# A small symbolic engine for expressions in x: numbers, x, e, + - * / ^, sin, cos and ln.
+#
+# Expressions are hash-consed: every node is built through the constructors below (num, add, mul, power,
+# func), which put it in a canonical normal form and return the one live node with that form. Two
+# expressions are therefore equivalent (up to the normal form) exactly when they are the same object, so
+# comparing parsed answers is an `is` check. The constructors and the parser are memoized, so a batch of
+# similar questions does not simplify the same subexpressions again.
+#
+# The normal form flattens and sorts sums and products, folds numbers (exactly, as fractions), collects like
+# terms and equal bases, distributes numbers over sums and integer powers over products. It does not expand
+# powers of sums, so (x+1)^2 and x^2+2x+1 stay different.
+
+EXPR_CACHE_SIZE = 65536
+# Larger integer powers of numbers are left unevaluated
+MAX_FOLDED_EXPONENT = 1024
+# So are powers whose numerator or denominator would have more bits than this, about 1200 digits: guesses
+# are untrusted, and (9^1024)^1024 would otherwise be computed in full
+MAX_FOLDED_BITS = 4096
+# Guesses are untrusted: longer or more deeply nested ones are rejected before they are parsed, not left to
+# hit the recursion limit. The bank's answers are far below both.
+MAX_TOKENS = 512
+MAX_DEPTH = 64
+FUNCTIONS = ("sin", "cos", "ln")
+
+_nodes = weakref.WeakValueDictionary()
+
+# Sort order of the node kinds inside sums and products
+_KIND_ORDER = {"num": 0, "const": 1, "var": 2, "pow": 3, "func": 4, "mul": 5, "add": 6}
+
+
+class Expr(object):
+    """
+    A node of an expression tree, always in canonical form. Build nodes with the constructors, not directly.
+
+    Attributes
+    ----------
+    kind: str
+        "num", "var", "const", "add", "mul", "pow" or "func".
+    args: tuple
+        Children: the Fraction of a num, the name of a var/const, the name and argument of a func,
+        the base and exponent of a pow, the terms of an add or the factors of a mul.
+    text: str
+        Canonical spelling, e.g "15*(3*x+2)^4".
+    """
+    __slots__ = ("kind", "args", "text", "sort_key", "__weakref__")
+
+    def __repr__(self):
+        return f"Expr({self.text!r})"
+
+    def __str__(self):
+        return self.text
+
+
+def _intern(kind, args, text):
+    key = (kind, args)
+    node = _nodes.get(key)
+    if node is None:
+        node = Expr()
+        node.kind = kind
+        node.args = args
+        node.text = text
+        node.sort_key = (_KIND_ORDER[kind], text)
+        _nodes[key] = node
+    return node
+
+
+def _wrap(node, kinds):
+    """ Text of node, in parentheses if its kind is in kinds or it is a negative or fractional number. """
+    if node.kind in kinds or (node.kind == "num" and (node.args[0] < 0 or node.args[0].denominator != 1)):
+        return f"({node.text})"
+    return node.text
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def num(value):
+    value = Fraction(value)
+    return _intern("num", (value,), str(value))
+
+
+ZERO = num(0)
+ONE = num(1)
+X = _intern("var", ("x",), "x")
+E = _intern("const", ("e",), "e")
+
+
+def _split_coefficient(node):
+    """ (number, rest) with node == number * rest. """
+    if node.kind == "num":
+        return node.args[0], ONE
+    if node.kind == "mul" and node.args[0].kind == "num":
+        rest = node.args[1:]
+        return node.args[0].args[0], rest[0] if len(rest) == 1 else _intern_mul(rest)
+    return Fraction(1), node
+
+
+def _intern_mul(factors):
+    first = factors[0]
+    if first.kind != "num":
+        return _intern("mul", factors, "*".join(_wrap(factor, ("add",)) for factor in factors))
+    text = "*".join(_wrap(factor, ("add",)) for factor in factors[1:])
+    if first.args[0] == -1:
+        return _intern("mul", factors, "-" + text)
+    return _intern("mul", factors, first.text + "*" + text)
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def add(*terms):
+    """ Canonical sum of expressions. """
+    flat = []
+    for term in terms:
+        flat.extend(term.args if term.kind == "add" else (term,))
+    constant = Fraction(0)
+    coefficients = {}
+    for term in flat:
+        coefficient, rest = _split_coefficient(term)
+        if rest is ONE:
+            constant += coefficient
+        else:
+            coefficients[rest] = coefficients.get(rest, 0) + coefficient
+    result = [mul(num(coefficient), rest) for rest, coefficient in coefficients.items() if coefficient != 0]
+    result.sort(key=lambda node: node.sort_key)
+    if constant != 0:
+        result.append(num(constant))
+    if not result:
+        return ZERO
+    if len(result) == 1:
+        return result[0]
+    text = result[0].text
+    for term in result[1:]:
+        coefficient, rest = _split_coefficient(term)
+        if coefficient < 0:
+            text += "-" + mul(num(-coefficient), rest).text
+        else:
+            text += "+" + term.text
+    return _intern("add", tuple(result), text)
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def mul(*factors):
+    """ Canonical product of expressions. """
+    flat = []
+    for factor in factors:
+        flat.extend(factor.args if factor.kind == "mul" else (factor,))
+    coefficient = Fraction(1)
+    exponents = {}
+    for factor in flat:
+        if factor.kind == "num":
+            coefficient *= factor.args[0]
+            continue
+        base, exponent = factor.args if factor.kind == "pow" else (factor, ONE)
+        exponents[base] = add(exponents[base], exponent) if base in exponents else exponent
+    if coefficient == 0:
+        return ZERO
+    result = []
+    for base, exponent in exponents.items():
+        factor = power(base, exponent)
+        if factor.kind == "num":
+            coefficient *= factor.args[0]
+        elif factor.kind == "mul":
+            # An integer power of a product that folded a number
+            factor_coefficient, rest = _split_coefficient(factor)
+            coefficient *= factor_coefficient
+            result.extend(rest.args if rest.kind == "mul" else (rest,))
+        else:
+            result.append(factor)
+    if len(result) == 1 and result[0].kind == "add" and coefficient != 1:
+        return add(*[mul(num(coefficient), term) for term in result[0].args])
+    result.sort(key=lambda node: node.sort_key)
+    if coefficient != 1 or not result:
+        result.insert(0, num(coefficient))
+    if len(result) == 1:
+        return result[0]
+    return _intern_mul(tuple(result))
+
+
+def _power_bits(number, exponent):
+    """ Upper bound on the bits of the numerator or denominator of number ** exponent. """
+    return max(number.numerator.bit_length(), number.denominator.bit_length()) * abs(int(exponent))
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def power(base, exponent):
+    """ Canonical base^exponent. """
+    if exponent is ZERO or base is ONE:
+        return ONE
+    if exponent is ONE:
+        return base
+    if exponent.kind == "num":
+        value = exponent.args[0]
+        if value.denominator == 1 and abs(value) <= MAX_FOLDED_EXPONENT:
+            if (base.kind == "num" and (base.args[0] != 0 or value > 0)
+                    and _power_bits(base.args[0], value) <= MAX_FOLDED_BITS):
+                return num(base.args[0] ** int(value))
+            if base.kind == "mul":
+                return mul(*[power(factor, exponent) for factor in base.args])
+        if base.kind == "pow" and value.denominator == 1:
+            return power(base.args[0], mul(base.args[1], exponent))
+    if base.kind == "pow" and base.args[0] is E:
+        return power(E, mul(base.args[1], exponent))
+    text = _wrap(base, ("add", "mul", "pow")) + "^" + _wrap(exponent, ("add", "mul", "pow"))
+    return _intern("pow", (base, exponent), text)
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def func(name, argument):
+    """ Canonical sin, cos or ln of an expression. """
+    if name not in FUNCTIONS:
+        raise ValueError(f"unknown function {name!r}")
+    if argument is ZERO and name != "ln":
+        return ZERO if name == "sin" else ONE
+    if name == "ln":
+        if argument is ONE:
+            return ZERO
+        if argument is E:
+            return ONE
+        if argument.kind == "pow" and argument.args[0] is E:
+            return argument.args[1]
+    return _intern("func", (name, argument), f"{name}({argument.text})")
+
+
+def neg(node):
+    return mul(num(-1), node)
+
+
+def sub(left, right):
+    return add(left, neg(right))
+
+
+def div(left, right):
+    return mul(left, power(right, num(-1)))
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def derivative(node):
+    """ d/dx of an expression, in canonical form. """
+    kind = node.kind
+    if kind in ("num", "const"):
+        return ZERO
+    if kind == "var":
+        return ONE
+    if kind == "add":
+        return add(*[derivative(term) for term in node.args])
+    if kind == "mul":
+        first, rest = node.args[0], node.args[1:]
+        rest = rest[0] if len(rest) == 1 else mul(*rest)
+        return add(mul(derivative(first), rest), mul(first, derivative(rest)))
+    if kind == "pow":
+        base, exponent = node.args
+        if base is E:
+            return mul(node, derivative(exponent))
+        if exponent.kind == "num":
+            return mul(exponent, power(base, num(exponent.args[0] - 1)), derivative(base))
+        # General case, d/dx b^u = b^u * (u' ln b + u b'/b)
+        return mul(node, add(mul(derivative(exponent), func("ln", base)), mul(exponent, derivative(base), power(base, num(-1)))))
+    name, argument = node.args
+    inner = derivative(argument)
+    if name == "sin":
+        return mul(func("cos", argument), inner)
+    if name == "cos":
+        return neg(mul(func("sin", argument), inner))
+    return mul(inner, power(argument, num(-1)))
+
+
+# ===== Parser =====
+
+_TOKEN = re.compile(r"\s*(?:(\d+\.?\d*|\.\d+)|([a-z]+)|(.))")
+
+
+def _tokenize(text):
+    tokens = []
+    for number, name, symbol in _TOKEN.findall(text.lower().strip()):
+        if number:
+            tokens.append(("num", number))
+        elif name:
+            # "xe" or "ex" without an operator are products of the variable and e
+            if name in FUNCTIONS or name in ("x", "e"):
+                tokens.append(("name", name))
+            elif set(name) <= {"x", "e"}:
+                tokens.extend(("name", letter) for letter in name)
+            else:
+                raise ValueError(f"unknown name {name!r}")
+        elif symbol in "+-*/^()":
+            tokens.append(("op", symbol))
+        elif symbol.strip():
+            raise ValueError(f"unexpected character {symbol!r}")
+    if len(tokens) > MAX_TOKENS:
+        raise ValueError(f"more than {MAX_TOKENS} tokens")
+    return tokens
+
+
+class _Parser(object):
+    """ Recursive descent parser. Juxtaposition is multiplication, e.g 37x^33cos(x) is 37*x^33*cos(x). """
+    def __init__(self, text):
+        self.tokens = _tokenize(text)
+        self.position = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, value=None):
+        token = self.peek()
+        if token[0] is None or (value is not None and token[1] != value):
+            raise ValueError(f"expected {value or 'more input'}")
+        self.position += 1
+        return token
+
+    def parse(self):
+        node = self.expression()
+        if self.position != len(self.tokens):
+            raise ValueError(f"unexpected {self.peek()[1]!r}")
+        return node
+
+    def expression(self):
+        node = self.term()
+        while self.peek() in (("op", "+"), ("op", "-")):
+            operator = self.take()[1]
+            right = self.term()
+            node = add(node, right) if operator == "+" else sub(node, right)
+        return node
+
+    def term(self):
+        node = self.unary()
+        while True:
+            kind, value = self.peek()
+            if kind == "op" and value in "*/":
+                self.take()
+                right = self.unary()
+                node = mul(node, right) if value == "*" else div(node, right)
+            elif kind in ("num", "name") or (kind, value) == ("op", "("):
+                node = mul(node, self.power())
+            else:
+                return node
+
+    def unary(self):
+        # Every recursion (brackets, signs, exponents) goes through here
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ValueError(f"nested more than {MAX_DEPTH} deep")
+        if self.peek() in (("op", "-"), ("op", "+")):
+            operator = self.take()[1]
+            node = self.unary()
+            node = neg(node) if operator == "-" else node
+        else:
+            node = self.power()
+        self.depth -= 1
+        return node
+
+    def power(self):
+        node = self.primary()
+        if self.peek() == ("op", "^"):
+            self.take()
+            node = power(node, self.unary())
+        return node
+
+    def primary(self):
+        kind, value = self.take()
+        if kind == "num":
+            return num(Fraction(value))
+        if kind == "name":
+            if value == "x":
+                return X
+            if value == "e":
+                return E
+            self.take("(")
+            argument = self.expression()
+            self.take(")")
+            return func(value, argument)
+        if value == "(":
+            node = self.expression()
+            self.take(")")
+            return node
+        raise ValueError(f"unexpected {value!r}")
+
+
+@lru_cache(maxsize=EXPR_CACHE_SIZE)
+def parse(text):
+    """
+    Parses an expression in x into its canonical node.
+
+    Parameters
+    ----------
+    text: str
+        E.g "5*3*(2+3x)^4", "-50e^(-50x)" or "1/x".
+
+    Returns
+    -------
+    Expr
+        The canonical node. Equivalent spellings give the same object.
+
+    Raises
+    ------
+    ValueError
+        If the text is not an expression.
+    """
+    return _Parser(text).parse()
+
+
+def equivalent(left, right):
+    """ If two expression strings have the same normal form. False if either does not parse. """
+    try:
+        return parse(left) is parse(right)
+    except ValueError:
+        return False
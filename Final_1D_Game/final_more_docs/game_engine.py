@@ -0,0 +1,227 @@
+import time
+
+from rng_streams import stream
+
+# ========== I/O-free game flow ==========
+# GameSession runs the same flow as the original main() (3 rounds, health, repeat/bootcamp, final
+# banner) but never prints or reads. It is fed one line of player input at a time and returns the
+# output as a list of (kind, text) events:
+#   ("print", text)  text printed with a newline, like print()
+#   ("slow", text)   text shown with the typewriter effect, like delay_print()
+#   ("clear", "")    clear the screen
+# main.main() connects a session to the terminal and quiz_server.py connects thousands of them to sockets.
+
+TITLE_BANNER = r'''
+ _____ ____  _____ ____  _     _      ____  ____  _____  
+/    //  __\/  __// ___\/ \ /|/ \__/|/  _ \/  __\/  __/  
+|  __\|  \/||  \  |    \| |_||| |\/||| / \||  \/||  \    
+| |   |    /|  /_ \___ || | ||| |  ||| \_/||    /|  /_   
+\_/   \_/\_\\____\\____/\_/ \|\_/  \|\____/\_/\_\\____\  
+                                                         
+    '''
+
+SIMULATOR_BANNER = r'''
+  ____  _  _      _     _     ____  _____  ____  ____ 
+/ ___\/ \/ \__/|/ \ /\/ \   /  _ \/__ __\/  _ \/  __\
+|    \| || |\/||| | ||| |   | / \|  / \  | / \||  \/|
+\___ || || |  ||| \_/|| |_/\| |-||  | |  | \_/||    /
+\____/\_/\_/  \|\____/\____/\_/ \|  \_/  \____/\_/\_\
+                                                     
+    '''
+
+END_BANNER = r'''
+     _  __   _____  _    ___  _   ____ ___  _ _____
+    / |/ /  /__ __\/ \ /|\  \//  /  _ \\  \///  __/
+    |   /     / \  | |_|| \  /   | | // \  / |  \  
+    |   \     | |  | | || /  \   | |_\\ / /  |  /_ 
+    \_|\_\    \_/  \_/ \|/__/\\  \____//_/   \____\
+                                               
+    '''
+
+NAME_PROMPT = "Before we start, we need your name: "
+ANSWER_PROMPT = "Type your answer:\n"
+RULES = "Rules:\n1) Attempt all questions\n2) Don't cheat (or just don't get caught)\n3) All values are rounded to 2 decimal places, and vectors are represented in (x, y), spacing included.\n4) Click <ENTER> to get the next question"
+REPEAT_PROMPT = "\n1) Repeat \n2) Bootcamp\n"
+BOOTCAMP_PROMPT = "\n\nWho is the best CTD prof?\n1)Prof Matthieu <3\n2)Prof Cyrille <3\n3)Both\n4)None of the above\n"
+BOOTCAMP_RESPONSE = {"1": "Thanks Prof Matthieu for completing Bootcamp – but you failed.",
+                     "2": "Thanks Prof Cyrille for completing Bootcamp – but you failed.",
+                     "3": "\n\nMadlad ... you managed to pass via Bootcamp!",
+                     "4": "\n\nIt's ok u tried but u still failed"}
+
+
+class GameSession(object):
+    """
+    One player's full game as a state machine: score, health and round state are all kept on the session.
+
+    Methods
+    -------
+    start(self): list
+        Starts the game. Returns the events up to the first prompt.
+
+    send(self, line): list
+        Feeds one line of player input. Returns the events up to the next prompt, or to the end of the game.
+    """
+    def __init__(self, game_cls, total_qns=10, rounds=3, health=3, seed=None, pool=None, sampler=None, store=None):
+        """
+        Parameters
+        ----------
+        game_cls: class
+            The Game class (from main.py) used for each round.
+        total_qns: int
+            Total number of questions in one round of the game.
+        rounds: int
+            Number of rounds (Game objects) in the session.
+        health: int
+            Starting health, one is lost at the start of every round.
+        seed: int
+            Makes the session replayable: round i draws everything from rng_streams.stream(seed, "round", i).
+            By default the rounds use the global random module.
+        pool: QuestionPool
+            Pool of fresh questions for unseeded rounds, see question_pool.py.
+        sampler: AdaptiveSampler
+            Picks the questions of every round from the player's running score, see sampler.py.
+        store: ScoreStore
+            Records the session, every answer and every round result, see score_store.py.
+        """
+        self.game_cls = game_cls
+        self.total_qns = total_qns
+        self.rounds = rounds
+        self.health = health
+        self.seed = seed
+        self.pool = pool
+        self.sampler = sampler
+        self.store = store
+        self.session_id = None
+        self.curr_round = 1
+        self.games = []
+        self.username = None
+        # The question waiting for an answer while prompt is ANSWER_PROMPT
+        self.question = None
+        self.bootcamp = True
+        self.prompt = None
+        self.done = False
+        self._events = []
+        self._flow = self._play()
+
+    def start(self):
+        return self._resume(None)
+
+    def send(self, line):
+        if self.done:
+            raise RuntimeError("the game session has already ended")
+        return self._resume(line)
+
+    def _resume(self, line):
+        try:
+            self.prompt = self._flow.send(line)
+        except StopIteration:
+            self.prompt = None
+            self.done = True
+        events, self._events = self._events, []
+        return events
+
+    def _print(self, text):
+        self._events.append(("print", text))
+
+    def _slow(self, text):
+        self._events.append(("slow", text))
+
+    def _clear(self):
+        self._events.append(("clear", ""))
+
+    def _play(self):
+        """ The game flow. Every yield hands a prompt out and receives the player's line back. """
+        total_qns = self.total_qns
+        if self.seed is None:
+            self.games = [self.game_cls(total_qns, pool=self.pool, sampler=self.sampler) for _ in range(self.rounds)]
+        else:
+            self.games = [self.game_cls(total_qns, stream(self.seed, "round", i), sampler=self.sampler)
+                          for i in range(self.rounds)]
+        self._print(f"Here are your stats (out of {total_qns}): {[game.get_score() for game in self.games]}")
+
+        start = time.time()
+        self._clear()
+
+        self._print(TITLE_BANNER)
+        self._slow("=======================================================\n")
+        self._print(SIMULATOR_BANNER)
+        self._slow("=======================================================\n")
+
+        self._slow('''Hello….! Welcome to the Freshmore Simulator—
+where we test and predict whether you'll need Bootcamp or not :”)\n\n''')
+
+        self.username = yield NAME_PROMPT
+        if self.store is not None:
+            self.session_id = self.store.start_session(self.username)
+
+        self._slow(f'''\nHello {self.username}, welcome to Freshmore Term 1 Simulator! Today we'll test you on your Maths for a bit...''')
+
+        self._slow('''\n\n. . .
+. . .
+. . .
+Entering Game . . .
+. . .
+. . .\n\n''')
+
+        self._print(RULES)
+        yield ""
+
+        for game in self.games:
+            self.health -= 1
+            self._print(f"\n\n>WELCOME TO ROUND {self.curr_round}.\n")
+            for game_no in range(total_qns):
+                self._print(f"Question {game_no + 1}")
+                question = self.question = game.next_question()
+                self._print(game.question_text(question))
+                asked_at = time.time()
+                guess = yield ANSWER_PROMPT
+                correct = game.submit(question, guess)
+                if self.store is not None:
+                    self.store.record_attempt(self.session_id, self.curr_round, game.qn_no, game.topic(), correct,
+                                              round(time.time() - asked_at, 3))
+                self._print(game.feedback(correct))
+                yield ""
+            self._print(f"\n>YOU'VE COMPLETED ROUND {self.curr_round}.\n")
+            self._print(f"Final score is {game.score} out of {game.total_qns}.")
+            yield ""
+            player_pass, events = game.grade()
+            if self.store is not None:
+                self.store.record_round(self.session_id, self.curr_round, game.score, game.total_qns, player_pass)
+            self._events.extend(events)
+            yield ""
+            self._clear()
+            self.curr_round += 1
+
+            if not player_pass:
+                if self.health > 0:
+                    self._slow(f"But it's okay, you have {self.health} health left, do you want to repeat or just go for Bootcamp now?")
+                    repeat = yield REPEAT_PROMPT
+                    while repeat not in ["1", "2"]:
+                        self._print("You're getting on my nerves, be careful I don't send you to bootcamp!")
+                        repeat = yield REPEAT_PROMPT
+                    if repeat == "1":
+                        continue
+                    self.bootcamp = True
+                    break
+                else:
+                    self._slow("It's okay, you have one last shot...\n at bootcamp</3")
+                    self.bootcamp = True
+                    break
+
+        #bootcamp
+        if self.bootcamp:
+            self._slow("\n\nHello again... welcome to Bootcamp. ")
+            self._slow("This is your last chance on passing term 1– all based on an all-or-nothing question... \nPerhaps the trickiest question of them all...")
+            bootcamp_answer = yield BOOTCAMP_PROMPT
+            while bootcamp_answer not in BOOTCAMP_RESPONSE:
+                self._print("You can run, but you can't hide... Pick one of the options!")
+                bootcamp_answer = yield BOOTCAMP_PROMPT
+            self._slow(BOOTCAMP_RESPONSE[bootcamp_answer])
+
+        #endgame
+        self._slow("\n\n...\n....,\n.....\n......\n\n")
+        time_taken = round(time.time() - start, 2)
+        if self.store is not None:
+            self.store.end_session(self.session_id, time_taken, self.health, self.bootcamp)
+        self._slow(f"Congratulations! You've just wasted {time_taken}s playing a stupid quiz game :D")
+        self._print(END_BANNER)
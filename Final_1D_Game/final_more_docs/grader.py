@@ -0,0 +1,295 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import callback_registry
+import main
+from answer_checking import check_mcq, check_open
+from answer_tables import answer_function
+from paper_generator import generate_paper
+from rng_streams import stream
+
+# ========== Offline grader ==========
+# Grades JSONL submission logs collected from many machines. Every record has a "player" and a "guess", and
+# identifies its question in one of three ways:
+#   {"template": "4", "args": [20, 7.5]}              inputs of a dynamic template, the answer is recomputed.
+#                                                     MCQs also need the "options" shown, in order.
+#   {"template": "4", "seed": 123}                    question built by Question.from_template(template,
+#                                                     rng_streams.stream(seed, "question")).
+#   {"seed": 7, "paper": 41, "position": 3}           question 3 (from 1) of paper 41 of paper_generator.py,
+#                                                     optionally with "questions" if papers were not 10 long
+#                                                     and "attempt" for papers redrawn as duplicates.
+# Static templates only need {"template": "27"}. The log is read in chunks that are graded on a process pool,
+# with a bounded number of chunks in flight, and only per-player totals are kept, so memory does not depend
+# on the number of records.
+
+CHUNK_LINES = 4096
+IN_FLIGHT_PER_WORKER = 2
+PAPER_CACHE_SIZE = 1024
+# Same pass mark as Game.grade
+PASS_PERCENT = 50
+REPORT_HEADER = ["player", "answered", "correct", "score_percent", "passed"]
+
+
+@lru_cache(maxsize=PAPER_CACHE_SIZE)
+def paper_answers(seed, paper, total_qns, attempt=0):
+    """ (question_type, answer) of every question of a generated paper. """
+    return [(question["question_type"], question["answer"])
+            for question in generate_paper(paper, seed, total_qns, attempt)["questions"]]
+
+
+def checked_args(args, args_ranges):
+    """
+    The inputs of a submission record, checked against the template's ranges before they reach its callback.
+    Inputs of int ranges are passed on as ints, so 3.0 gets the same answer as 3.
+
+    Raises
+    ------
+    ValueError
+        If there are not as many inputs as ranges, or an input is not a number in its range (an int for int
+        ranges).
+    """
+    if not isinstance(args, list) or len(args) != len(args_ranges):
+        raise ValueError(f"expected {len(args_ranges)} args")
+    for value, (rng_type, (start, stop)) in zip(args, args_ranges):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"arg {value!r} is not a number")
+        if rng_type == "int" and value != int(value):
+            raise ValueError(f"arg {value!r} is not an int")
+        if not start <= value <= stop:
+            raise ValueError(f"arg {value!r} is outside [{start}, {stop}]")
+    return [int(value) if rng_type == "int" else value for value, (rng_type, _) in zip(args, args_ranges)]
+
+
+def answer_key(record):
+    """
+    Finds the answer to the question a submission record refers to.
+
+    Returns
+    -------
+    (str, str)
+        The answer type ("open" or "mcq") and the answer, as Question.answer would hold it.
+    """
+    if "paper" in record:
+        answers = paper_answers(record["seed"], record["paper"], record.get("questions", 10), record.get("attempt", 0))
+        if not 1 <= record["position"] <= len(answers):
+            raise IndexError(f"position {record['position']} is not on the paper")
+        return answers[record["position"] - 1]
+    template = main.QN_ANS.template(str(record["template"]))
+    if "seed" in record:
+        question = main.QN_ANS.generate(str(record["template"]), stream(record["seed"], "question"))
+        return question.question_type, question.answer
+    if template["question_type"] != "dynamic":
+        answer = template["answer"]
+    else:
+        callback = template.get("callback") or callback_registry.get(template["callback_func"])
+        args = checked_args(record["args"], template["args_ranges"])
+        answer = answer_function(template, callback)(*args)
+    if template["answer_type"] == "mcq" and "options" in record:
+        return "mcq", str(record["options"].index(answer) + 1)
+    return "open", answer
+
+
+def grade_record(record):
+    """ If the guess of a submission record is right. """
+    answer_type, answer = answer_key(record)
+    guess = str(record["guess"])
+    if answer_type == "mcq":
+        return check_mcq(answer, guess)
+    return check_open(answer, guess)
+
+
+def grade_lines(lines):
+    """
+    Grades a chunk of JSONL lines.
+
+    Returns
+    -------
+    (dictionary, int)
+        {player: [answered, correct]} for the chunk, and the number of records that could not be graded.
+    """
+    totals = {}
+    invalid = 0
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            player = record["player"]
+            correct = grade_record(record)
+        except Exception:
+            # Whatever one bad record raises, e.g inputs a callback cannot take, the rest are still graded
+            invalid += 1
+            continue
+        player_totals = totals.get(player)
+        if player_totals is None:
+            player_totals = totals[player] = [0, 0]
+        player_totals[0] += 1
+        player_totals[1] += correct
+    return totals, invalid
+
+
+def _chunks(in_file, chunk_lines):
+    chunk = []
+    for line in in_file:
+        chunk.append(line)
+        if len(chunk) == chunk_lines:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def grade_file(path, processes=None, chunk_lines=CHUNK_LINES):
+    """
+    Grades a JSONL submission log.
+
+    Parameters
+    ----------
+    path: str
+        Path to the log.
+    processes: int
+        Number of worker processes, os.cpu_count() by default. 1 grades in this process.
+    chunk_lines: int
+        Lines per task sent to a worker.
+
+    Returns
+    -------
+    (dictionary, int, int)
+        {player: [answered, correct]}, the number of records read and the number of invalid records.
+    """
+    totals = {}
+    records = invalid = 0
+
+    def merge(result):
+        nonlocal records, invalid
+        chunk_totals, chunk_invalid = result
+        invalid += chunk_invalid
+        records += chunk_invalid
+        for player, (answered, correct) in chunk_totals.items():
+            player_totals = totals.get(player)
+            if player_totals is None:
+                player_totals = totals[player] = [0, 0]
+            player_totals[0] += answered
+            player_totals[1] += correct
+            records += answered
+
+    with open(path, "rb") as in_file:
+        if processes == 1:
+            for chunk in _chunks(in_file, chunk_lines):
+                merge(grade_lines(chunk))
+            return totals, records, invalid
+        processes = processes or os.cpu_count() or 1
+        pending = deque()
+        with ProcessPoolExecutor(processes) as executor:
+            for chunk in _chunks(in_file, chunk_lines):
+                pending.append(executor.submit(grade_lines, chunk))
+                if len(pending) >= processes * IN_FLIGHT_PER_WORKER:
+                    merge(pending.popleft().result())
+            while pending:
+                merge(pending.popleft().result())
+    return totals, records, invalid
+
+
+def write_report(totals, out_file, out_format="csv"):
+    """ Writes one score report per player, as CSV rows or JSON lines. """
+    writer = csv.writer(out_file) if out_format == "csv" else None
+    if writer is not None:
+        writer.writerow(REPORT_HEADER)
+    for player in sorted(totals, key=str):
+        answered, correct = totals[player]
+        percent = round(correct / answered * 100, 2)
+        row = [player, answered, correct, percent, percent >= PASS_PERCENT]
+        if writer is not None:
+            writer.writerow(row)
+        else:
+            out_file.write(json.dumps(dict(zip(REPORT_HEADER, row)), ensure_ascii=False) + "\n")
+
+
+def synthetic_submissions(count, players=1000, seed=0):
+    """
+    Submission records in all three forms, about 70% right, for benchmarking.
+
+    Yields
+    ------
+    dictionary
+        A submission record.
+    """
+    rng = random.Random(seed)
+    keys = list(main.QN_ANS.keys())
+    for i in range(count):
+        player = f"player{rng.randrange(players)}"
+        form = i % 3
+        if form == 0:
+            record = {"seed": seed, "paper": rng.randrange(PAPER_CACHE_SIZE), "position": rng.randint(1, 10)}
+        elif form == 1:
+            record = {"template": rng.choice(keys), "seed": rng.getrandbits(32)}
+        else:
+            key = rng.choice(keys)
+            template = main.QN_ANS.template(key)
+            record = {"template": key}
+            if template["question_type"] == "dynamic":
+                record["args"] = main.Question._parse_random_rng(template["args_ranges"], rng)
+        answer_type, answer = answer_key(record)
+        record["player"] = player
+        record["guess"] = answer if rng.random() < 0.7 else "0"
+        yield record
+
+
+def benchmark(count, processes=None, chunk_lines=CHUNK_LINES):
+    """ Writes count synthetic records to a temporary log and grades it. Returns records graded per second. """
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as log_file:
+        for record in synthetic_submissions(count):
+            log_file.write(json.dumps(record) + "\n")
+    try:
+        start = time.perf_counter()
+        totals, records, invalid = grade_file(log_file.name, processes, chunk_lines)
+        elapsed = time.perf_counter() - start
+    finally:
+        os.remove(log_file.name)
+    print(f"Graded {records} records ({invalid} invalid) for {len(totals)} players in {elapsed:.2f}s")
+    return records / elapsed
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Grade JSONL submission logs offline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    grade_parser = subparsers.add_parser("grade", help="grade a submission log and write per-player reports")
+    grade_parser.add_argument("log", help="JSONL submission log")
+    grade_parser.add_argument("-o", "--output", default="-", help="report file, - for stdout")
+    grade_parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    bench_parser = subparsers.add_parser("bench", help="measure grading throughput on synthetic records")
+    bench_parser.add_argument("--records", type=int, default=100000)
+    for sub in (grade_parser, bench_parser):
+        sub.add_argument("--processes", type=int, default=None)
+        sub.add_argument("--chunk-lines", type=int, default=CHUNK_LINES)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        rate = benchmark(args.records, args.processes, args.chunk_lines)
+        print(f"{rate:.0f} records/s")
+        return
+
+    start = time.perf_counter()
+    totals, records, invalid = grade_file(args.log, args.processes, args.chunk_lines)
+    out_file = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        write_report(totals, out_file, args.format)
+    finally:
+        if out_file is not sys.stdout:
+            out_file.close()
+    elapsed = time.perf_counter() - start
+    print(f"Graded {records} records ({invalid} invalid) for {len(totals)} players, {records / elapsed:.0f} records/s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    run()
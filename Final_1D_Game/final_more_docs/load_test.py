@@ -0,0 +1,271 @@
+import argparse
+import asyncio
+import gc
+import os
+import random
+import resource
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+# Bots play without the typewriter delays, this must be set before main is imported
+os.environ.setdefault("FRESHMORE_HEADLESS", "1")
+
+import main
+from game_engine import ANSWER_PROMPT, BOOTCAMP_PROMPT, BOOTCAMP_RESPONSE, NAME_PROMPT, REPEAT_PROMPT, GameSession
+from question_pool import QuestionPool
+from renderer import events_to_text
+from rng_streams import derive_seed, stream
+from sampler import AdaptiveSampler, BankIndex
+from shared_pool import SharedQuestionPool
+
+# ========== Load generator ==========
+# Scripted bot players drive full GameSession games, the same flow as main() and the quiz server: the
+# name prompt, three rounds of questions, the repeat/Bootcamp choice after a failed round and the Bootcamp
+# question. Every bot answers right with its own probability and thinks for a time drawn from the
+# --think distribution before each answer. Each process runs its bots as asyncio tasks, up to
+# --concurrency games at once, so thousands of players are in flight the way they are on the server.
+#
+# Reported: finished sessions per second, the latency of every answer (checking it, the feedback and
+# building the next question, as the player waits for it) as percentiles, and the memory one live session
+# holds.
+#
+#   python load_test.py --players 2000 --processes 4 --concurrency 500 --accuracy 0.6 --think exp:0.05
+
+PERCENTILES = (50, 90, 99, 99.9)
+# Live sessions measured for the memory per session
+MEMORY_SAMPLE = 200
+
+
+def think_time(spec):
+    """
+    Parses a think-time distribution.
+
+    Parameters
+    ----------
+    spec: str
+        "0" (no thinking), "fixed:s", "uniform:low,high", "exp:mean" or "lognormal:mu,sigma", in seconds.
+
+    Returns
+    -------
+    function
+        Called with a random.Random, returns a think time in seconds.
+    """
+    kind, _, params = spec.partition(":")
+    values = [float(value) for value in params.split(",")] if params else []
+    distributions = {
+        "0": (0, lambda rng: 0.0),
+        "fixed": (1, lambda rng: values[0]),
+        "uniform": (2, lambda rng: rng.uniform(values[0], values[1])),
+        "exp": (1, lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0),
+        "lognormal": (2, lambda rng: rng.lognormvariate(values[0], values[1])),
+    }
+    if kind not in distributions or len(values) != distributions[kind][0]:
+        raise ValueError(f"bad think time {spec!r}, expected 0, fixed:s, uniform:low,high, exp:mean or lognormal:mu,sigma")
+    return distributions[kind][1]
+
+
+class Bot(object):
+    """
+    Scripted player, answering the prompts of a GameSession.
+
+    Methods
+    -------
+    reply(self, session): str
+        The line the bot types at the session's current prompt.
+
+    think(self): float
+        Seconds the bot takes before answering a question.
+    """
+    def __init__(self, name, rng, accuracy=0.6, think=None, repeat_prob=0.7):
+        """
+        Parameters
+        ----------
+        name: str
+            Name typed at the name prompt.
+        rng: random.Random
+            The bot's own generator, for its answers, choices and think times.
+        accuracy: float
+            Probability of answering a question right.
+        think: function
+            Think time distribution, see think_time. No thinking by default.
+        repeat_prob: float
+            Probability of repeating a failed round rather than going to Bootcamp.
+        """
+        self.name = name
+        self.rng = rng
+        self.accuracy = accuracy
+        self._think = think or (lambda rng: 0.0)
+        self.repeat_prob = repeat_prob
+
+    def answer(self, question):
+        if self.rng.random() < self.accuracy:
+            return question.answer
+        if question.question_type == "mcq":
+            return self.rng.choice([option for option in "1234" if option != question.answer])
+        return "no idea"
+
+    def reply(self, session):
+        prompt = session.prompt
+        if prompt == NAME_PROMPT:
+            return self.name
+        if prompt == ANSWER_PROMPT:
+            return self.answer(session.question)
+        if prompt == REPEAT_PROMPT:
+            return "1" if self.rng.random() < self.repeat_prob else "2"
+        if prompt == BOOTCAMP_PROMPT:
+            return self.rng.choice(list(BOOTCAMP_RESPONSE))
+        return ""
+
+    def think(self):
+        return self._think(self.rng)
+
+
+def _session_factory(config, worker=0):
+    """ Builds the GameSession of the i-th player, configured like the quiz server. """
+    seed = config["seed"]
+    pool = None
+    if seed is None and config.get("shared_pool"):
+        pool = SharedQuestionPool.attach(config["shared_pool"], worker, main.QN_ANS)
+    elif seed is None and config["pool"]:
+        pool = QuestionPool(main.QN_ANS).start()
+    index = BankIndex(main.QN_ANS) if config["adaptive"] else None
+
+    def factory(i):
+        sampler = None if index is None else AdaptiveSampler(index)
+        session_seed = None if seed is None else derive_seed(seed, "session", i)
+        return GameSession(main.Game, total_qns=config["questions"], seed=session_seed, pool=pool, sampler=sampler)
+    return factory
+
+
+def _bot(config, i, think):
+    rng = random.Random() if config["seed"] is None else stream(config["seed"], "bot", i)
+    accuracy = min(max(rng.gauss(config["accuracy"], config["accuracy_spread"]), 0.0), 1.0)
+    return Bot(f"bot{i}", rng, accuracy, think, config["repeat_prob"])
+
+
+async def play(bot, session, latencies):
+    """ One full game of a bot. Appends the latency of every answer, in seconds, to latencies. """
+    events_to_text(session.start())
+    while not session.done:
+        answering = session.prompt == ANSWER_PROMPT
+        line = bot.reply(session)
+        # Yields to the other players even without think time, like waiting on a socket would
+        await asyncio.sleep(bot.think() if answering else 0)
+        start = time.perf_counter()
+        events = session.send(line)
+        if answering:
+            # The feedback and, after <ENTER>, the next question
+            events.extend(session.send(bot.reply(session)))
+        events_to_text(events)
+        if answering:
+            latencies.append(time.perf_counter() - start)
+
+
+async def run_players(config, first, count, worker=0):
+    factory = _session_factory(config, worker)
+    think = think_time(config["think"])
+    slots = asyncio.Semaphore(config["concurrency"])
+    latencies = []
+
+    async def player(i):
+        async with slots:
+            await play(_bot(config, i, think), factory(i), latencies)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(player(i) for i in range(first, first + count)))
+    return latencies, time.perf_counter() - start
+
+
+def run_worker(config, first, count, worker=0):
+    """ Plays count games in this process. Returns the answer latencies, elapsed time and peak RSS in KiB. """
+    latencies, elapsed = asyncio.run(run_players(config, first, count, worker))
+    return latencies, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def session_memory(config, count=MEMORY_SAMPLE):
+    """ Bytes held by one live session, measured on count sessions waiting for their first answer. """
+    factory = _session_factory(dict(config, pool=False, shared_pool=None))
+    think = think_time("0")
+    # Warm up templates, answer tables and distractor pools, shared by all sessions
+    for i in range(count):
+        _start_session(factory(i), _bot(config, i, think))
+    gc.collect()
+    tracemalloc.start()
+    sessions = [_start_session(factory(i), _bot(config, i, think)) for i in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return size / count
+
+
+def _start_session(session, bot):
+    session.start()
+    while session.prompt != ANSWER_PROMPT:
+        session.send(bot.reply(session))
+    return session
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(int(q / 100 * len(sorted_values)), len(sorted_values) - 1)]
+
+
+def load_test(config):
+    """ Runs config["players"] games across config["processes"] processes and prints the report. """
+    processes = config["processes"]
+    shares = [config["players"] // processes + (i < config["players"] % processes) for i in range(processes)]
+    firsts = [sum(shares[:i]) for i in range(processes)]
+    shared_pool = None
+    if config["shared_pool"] and config["seed"] is None:
+        # One producer process fills the questions of every worker, see shared_pool.py
+        shared_pool = SharedQuestionPool.create(main.QN_ANS, processes).start()
+        config = dict(config, shared_pool=shared_pool.name)
+    try:
+        start = time.perf_counter()
+        if processes == 1:
+            results = [run_worker(config, 0, config["players"])]
+        else:
+            with ProcessPoolExecutor(processes) as executor:
+                results = list(executor.map(run_worker, [config] * processes, firsts, shares, range(processes)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if shared_pool is not None:
+            shared_pool.close()
+
+    latencies = sorted(latency for worker_latencies, _, _ in results for latency in worker_latencies)
+    print(f"{config['players']} sessions in {elapsed:.2f}s over {processes} process(es): "
+          f"{config['players'] / elapsed:.1f} sessions/s, {len(latencies) / elapsed:.0f} answers/s")
+    print("Answer latency: " + "  ".join(f"p{q:g} {percentile(latencies, q) * 1e3:.2f}ms" for q in PERCENTILES)
+          + f"  max {latencies[-1] * 1e3:.2f}ms" if latencies else "Answer latency: no answers")
+    print(f"Memory: {session_memory(config) / 1024:.1f} KiB per live session, peak RSS per process "
+          f"{max(rss for _, _, rss in results) / 1024:.1f} MiB")
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Load test the game with scripted bot players")
+    parser.add_argument("--players", type=int, default=1000, help="games played in total")
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    parser.add_argument("--concurrency", type=int, default=500, help="games in flight per process")
+    parser.add_argument("--questions", type=int, default=10, help="questions per round")
+    parser.add_argument("--accuracy", type=float, default=0.6, help="mean probability of a right answer")
+    parser.add_argument("--accuracy-spread", type=float, default=0.15, help="standard deviation of bot accuracies")
+    parser.add_argument("--think", default="0", help="think time before each answer: 0, fixed:s, uniform:low,high, "
+                                                     "exp:mean or lognormal:mu,sigma, in seconds")
+    parser.add_argument("--repeat-prob", type=float, default=0.7, help="chance of repeating a failed round")
+    parser.add_argument("--adaptive", action="store_true", help="pick questions from each bot's running score")
+    parser.add_argument("--no-pool", dest="pool", action="store_false", help="build questions on the answer path")
+    parser.add_argument("--shared-pool", action="store_true", help="take questions from one producer process "
+                                                                   "through shared memory")
+    parser.add_argument("--seed", type=int, help="makes every game and every bot replayable")
+    args = parser.parse_args()
+    try:
+        think_time(args.think)
+    except ValueError as error:
+        parser.error(str(error))
+    load_test(vars(args))
+
+
+if __name__ == "__main__":
+    run()
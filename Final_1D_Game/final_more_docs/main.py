@@ -1,12 +1,14 @@
 import random
-import math
 import os
-import json
-import numpy as np
-import matplotlib.pyplot as plt
-import time
-import sys
-from math_questions import *
+import callback_registry
+from question_bank import QuestionBank
+from bank_compiler import fresh_bank_path, format_parts
+from renderer import Renderer
+from distractors import answer_pool
+from answer_checking import check_mcq, check_open
+from answer_tables import answer_function
+from sampler import topic_of
+import metrics
 
 
 def _clear_screen():
@@ -35,10 +37,20 @@ def delay_print(s):
     https://stackoverflow.com/questions/9246076/how-to-print-one-character-at-a-time-on-one-line
 
     """
-    for c in s:
-        sys.stdout.write(c)
-        sys.stdout.flush()
-        time.sleep(0.03)
+    # A few characters per write instead of one, and instant when FRESHMORE_HEADLESS=1, see renderer.py
+    RENDERER.slow(s)
+
+
+def render_events(events):
+    """
+    Shows the output of the I/O-free game logic on the terminal.
+
+    Parameters
+    ----------
+    events: list
+        List of (kind, text) tuples, where kind is "print" (print), "slow" (delay_print) or "clear" (clear screen).
+    """
+    RENDERER.render(events)
 
 # ========== Game Classes ========== 
 class Question(object):
@@ -75,7 +87,7 @@ class Question(object):
         Dictionary contains only "question" key if question type if Open.
 
     check_answer(self, guess): Bool
-        Checks if answer matches that of the options.
+        Checks if answer matches that of the options. Open-ended answers are compared by value, see answer_checking.py.
     """
     def __init__(self, question, options, answer):
         """ 
@@ -97,7 +109,7 @@ class Question(object):
             self.question_type = "mcq"
 
     @staticmethod
-    def _parse_random_rng(args_ranges):
+    def _parse_random_rng(args_ranges, rng=random):
         """ 
         Helper function that parses the list of return number types and their ranges, for the callback functions to use as input.
 
@@ -106,6 +118,8 @@ class Question(object):
         args_ranges: list
             List of form [[val_type, (start, end)], ...], representing type of RNG return value and ranges, where val_type is either int or float. 
             E.g [["float", [1.0, 2.3]], ["int", [1, 10]], ["float", [1.0, 100]]]
+        rng: random.Random
+            Generator to draw from, the global random module by default (see rng_streams.py).
 
         Returns
         -------
@@ -116,14 +130,14 @@ class Question(object):
         random_inputs = []
         for rng_type, val_range in args_ranges:
                 if rng_type == "int":
-                    random_inputs.append(random.randint(*map(int, val_range)))
+                    random_inputs.append(rng.randint(*map(int, val_range)))
                 else:  
-                    random_inputs.append(round(random.uniform(*val_range), 2))
+                    random_inputs.append(round(rng.uniform(*val_range), 2))
         return random_inputs
 
 
     @classmethod
-    def from_dynamic(cls, full_question):
+    def from_dynamic(cls, full_question, rng=random):
         """ 
         Constructor for dynamic questions.
 
@@ -134,6 +148,9 @@ class Question(object):
         full_question: dictionary
             Dictionary containing a question of the appropriate form for a dynamic MCQ/Open Ended question.
 
+        rng: random.Random
+            Generator for the inputs, distractors and option order, the global random module by default.
+
         Returns
         ------- 
         Question
@@ -146,22 +163,127 @@ class Question(object):
             If answer type is open, answer is a string representing the correct answer. 
             If the answer type is MCQ, answer is a string that stores a number from 1 to 4 representing the correct option. 
         """
-        random_inputs = Question._parse_random_rng(full_question["args_ranges"])  # _parse_random_rng need change
-        question = full_question["question"]
-        answer = str(globals()[full_question["callback_func"]](*random_inputs))
+        random_inputs = Question._parse_random_rng(full_question["args_ranges"], rng)
+        # Templates from a compiled bank come with the callback already resolved and the question pre-split
+        callback = full_question.get("callback") or callback_registry.get(full_question["callback_func"])
+        # Looked up in a precomputed table for small int domains, see answer_tables.py
+        answer = answer_function(full_question, callback)(*random_inputs)
         options = []
         if full_question["answer_type"] == "mcq":
+            # Distinct distractors drawn from the template's answer pool, see distractors.py
             options.append(answer)
-            for _ in range(3):  
-                other_random_inputs = Question._parse_random_rng(full_question["args_ranges"])
-                other_ans = str(globals()[full_question["callback_func"]](*other_random_inputs))
-                options.append(other_ans)
-            random.shuffle(options)
+            options.extend(answer_pool(callback, full_question["args_ranges"]).distractors(answer, rng))
+            rng.shuffle(options)
             answer = str(options.index(answer) + 1)
-        return cls(question.format(*random_inputs), options, answer) 
+        if "question_parts" in full_question:
+            return cls(format_parts(full_question["question_parts"], random_inputs), options, answer)
+        return cls(full_question["question"].format(*random_inputs), options, answer) 
+
+    @staticmethod
+    def _parse_random_rng_batch(args_ranges, n, rng=None):
+        """
+        Vectorised version of _parse_random_rng that draws n sets of inputs at once.
+
+        Parameters
+        ----------
+        args_ranges: list
+            Same format as for _parse_random_rng.
+        n: int
+            Number of input sets to draw.
+        rng: numpy.random.Generator
+            Generator to draw from. A fresh unseeded generator is used if not given.
+
+        Returns
+        -------
+        columns: list
+            One NumPy array of length n per argument, ints as int64 and floats rounded to 2 decimal places.
+        """
+        import numpy as np
+        rng = np.random.default_rng() if rng is None else rng
+        columns = []
+        for rng_type, val_range in args_ranges:
+            if rng_type == "int":
+                start, stop = map(int, val_range)
+                columns.append(rng.integers(start, stop, size=n, endpoint=True))
+            else:
+                start, stop = val_range
+                columns.append(np.round(start + (stop - start) * rng.random(n), 2))
+        return columns
+
+    @classmethod
+    def from_dynamic_batch(cls, full_question, n, rng=None):
+        """
+        Batch constructor for dynamic questions. Generates n instances of the same template in one call.
+
+        The answers (and MCQ distractors) are computed with the NumPy counterparts in math_questions_np.py,
+        so the cost is a handful of array operations rather than four callback calls per question.
+
+        Parameters
+        ----------
+        full_question: dictionary
+            Dictionary containing a question of the appropriate form for a dynamic MCQ/Open Ended question.
+        n: int
+            Number of instances to generate.
+        rng: numpy.random.Generator
+            Generator to draw from. A fresh unseeded generator is used if not given.
+
+        Returns
+        -------
+        QuestionBatch
+            Lazily materialised batch of n Question objects.
+        """
+        import numpy as np
+        from math_questions_np import batch_answers
+        rng = np.random.default_rng() if rng is None else rng
+        args_ranges = full_question["args_ranges"]
+        columns = Question._parse_random_rng_batch(args_ranges, n, rng)
+        answers = batch_answers(full_question["callback_func"], columns)
+        if full_question["answer_type"] != "mcq":
+            return QuestionBatch(cls, full_question["question"], columns, None, answers)
+        other_columns = Question._parse_random_rng_batch(args_ranges, 3 * n, rng)
+        other_answers = batch_answers(full_question["callback_func"], other_columns)
+        # Row i holds the answer followed by its three distractors, then each row is shuffled.
+        candidates = np.concatenate([answers[:, None], other_answers.reshape(n, 3)], axis=1)
+        # Rows whose random distractors collide get theirs redrawn from the answer pool instead
+        sorted_candidates = np.sort(candidates, axis=1)
+        collisions = np.flatnonzero(np.any(sorted_candidates[:, 1:] == sorted_candidates[:, :-1], axis=1))
+        if len(collisions):
+            pool = answer_pool(callback_registry.get(full_question["callback_func"]), args_ranges)
+            # Seeded from rng, so a batch from a seeded generator stays replayable
+            pool_rng = random.Random(int(rng.integers(2 ** 63)))
+            candidates = candidates.astype(object)
+            for i in collisions.tolist():
+                answer = str(candidates[i, 0])
+                candidates[i] = [answer] + pool.distractors(answer, pool_rng)
+        order = np.argsort(rng.random((n, 4)), axis=1)
+        options = np.take_along_axis(candidates, order, axis=1)
+        answer_nos = np.argmax(order == 0, axis=1) + 1
+        return QuestionBatch(cls, full_question["question"], columns, options, answer_nos)
+
+    @classmethod
+    def from_template(cls, full_question, rng=random):
+        """
+        Constructor for any question in the JSON file, dispatching on its question type.
+
+        Parameters:
+        -----------
+        full_question: dictionary
+            Dictionary containing a question of one of the 3 forms.
+
+        rng: random.Random
+            Generator used to build the question, the global random module by default.
+
+        Returns
+        -------
+        Question
+            Question object built by from_dynamic or from_static.
+        """
+        if full_question["question_type"] == "dynamic":
+            return cls.from_dynamic(full_question, rng)
+        return cls.from_static(full_question, rng)
 
     @classmethod
-    def from_static(cls, full_question):
+    def from_static(cls, full_question, rng=random):
         """
         Constructor for static questions.
 
@@ -172,6 +294,9 @@ class Question(object):
         full_question: dictionary
             Dictionary containing a question of the appropriate form for a static MCQ/Open Ended question.
 
+        rng: random.Random
+            Generator for the option order, the global random module by default.
+
         Returns
         ------- 
         Question
@@ -188,8 +313,9 @@ class Question(object):
         options = []
         answer = full_question["answer"]
         if full_question["answer_type"] == "mcq":
-            options = full_question["options"]
-            random.shuffle(options)
+            # Shuffle a copy, shuffling the template's own list would make the order depend on earlier questions
+            options = list(full_question["options"])
+            rng.shuffle(options)
             answer = str(options.index(answer) + 1)
         return cls(question, options, answer)
 
@@ -202,18 +328,87 @@ class Question(object):
         return self.question_type
 
     def check_answer(self, guess):
-        guess = guess.lower().strip()
-        return self.answer == guess
+        if self.question_type == "mcq":
+            return check_mcq(self.answer, guess)
+        return check_open(self.answer, guess)
+
+
+class QuestionBatch(object):
+    """
+    A batch of generated instances of one dynamic question template.
+
+    The random inputs, options and answers are kept as arrays and only turned into strings and Question objects
+    when indexed, so a batch of 100k questions costs no more than its arrays until it is used.
+
+    Methods
+    -------
+    __len__(self): int
+        Number of questions in the batch.
+
+    __getitem__(self, i): Question
+        Builds the i-th Question of the batch.
+
+    to_questions(self): list
+        Builds all the Questions of the batch.
+    """
+    def __init__(self, question_cls, question, columns, options, answers):
+        self.question_cls = question_cls
+        self.question = question
+        self.columns = columns
+        self.options = options
+        self.answers = answers
+
+    def __len__(self):
+        return len(self.answers)
+
+    def __getitem__(self, i):
+        random_inputs = [column[i].item() for column in self.columns]
+        if self.options is None:
+            return self.question_cls(self.question.format(*random_inputs), [], str(self.answers[i:i + 1].tolist()[0]))
+        options = [str(option) for option in self.options[i].tolist()]
+        return self.question_cls(self.question.format(*random_inputs), options, str(self.answers[i]))
+
+    def to_questions(self):
+        rows = zip(*[column.tolist() for column in self.columns])
+        if self.options is None:
+            return [self.question_cls(self.question.format(*row), [], str(answer))
+                    for row, answer in zip(rows, self.answers.tolist())]
+        return [self.question_cls(self.question.format(*row), [str(option) for option in options], str(answer))
+                for row, options, answer in zip(rows, self.options.tolist(), self.answers.tolist())]
 
 
 class Game(object):
     """ Class for each game/round of the game.
 
+    The game logic (next_question, submit, feedback, grade) does no I/O and is shared with game_engine.py.
+    The other methods print and wait on input() for the terminal game.
+
     Methods
     -------
     get_score(self): int
         Getter method for getting the total score in the current game.
 
+    questions_left(self): int
+        Number of questions not asked yet in the round.
+
+    next_question(self): Question
+        Pops the next question of the round.
+
+    check(self, question, guess): Bool
+        Checks the player's answer to a question, recording metrics when enabled.
+
+    topic(self): str
+        Topic of the current question, e.g "geom".
+
+    submit(self, question, guess): Bool
+        Checks the player's answer to a question and increments the score if it is correct.
+
+    feedback(self, correct): str
+        The encouragement/taunt shown after a question, with the current score.
+
+    grade(self): (Bool, list)
+        Calculates the player's grade. Returns if player passed or fail and the messages to show.
+
     calculate_grades(self): Bool
         Prints the congratulatory messages/taunt messages. Returns if player passed or fail.
 
@@ -226,40 +421,147 @@ class Game(object):
     update(self): None
         Main method of the Game class which is called on every question.
     """
-    def __init__(self, total_qns):
+    def __init__(self, total_qns, rng=None, pool=None, sampler=None):
         """
         Parameters
         ---------- 
         total_qns: int
             Total number of questions in one round of the game.
+        rng: random.Random
+            Generator for the question picks, the questions themselves and the taunts, e.g rng_streams.stream(seed).
+            By default the global random module is used and questions are shared through QN_ANS.
+        pool: QuestionPool
+            Takes fresh, pre-generated questions from this pool (see question_pool.py) instead of QN_ANS.
+            Not used by seeded rounds, which generate their own questions to stay reproducible.
+        sampler: AdaptiveSampler
+            Picks every question from the player's running score (see sampler.py), instead of uniformly up front.
         """
         self.score = 0
         self.total_qns = total_qns
-        self.qn_nos = random.sample([str(i) for i in range(1, len(QN_ANS) + 1)], total_qns)
+        self.seeded = rng is not None
+        self.rng = rng if self.seeded else random
+        self.pool = pool
+        self.sampler = sampler
+        self.asked = []
+        if sampler is None:
+            self.qn_nos = self.rng.sample([str(i) for i in range(1, len(QN_ANS) + 1)], total_qns)
+        else:
+            # Drawn one at a time in next_question, once the previous answer has been recorded
+            self.qn_nos = None
+        self.qn_no = None
         self.ans = None
 
     def get_score(self):
         return self.score
 
-    def calculate_grades(self):
+    def questions_left(self):
+        return self.total_qns - len(self.asked)
+
+    def next_question(self):
+        if self.sampler is None:
+            self.qn_no = self.qn_nos.pop()
+        else:
+            self.qn_no = self.sampler.draw(self.rng, self.asked)
+        self.asked.append(self.qn_no)
+        if self.seeded:
+            # A seeded round builds its own questions, so it does not depend on what other rounds drew
+            return QN_ANS.generate(self.qn_no, self.rng)
+        if self.pool is not None:
+            return self.pool.take(self.qn_no)
+        return QN_ANS[self.qn_no]
+
+    @staticmethod
+    def question_text(question):
+        """ The question as shown to the player, followed by its options for MCQs. """
+        curr_qn_info = question.get_question()
+        options = curr_qn_info.get("options")
+        if options is None:
+            return curr_qn_info["question"]
+        return curr_qn_info["question"] + "\n" + MCQ_STRING.format(*options)
+
+    def check(self, question, guess):
+        """ question.check_answer, recording its latency and result for the current question number. """
+        start = metrics.start()
+        correct = question.check_answer(guess)
+        metrics.observe(metrics.CHECK_SECONDS, start, self.qn_no)
+        metrics.count(metrics.ANSWERS, self.qn_no, str(correct).lower())
+        if self.sampler is not None:
+            self.sampler.record(self.qn_no, correct)
+        return correct
+
+    def topic(self):
+        """ Topic of the current question number, see sampler.topic_of. """
+        return topic_of(QN_ANS.template(self.qn_no))
+
+    def submit(self, question, guess):
+        correct = self.check(question, guess)
+        if correct:
+            self.score += 1
+        return correct
+
+    def feedback(self, correct):
         """
-        Calculates the player's grade and prints the relevant statements to congratulate/insult them.
+        Builds the statements shown after a question has been answered.
+
+        Parameters
+        ---------- 
+        correct: Bool
+            Represents if the player's answer was correct.
+
+        Returns
+        -------
+        str
+            Encouragement or taunt with its ASCII art, followed by the current score.
+        """
+        if correct:
+            lines = [self.rng.choice(ENCOURAGEMENTS), r'''
+                     _
+                    ( ((
+                     \ =\
+                 __\_ `-\ 
+                (____))(  \------
+                (____)) _  
+                (____))
+                (____))____/----
+                ''']
+
+        else:
+            lines = [self.rng.choice(TAUNTS), r'''   
+                   ______
+                 (( ____ \---
+                 (( _____
+                 ((_____ 
+                 ((____   ----
+                      /  /
+                     (_((
+                ''']
+
+        lines.append(f"Current Score is {self.score}")
+        lines.append("-=" * 20)
+        return "\n".join(lines)
+
+    def grade(self):
+        """
+        Calculates the player's grade and the relevant statements to congratulate/insult them.
 
         Returns:
         --------
         player_pass: Bool
             Represents if player passed or failed.
+        events: list
+            Statements to show, as ("slow", text) for delay_print and ("print", text) for print.
         """
-        delay_print('''Calculating your final grade....
+        start = metrics.start()
+        events = [("slow", '''Calculating your final grade....
         ....
         ....
-        ....\n''')
+        ....\n''')]
         total_score=self.score/self.total_qns*100
 
         player_pass = None
         if total_score>=70:
-            delay_print(f"You got {total_score}%! Chief, you dropped your crown\n\n")
-            print(r'''.
+            events.append(("slow", f"You got {total_score}%! Chief, you dropped your crown\n\n"))
+            events.append(("print", r'''.
                   .       |         .    .
             .  *         -*-          *
                  \        |         /   .
@@ -269,17 +571,31 @@ class Game(object):
          \ | _ _\/_ _ \_\_ _ /_/_ _\/_ _ \_/
            \  *  *  *   \ \/ /  *  *  *  /
             ` ~ ~ ~ ~ ~  ~\/~ ~ ~ ~ ~ ~ '
-''')
+'''))
             player_pass = True
         
         elif total_score>=50:
-            delay_print(f"You got {total_score}%...")
-            delay_print(random.choice(PASS))
+            events.append(("slow", f"You got {total_score}%..."))
+            events.append(("slow", self.rng.choice(PASS)))
             player_pass = True 
         else:
-            delay_print(f"You got {total_score}%...")
-            delay_print(random.choice(FAIL))
+            events.append(("slow", f"You got {total_score}%..."))
+            events.append(("slow", self.rng.choice(FAIL)))
             player_pass = False 
+        metrics.observe(metrics.GRADING_SECONDS, start)
+        return player_pass, events
+
+    def calculate_grades(self):
+        """
+        Calculates the player's grade and prints the relevant statements to congratulate/insult them.
+
+        Returns:
+        --------
+        player_pass: Bool
+            Represents if player passed or failed.
+        """
+        player_pass, events = self.grade()
+        render_events(events)
         return player_pass
 
     def end_game(self):
@@ -305,63 +621,38 @@ class Game(object):
         correct: Bool
             Represents if the player passes or fails the game.
         """
-
         if correct:
             self.score += 1
-            print(random.choice(ENCOURAGEMENTS))
-            print(r'''
-                     _
-                    ( ((
-                     \ =\
-                 __\_ `-\ 
-                (____))(  \------
-                (____)) _  
-                (____))
-                (____))____/----
-                ''')
-
-        else:
-            print(random.choice(TAUNTS))
-            print(r'''   
-                   ______
-                 (( ____ \---
-                 (( _____
-                 ((_____ 
-                 ((____   ----
-                      /  /
-                     (_((
-                ''')
-
-        print(f"Current Score is {self.score}")
-        print("-=" * 20)
+        print(self.feedback(correct))
         input()
 
     def update(self):
         """
         Main method of the Game class which is called on every question. Will get inputs.
         """
-        if len(self.qn_nos) == 0:
-            end_game()
-        curr_qn = QN_ANS[self.qn_nos.pop()]
-        curr_qn_info = curr_qn.get_question()
-        options = curr_qn_info.get("options")
-
-        print(curr_qn_info["question"])
-        if options is not None:
-            print(MCQ_STRING.format(*options))
+        if self.questions_left() == 0:
+            return self.end_game()
+        curr_qn = self.next_question()
+        print(self.question_text(curr_qn))
 
+        start = metrics.start()
         player_input = input("Type your answer:\n")
+        metrics.observe(metrics.INPUT_WAIT_SECONDS, start)
 
-        self.qn_check(curr_qn.check_answer(player_input))
+        self.qn_check(self.check(curr_qn, player_input))
 
 
 # ========== Globals ========== 
 
 MCQ_STRING = "1) {} 2) {} \n3) {} 4) {}\n"
+RENDERER = Renderer(clear_screen=_clear_screen)
 qn_ans_path = os.path.join(os.getcwd(), "qn_ans.json")
+# qn_ans.json is the authoring format, run bank_compiler.py to build the faster qn_ans.qbank next to it
+bank_path = fresh_bank_path(qn_ans_path)
 TAUNTS = ["Haha try again n3rd", "Get r3kt", "Don't worry you TOTALLY got this!", "If Prof Matthieu can do it, I don't see why you couldn't?!", "If Prof Cyrille can do it, I don't see why you couldn't?!", "Dumbass. Read the f***ing textbook.", "Now I shall give you DEATH in return"]
 ENCOURAGEMENTS = ["Nice work out there", "I always believed you were able to do it", "You're the best!", "Not bad. You got that one right.", "My analysis shows that you are AWESOME!"]
-QN_ANS = {}
+# Templates are only read and instantiated when a question is picked, see question_bank.py
+QN_ANS = QuestionBank(bank_path, Question.from_template)
 HIGH_PASS = []
 PASS = ["Pass only but its ok cause its pass/fail.",
         "That feeling when you know that you’re gonna fail this sem but then you checked your grades and you actually PASSED…",
@@ -375,127 +666,35 @@ FAIL = ["YOU HAD ONE JOB! AND YOU FAILED!",
         "Bro...You failed! Outstanding!",
         "When you know you failed all your exams but at least it’s over!"]
 
-if os.path.exists(qn_ans_path):
-    with open(qn_ans_path) as in_file:
-        input_json = json.load(in_file)
-        for i, j in input_json.items():
-            if j["question_type"] == "dynamic": 
-                QN_ANS[i] = Question.from_dynamic(j)
-            else:
-                QN_ANS[i] = Question.from_static(j)
-else:
-    print("No json file detected, exitting with error")
-    exit(1)
-
 
 # ========== Main Game Loop ========== 
 
 def main():
-    total_qns = 10
-    games = [Game(total_qns) for _ in range(3)]
-    print(f"Here are your stats (out of {total_qns}):", [game.get_score() for game in games])
-
-    start = time.time()
-    _clear_screen()
-    health = 3
-    curr_round = 1
-    bootcamp = True
-
-    print(r'''
- _____ ____  _____ ____  _     _      ____  ____  _____  
-/    //  __\/  __// ___\/ \ /|/ \__/|/  _ \/  __\/  __/  
-|  __\|  \/||  \  |    \| |_||| |\/||| / \||  \/||  \    
-| |   |    /|  /_ \___ || | ||| |  ||| \_/||    /|  /_   
-\_/   \_/\_\\____\\____/\_/ \|\_/  \|\____/\_/\_\\____\  
-                                                         
-    ''')
-
-    delay_print("=======================================================\n")
-    
-    print(r'''
-  ____  _  _      _     _     ____  _____  ____  ____ 
-/ ___\/ \/ \__/|/ \ /\/ \   /  _ \/__ __\/  _ \/  __\
-|    \| || |\/||| | ||| |   | / \|  / \  | / \||  \/|
-\___ || || |  ||| \_/|| |_/\| |-||  | |  | \_/||    /
-\____/\_/\_/  \|\____/\____/\_/ \|  \_/  \____/\_/\_\
-                                                     
-    ''')
-    delay_print("=======================================================\n")
-
-    delay_print('''Hello….! Welcome to the Freshmore Simulator—
-where we test and predict whether you'll need Bootcamp or not :”)\n\n''')
-
-    username=input("Before we start, we need your name: ")
-
-    delay_print(f'''\nHello {username}, welcome to Freshmore Term 1 Simulator! Today we'll test you on your Maths for a bit...''')
-
-    delay_print('''\n\n. . .
-. . .
-. . .
-Entering Game . . .
-. . .
-. . .\n\n''')
-
-    print("Rules:\n1) Attempt all questions\n2) Don't cheat (or just don't get caught)\n3) All values are rounded to 2 decimal places, and vectors are represented in (x, y), spacing included.\n4) Click <ENTER> to get the next question")
-    input()
-
-    for game in games:
-        health -= 1
-        print(f"\n\n>WELCOME TO ROUND {curr_round}.\n")
-        for game_no in range(total_qns):
-            print(f"Question {game_no + 1}")
-            game.update()
-        print(f"\n>YOU'VE COMPLETED ROUND {curr_round}.\n")
-        player_pass = game.end_game()
-        input()
-        _clear_screen()
-        curr_round += 1
-
-        if not player_pass:
-            if health > 0:
-                 delay_print(f"But it's okay, you have {health} health left, do you want to repeat or just go for Bootcamp now?")
-                 repeat = input("\n1) Repeat \n2) Bootcamp\n")
-                 while repeat not in ["1", "2"]:
-                     print("You're getting on my nerves, be careful I don't send you to bootcamp!")
-                     repeat=input("\n1) Repeat \n2) Bootcamp\n")
-                 repeat = int(repeat)
-                 if repeat == 1:
-                     continue
-                 if repeat == 2:
-                     bootcamp = True
-                     break
-            else:
-                 delay_print("It's okay, you have one last shot...\n at bootcamp</3")
-                 bootcamp = True
-                 break
-
-    #bootcamp
-    if bootcamp==True:
-        delay_print("\n\nHello again... welcome to Bootcamp. ")
-        delay_print("This is your last chance on passing term 1– all based on an all-or-nothing question... \nPerhaps the trickiest question of them all...")
-        bootcamp_response = {"1": "Thanks Prof Matthieu for completing Bootcamp – but you failed.",
-                             "2": "Thanks Prof Cyrille for completing Bootcamp – but you failed.",
-                             "3": "\n\nMadlad ... you managed to pass via Bootcamp!",
-                             "4": "\n\nIt's ok u tried but u still failed"}
-        bootcamp_answer=input("\n\nWho is the best CTD prof?\n1)Prof Matthieu <3\n2)Prof Cyrille <3\n3)Both\n4)None of the above\n")
-        while bootcamp_answer not in bootcamp_response:
-            print("You can run, but you can't hide... Pick one of the options!")
-            bootcamp_answer=input("\n\nWho is the best CTD prof?\n1)Prof Matthieu <3\n2)Prof Cyrille <3\n3)Both\n4)None of the above\n")
-        delay_print(bootcamp_response[bootcamp_answer])
-
-    #endgame
-    delay_print("\n\n...\n....,\n.....\n......\n\n")
-    end = time.time()
-    time_taken=round(end - start,2)
-    delay_print(f"Congratulations! You've just wasted {time_taken}s playing a stupid quiz game :D")
-    print(r'''
-     _  __   _____  _    ___  _   ____ ___  _ _____
-    / |/ /  /__ __\/ \ /|\  \//  /  _ \\  \///  __/
-    |   /     / \  | |_|| \  /   | | // \  / |  \  
-    |   \     | |  | | || /  \   | |_\\ / /  |  /_ 
-    \_|\_\    \_/  \_/ \|/__/\\  \____//_/   \____\
-                                               
-    ''')
+    if not os.path.exists(bank_path):
+        print("No json file detected, exitting with error")
+        exit(1)
+
+    # The game flow lives in game_engine.GameSession, this only connects it to the terminal
+    from game_engine import GameSession
+    from question_pool import QuestionPool
+    from sampler import AdaptiveSampler, BankIndex
+    from score_store import ScoreStore
+    metrics.configure_from_env()
+    # Fresh numbers for every round, topped up in the background while the player reads. The buffers fill
+    # behind the banners and the name prompt, so start-up does not wait for them
+    pool = QuestionPool(QN_ANS).start(prefill=False)
+    # Questions follow the player's running score across all rounds
+    sampler = AdaptiveSampler(BankIndex(QN_ANS))
+    # Sessions, answers and round results are kept in scores.db (or FRESHMORE_SCORES_DB) across games
+    store = ScoreStore(os.environ.get("FRESHMORE_SCORES_DB", "scores.db"))
+    session = GameSession(Game, total_qns=10, pool=pool, sampler=sampler, store=store)
+    render_events(session.start())
+    while not session.done:
+        start = metrics.start()
+        line = input(session.prompt)
+        metrics.observe(metrics.INPUT_WAIT_SECONDS, start)
+        render_events(session.send(line))
+    store.close()
 
 
 if __name__ == "__main__":
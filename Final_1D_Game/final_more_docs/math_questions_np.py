@@ -0,0 +1,158 @@
+import numpy as np
+
+import callback_registry
+
+# ===== NumPy counterparts of the callbacks in topics/ =====
+# Every function takes one array per argument (all of the same length) and returns
+# an array with one answer per row. Callbacks that build strings (deriv_*, vector_1..3)
+# have no counterpart here and are evaluated row by row by batch_answers instead.
+
+# Largest n for which the int64 product loops below are still exact.
+_MAX_EXACT_PERMUTATION_N = 20
+_MAX_EXACT_COMBINATION_N = 60
+
+
+def round_2dp(x):
+    """ np.round(x, 2), except that near-ties are redone with round() so that results match the scalar callbacks exactly. """
+    x = np.asarray(x, dtype=np.float64)
+    rounded = np.round(x, 2)
+    scaled = x * 100
+    ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if ties.any():
+        rounded[ties] = [round(value, 2) for value in x[ties].tolist()]
+    return rounded
+
+
+def permutation(n, r):
+    n = np.asarray(n, dtype=np.int64)
+    r = np.asarray(r, dtype=np.int64)
+    p = np.ones(np.broadcast(n, r).shape, dtype=np.int64)
+    for i in range(int(r.max(initial=0))):
+        p = np.where(i < r, p * (n - i), p)
+    return np.where(n < r, 0, p)
+
+
+def combination(n, r):
+    n = np.asarray(n, dtype=np.int64)
+    r = np.asarray(r, dtype=np.int64)
+    c = np.ones(np.broadcast(n, r).shape, dtype=np.int64)
+    for i in range(int(r.max(initial=0))):
+        c = np.where(i < r, c * (n - i) // (i + 1), c)
+    return np.where(n < r, 0, c)
+
+
+# ===== Geometry questions =====
+
+def geom_1(length):
+    return round_2dp(length * 6)
+
+def geom_2(radius):
+    return round_2dp(2/3 * np.pi * radius ** 3)
+
+def geom_3(radius, height):
+    return round_2dp(2 * np.pi * height * radius + 2 * np.pi * radius ** 2)
+
+def geom_4(base_area, height):
+    return round_2dp(0.5 * base_area * height)
+
+def geom_5(height, first_side, second_side):
+    return round_2dp(0.5 * height * (first_side + second_side))
+
+
+# ===== Permutation and Combination questions =====
+
+def pnc_1(previous):
+    return 10**6 - previous
+
+def pnc_2(total, mingirls, boys, girls):
+    if max(boys.max(initial=0), girls.max(initial=0)) > _MAX_EXACT_COMBINATION_N:
+        return None
+    minboys = total - mingirls
+    return combination(boys, minboys) * combination(girls, mingirls)
+
+def pnc_3(total, selected):
+    if total.max(initial=0) > _MAX_EXACT_PERMUTATION_N:
+        return None
+    return permutation(total, selected)
+
+def pnc_4(oranges, apples, mangoes):
+    return (oranges + 1) * (apples + 1) * (mangoes + 1) - 1
+
+def pnc_5(number):
+    if number.max(initial=0) > _MAX_EXACT_PERMUTATION_N:
+        return None
+    return permutation(number, number)
+
+
+# ===== Trigonometry questions =====
+
+def trigo_1(b, c, angle):
+    return round_2dp(np.sqrt(b ** 2 + c ** 2 - 2 * b * c * np.cos(angle)))
+
+def trigo_2(b, B, A):
+    return round_2dp(b * (np.sin(A) / np.sin(B)))
+
+def trigo_3(a_b, A):
+    return round_2dp(0.5 * a_b * a_b * np.sin(np.pi - (2 * A)))
+
+def trigo_4(a, b):
+    return round_2dp(np.sqrt(b ** 2 - a ** 2) / b)
+
+def trigo_5(b, a):
+    return round_2dp(0.5 * b * (np.sqrt(a ** 2 - b ** 2)))
+
+
+# ===== Vector questions =====
+
+def vector_4(n_14, n_15):
+    return round_2dp(np.sqrt(n_14 ** 2 + n_15 ** 2))
+
+
+BATCH_CALLBACKS = {
+    "geom_1": geom_1,
+    "geom_2": geom_2,
+    "geom_3": geom_3,
+    "geom_4": geom_4,
+    "geom_5": geom_5,
+    "pnc_1": pnc_1,
+    "pnc_2": pnc_2,
+    "pnc_3": pnc_3,
+    "pnc_4": pnc_4,
+    "pnc_5": pnc_5,
+    "trigo_1": trigo_1,
+    "trigo_2": trigo_2,
+    "trigo_3": trigo_3,
+    "trigo_4": trigo_4,
+    "trigo_5": trigo_5,
+    "vector_4": vector_4,
+}
+
+
+def batch_answers(callback_func, columns):
+    """
+    Computes the answers for a whole matrix of callback arguments.
+
+    Parameters
+    ----------
+    callback_func: str
+        Name of the callback, e.g "geom_3" (see callback_registry.py).
+    columns: list
+        One NumPy array per callback argument, all of length n.
+
+    Returns
+    -------
+    answers: numpy.ndarray
+        Array of n answers. It is numeric when the callback has an array counterpart, else an object array
+        of strings. Either way str() of an element (after .tolist()) equals str(callback(*row)).
+    """
+    batch_func = BATCH_CALLBACKS.get(callback_func)
+    if batch_func is not None:
+        result = batch_func(*columns)
+        if result is not None:
+            return np.asarray(result)
+    # No array counterpart (string answers) or out of the exact int64 range.
+    scalar_func = callback_registry.get(callback_func)
+    rows = zip(*[column.tolist() for column in columns])
+    answers = np.empty(len(columns[0]) if columns else 0, dtype=object)
+    answers[:] = [str(scalar_func(*row)) for row in rows]
+    return answers
@@ -0,0 +1,199 @@
+import atexit
+import bisect
+import os
+import threading
+import time
+
+# ========== Metrics ==========
+# Latency histograms and counters for the hot paths, exported in the Prometheus text exposition format to a
+# file (for node_exporter's textfile collector) or over HTTP at /metrics.
+#
+# Disabled by default. Instrumented code does
+#     start = metrics.start()
+#     ...
+#     metrics.observe(metrics.CHECK_SECONDS, start, template)
+# and while metrics are off start() returns None and observe() returns straight away, so the cost is two
+# function calls. Set FRESHMORE_METRICS=1 to enable, FRESHMORE_METRICS_FILE=path to write the file every
+# FRESHMORE_METRICS_INTERVAL seconds (and on exit) and FRESHMORE_METRICS_PORT=port to serve them.
+
+ENABLED = False
+EXPORT_INTERVAL = 15.0
+LATENCY_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Player think time, seconds to minutes
+WAIT_BUCKETS = (0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+_registry = []
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Counter(object):
+    """ A Prometheus counter, one value per combination of label values. """
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram(object):
+    """ A Prometheus histogram, one set of buckets per combination of label values. """
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [per bucket counts, with +Inf last], sum, count
+        self._series = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def exposition(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labels, label_values, [('le', le)])} {cumulative}")
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f"{self.name}_sum{labels} {total}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+GENERATION_SECONDS = Histogram("freshmore_question_generation_seconds",
+                               "Time to build a Question from its template.", ("template",))
+CHECK_SECONDS = Histogram("freshmore_check_answer_seconds", "Time to check a player's answer.", ("template",))
+ANSWERS = Counter("freshmore_answers_total", "Answers checked, by template and correctness.", ("template", "correct"))
+RENDER_SECONDS = Histogram("freshmore_render_seconds", "Time to show a batch of game events, typewriter delays included.")
+INPUT_WAIT_SECONDS = Histogram("freshmore_input_wait_seconds", "Time waiting for a player's input (think time).",
+                               buckets=WAIT_BUCKETS)
+GRADING_SECONDS = Histogram("freshmore_grading_seconds", "Time to calculate a round's grade.")
+POOL_MISSES = Counter("freshmore_question_pool_misses_total",
+                      "Questions generated on the player's path because the template's pool was empty.", ("template",))
+SCORES_DROPPED = Counter("freshmore_scores_dropped_total",
+                         "Score store events dropped because the writer thread was too far behind.")
+SCORES_FAILED = Counter("freshmore_scores_failed_total",
+                        "Score store events lost because the database refused their batch (locked, disk full).")
+
+
+def start():
+    """ Start time of a measurement, None while metrics are disabled. """
+    if ENABLED:
+        return time.perf_counter()
+    return None
+
+
+def observe(histogram, start_time, *label_values):
+    """ Records the time since start_time, if it was taken. """
+    if start_time is not None:
+        histogram.observe(time.perf_counter() - start_time, *label_values)
+
+
+def count(counter, *label_values, amount=1):
+    if ENABLED:
+        counter.inc(*label_values, amount=amount)
+
+
+def exposition():
+    """ All metrics in the Prometheus text exposition format. """
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.exposition())
+    return "\n".join(lines) + "\n"
+
+
+def write_file(path):
+    """ Writes the metrics to path, atomically so a scraper never reads a partial file. """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as out_file:
+        out_file.write(exposition())
+    os.replace(temp_path, path)
+
+
+def _export_loop(path, interval, stopped):
+    while not stopped.wait(interval):
+        write_file(path)
+
+
+def start_file_exporter(path, interval=EXPORT_INTERVAL):
+    """ Writes the metrics file every interval seconds from a daemon thread, and once more at exit. """
+    stopped = threading.Event()
+    threading.Thread(target=_export_loop, args=(path, interval, stopped), daemon=True).start()
+    atexit.register(write_file, path)
+    return stopped
+
+
+def serve(port, host="127.0.0.1"):
+    """ Serves the metrics at http://host:port/metrics from a daemon thread. Returns the server. """
+    # Imported here, http.server would add about 50 ms to every import of a module using metrics
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = exposition().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def enable():
+    global ENABLED
+    ENABLED = True
+
+
+def configure_from_env():
+    """ Enables metrics and starts the exporters requested by the FRESHMORE_METRICS* environment variables. """
+    if os.environ.get("FRESHMORE_METRICS", "") in ("", "0"):
+        return
+    enable()
+    path = os.environ.get("FRESHMORE_METRICS_FILE")
+    if path:
+        start_file_exporter(path, float(os.environ.get("FRESHMORE_METRICS_INTERVAL", EXPORT_INTERVAL)))
+    port = os.environ.get("FRESHMORE_METRICS_PORT")
+    if port:
+        serve(int(port))
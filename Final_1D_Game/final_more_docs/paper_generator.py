@@ -0,0 +1,239 @@
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import main
+from paper_index import DEFAULT_ERROR_RATE, PaperIndex, paper_digest
+from question_bank import QuestionBank
+from rng_streams import stream
+
+# ========== Exam paper generator ==========
+# Generates offline exam papers, each one the questions of a Game(total_qns) round. Paper i is built from
+# rng_streams.stream(seed, "paper", i), so any paper can be regenerated on its own from the seed and its
+# number, whichever worker produced it. Papers are made in chunks over a process pool with a bounded number
+# of chunks in flight and written out as soon as they are ready, so memory does not grow with the number
+# of papers requested.
+#
+# With --unique every paper is checked against a PaperIndex (see paper_index.py) of the cohort, and a
+# duplicate is redrawn from stream(seed, "paper", i, attempt) with attempt 1, 2... until it is new. Redrawn
+# papers carry their "attempt", which the grader needs to rebuild them.
+
+CHUNK_SIZE = 64
+# Chunks queued per worker process, enough to keep the workers busy while results are written.
+IN_FLIGHT_PER_WORKER = 2
+# Redraws of one paper before giving up: the bank is too small for the cohort
+MAX_ATTEMPTS = 1000
+CSV_HEADER = ["paper", "position", "number", "question_type", "question",
+              "option_1", "option_2", "option_3", "option_4", "answer"]
+
+
+def _use_bank(bank_path):
+    """ Points the game at another question bank file, in this process. """
+    if bank_path is not None and main.QN_ANS.path != bank_path:
+        main.QN_ANS = QuestionBank(bank_path, main.Question.from_template)
+
+
+def generate_paper(index, seed, total_qns, attempt=0):
+    """
+    Generates one exam paper.
+
+    Parameters
+    ----------
+    index: int
+        Paper number.
+    seed: int
+        Root seed of the run.
+    total_qns: int
+        Number of questions in the paper.
+    attempt: int
+        Redraw number, for papers redrawn because they duplicated another one.
+
+    Returns
+    -------
+    dictionary
+        The paper, with its questions in the order a Game round would ask them.
+    """
+    rng = stream(seed, "paper", index) if attempt == 0 else stream(seed, "paper", index, attempt)
+    game = main.Game(total_qns, rng)
+    questions = []
+    for _ in range(total_qns):
+        question = game.next_question()
+        questions.append({"number": game.qn_no, "question_type": question.question_type,
+                          "question": question.question, "options": question.options, "answer": question.answer})
+    paper = {"paper": index, "seed": seed, "questions": questions}
+    if attempt:
+        paper["attempt"] = attempt
+    return paper
+
+
+def paper_rows(paper):
+    """ CSV rows of a paper, one per question. """
+    rows = []
+    for position, question in enumerate(paper["questions"], 1):
+        options = question["options"] or [""] * 4
+        rows.append([paper["paper"], position, question["number"], question["question_type"],
+                     question["question"], *options, question["answer"]])
+    return rows
+
+
+def serialise(paper, out_format, unique=False):
+    """ The JSON line or CSV rows of a paper, as a list, and its digest if unique. """
+    entries = [json.dumps(paper, ensure_ascii=False)] if out_format == "jsonl" else paper_rows(paper)
+    return entries, paper_digest(paper) if unique else None
+
+
+def generate_chunk(start, stop, seed, total_qns, out_format, unique=False):
+    """ Papers start to stop - 1, already serialised, see serialise. """
+    return [serialise(generate_paper(index, seed, total_qns), out_format, unique) for index in range(start, stop)]
+
+
+def generate_chunks(count, seed, total_qns, out_format, processes=None, chunk_size=CHUNK_SIZE, bank_path=None,
+                    unique=False):
+    """
+    Generates papers 0 to count - 1 in chunks, yielding each chunk in order as soon as it is ready.
+
+    Parameters
+    ----------
+    processes: int
+        Number of worker processes, os.cpu_count() by default. 1 generates in this process.
+    chunk_size: int
+        Papers per task sent to a worker.
+    bank_path: str
+        Question bank to use instead of the default one.
+    unique: Bool
+        Also compute the digest of every paper.
+    """
+    bounds = ((start, min(start + chunk_size, count)) for start in range(0, count, chunk_size))
+    if processes == 1:
+        _use_bank(bank_path)
+        for start, stop in bounds:
+            yield generate_chunk(start, stop, seed, total_qns, out_format, unique)
+        return
+    processes = processes or os.cpu_count() or 1
+    pending = deque()
+    with ProcessPoolExecutor(processes, initializer=_use_bank, initargs=(bank_path,)) as executor:
+        for start, stop in bounds:
+            pending.append(executor.submit(generate_chunk, start, stop, seed, total_qns, out_format, unique))
+            if len(pending) >= processes * IN_FLIGHT_PER_WORKER:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _redraw(index, seed, total_qns, out_format, paper_index):
+    """ Redraws a paper until the index has not seen it. Returns its entries and how many redraws it took. """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        entries, digest = serialise(generate_paper(index, seed, total_qns, attempt), out_format, unique=True)
+        if paper_index.add(digest):
+            return entries, attempt
+    raise RuntimeError(f"no distinct paper found for paper {index} after {MAX_ATTEMPTS} redraws, "
+                       f"the bank is too small for the cohort")
+
+
+def write_papers(out_file, count, seed, total_qns=10, out_format="jsonl", processes=None, chunk_size=CHUNK_SIZE,
+                 bank_path=None, report_every=5.0, paper_index=None):
+    """
+    Generates count papers and streams them to an open text file.
+
+    Parameters
+    ----------
+    out_file: file
+        Where to write the JSONL lines or CSV rows.
+    report_every: float
+        Seconds between progress reports on stderr, None for no reports.
+    paper_index: PaperIndex
+        Redraw papers this index has seen, and add every paper written to it.
+
+    Returns
+    -------
+    rate: float
+        Papers generated per second.
+    redraws: int
+        Papers drawn again because they duplicated an earlier paper, counting every attempt.
+    """
+    # Duplicates are redrawn in this process, from the same bank as the workers
+    _use_bank(bank_path)
+    writer = None
+    if out_format == "csv":
+        writer = csv.writer(out_file)
+        writer.writerow(CSV_HEADER)
+    start = last_report = time.perf_counter()
+    done = 0
+    redraws = 0
+    unique = paper_index is not None
+    for chunk in generate_chunks(count, seed, total_qns, out_format, processes, chunk_size, bank_path, unique):
+        entries = []
+        for position, (entry, digest) in enumerate(chunk):
+            # Checked here, in order, so the result does not depend on which worker made which paper
+            if unique and not paper_index.add(digest):
+                entry, attempts = _redraw(done + position, seed, total_qns, out_format, paper_index)
+                redraws += attempts
+            entries.extend(entry)
+        if writer is None:
+            out_file.write("\n".join(entries) + "\n")
+        else:
+            writer.writerows(entries)
+        done += len(chunk)
+        now = time.perf_counter()
+        if report_every is not None and now - last_report >= report_every:
+            print(f"{done}/{count} papers, {done / (now - start):.1f} papers/s", file=sys.stderr)
+            last_report = now
+    return count / max(time.perf_counter() - start, 1e-9), redraws
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Generate exam papers from the question bank")
+    parser.add_argument("--papers", type=int, default=1000, help="number of papers to generate")
+    parser.add_argument("--questions", type=int, default=10, help="questions per paper")
+    parser.add_argument("--seed", type=int, help="root seed, a random one is picked and reported if not given")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl")
+    parser.add_argument("-o", "--output", default="-", help="output file, - for stdout")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--bank", help="question bank file, defaults to the one the game uses")
+    parser.add_argument("--unique", action="store_true", help="redraw papers that duplicate another paper")
+    parser.add_argument("--fp-rate", type=float, default=DEFAULT_ERROR_RATE,
+                        help="false-positive rate of the duplicate index, each false positive costs a redraw")
+    parser.add_argument("--index", help="duplicate index file, read if it exists and written back, so papers "
+                                        "also stay distinct from earlier runs (implies --unique)")
+    args = parser.parse_args()
+
+    _use_bank(args.bank)
+    if args.questions > len(main.QN_ANS):
+        parser.error(f"the bank only has {len(main.QN_ANS)} questions")
+    seed = random.getrandbits(63) if args.seed is None else args.seed
+    print(f"Generating {args.papers} papers with seed {seed}", file=sys.stderr)
+
+    paper_index = None
+    if args.index is not None and os.path.exists(args.index):
+        paper_index = PaperIndex.load(args.index)
+    elif args.unique or args.index is not None:
+        paper_index = PaperIndex(args.papers, args.fp_rate)
+
+    out_file = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        rate, redraws = write_papers(out_file, args.papers, seed, args.questions, args.format, args.processes,
+                                     args.chunk_size, args.bank, paper_index=paper_index)
+    except RuntimeError as error:
+        print(error, file=sys.stderr)
+        exit(1)
+    finally:
+        if out_file is not sys.stdout:
+            out_file.close()
+    print(f"Generated {args.papers} papers, {rate:.1f} papers/s", file=sys.stderr)
+    if paper_index is not None:
+        print(f"{redraws} redraws of duplicate papers, index of {len(paper_index)} papers in "
+              f"{paper_index.size_bytes() / 1024:.0f} KiB, false-positive rate {paper_index.error_rate():.2g}",
+              file=sys.stderr)
+        if args.index is not None:
+            paper_index.save(args.index)
+
+
+if __name__ == "__main__":
+    run()
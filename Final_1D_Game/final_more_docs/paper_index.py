@@ -0,0 +1,155 @@
+import hashlib
+import math
+import os
+import struct
+
+# ========== Duplicate paper detection ==========
+# Two students must not get the same paper. A question is identified by a canonical digest of its template
+# number, its text (which holds the random inputs) and its options in the order shown, and a paper by the
+# digest of its sorted question digests: the same questions asked in another order are still the same
+# paper, and the same answers would be copied.
+#
+# Keeping every paper of a cohort to compare against costs memory linear in the papers and their text.
+# PaperIndex is a Bloom filter over paper digests instead: n papers with a false-positive rate p take
+# -n ln(p) / ln(2)^2 bits, about 3.6 MB for a million papers at one in a million. A duplicate is always
+# caught. A false positive makes a unique paper look like a duplicate, which only costs redrawing it.
+
+DIGEST_SIZE = 16
+DEFAULT_ERROR_RATE = 1e-6
+# File layout: MAGIC, bit count (Q), hash count (H), papers added (Q), then the bit array
+MAGIC = b"PIDX"
+_HEADER = struct.Struct("<4sQHQ")
+
+
+def _update(digest, text):
+    data = text.encode("utf-8")
+    digest.update(struct.pack("<I", len(data)))
+    digest.update(data)
+
+
+def question_digest(number, question, options):
+    """
+    Canonical digest of a question as shown to a student.
+
+    Parameters
+    ----------
+    number: str
+        Question number of the template.
+    question: str
+        The question text, with its random inputs filled in.
+    options: list
+        The options in the order shown, empty for open-ended questions.
+
+    Returns
+    -------
+    bytes
+        DIGEST_SIZE bytes. Every field is length-prefixed, so no two different questions encode alike.
+    """
+    digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+    _update(digest, str(number))
+    _update(digest, question)
+    digest.update(struct.pack("<I", len(options)))
+    for option in options:
+        _update(digest, option)
+    return digest.digest()
+
+
+def paper_digest(paper):
+    """ Canonical digest of a paper from paper_generator.generate_paper, whatever the order of its questions. """
+    digests = sorted(question_digest(question["number"], question["question"], question["options"])
+                     for question in paper["questions"])
+    return hashlib.blake2b(b"".join(digests), digest_size=DIGEST_SIZE).digest()
+
+
+def optimal_parameters(capacity, error_rate):
+    """ Bit count and hash count of a Bloom filter holding capacity items at error_rate false positives. """
+    if not 0 < error_rate < 1:
+        raise ValueError("error_rate must be between 0 and 1")
+    bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    hashes = max(1, round(bits / max(capacity, 1) * math.log(2)))
+    return bits, hashes
+
+
+class PaperIndex(object):
+    """
+    Bloom filter of paper digests.
+
+    Methods
+    -------
+    add(self, digest): Bool
+        Adds a digest. Returns False if it may already be in the index, i.e a possible duplicate.
+
+    __contains__(self, digest): Bool
+        If the digest may be in the index. Never False for a digest that was added.
+
+    save(self, path): None
+        Writes the index to a file, so later runs can keep papers distinct from this cohort.
+
+    load(cls, path): PaperIndex
+        Reads an index written by save.
+    """
+    def __init__(self, capacity, error_rate=DEFAULT_ERROR_RATE, bits=None, hashes=None):
+        """
+        Parameters
+        ----------
+        capacity: int
+            Number of papers the index is sized for. More can be added, at a higher false-positive rate.
+        error_rate: float
+            Chance that a new paper is reported as a duplicate once capacity papers have been added.
+        """
+        if bits is None:
+            bits, hashes = optimal_parameters(capacity, error_rate)
+        self.bits = bits
+        self.hashes = hashes
+        self.count = 0
+        self._array = bytearray((bits + 7) // 8)
+
+    def __len__(self):
+        return self.count
+
+    def size_bytes(self):
+        return len(self._array)
+
+    def _positions(self, digest):
+        # Double hashing (Kirsch and Mitzenmacher): the two halves of the digest give every hash function
+        first, second = struct.unpack_from("<QQ", digest)
+        second |= 1
+        return [(first + i * second) % self.bits for i in range(self.hashes)]
+
+    def __contains__(self, digest):
+        array = self._array
+        return all(array[position >> 3] & (1 << (position & 7)) for position in self._positions(digest))
+
+    def add(self, digest):
+        array = self._array
+        new = False
+        for position in self._positions(digest):
+            mask = 1 << (position & 7)
+            if not array[position >> 3] & mask:
+                array[position >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def error_rate(self):
+        """ Current false-positive rate, from the number of papers added. """
+        return (1 - math.exp(-self.hashes * self.count / self.bits)) ** self.hashes
+
+    def save(self, path):
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as out_file:
+            out_file.write(_HEADER.pack(MAGIC, self.bits, self.hashes, self.count))
+            out_file.write(self._array)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as in_file:
+            magic, bits, hashes, count = _HEADER.unpack(in_file.read(_HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a paper index")
+            index = cls(0, bits=bits, hashes=hashes)
+            index.count = count
+            in_file.readinto(index._array)
+        return index
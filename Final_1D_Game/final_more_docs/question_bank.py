@@ -0,0 +1,89 @@
+import metrics
+from bank_compiler import CompiledBank
+from bank_loader import load_bank
+
+
+class QuestionBank(object):
+    """
+    Lazy registry of the questions in a question bank, either a JSON file, a directory of JSON shards
+    (see bank_loader.py) or a compiled .qbank (see bank_compiler.py).
+
+    Nothing is read when the bank is created. The file is parsed the first time the templates are needed
+    (e.g. len() when sampling question numbers), and a template is only turned into a Question object
+    the first time it is selected. The instance is then kept, just like the old eagerly filled QN_ANS dict.
+
+    Methods
+    -------
+    templates(self): dictionary
+        The raw question templates, keyed by question number. Parsed on first use.
+
+    template(self, key): dictionary
+        The raw template for one question number.
+
+    metadata(self, key): dictionary
+        The fields of a template that describe it (types, callback name, difficulty), without decoding it.
+
+    __getitem__(self, key): Question
+        The Question instance for a question number, instantiated on first access.
+
+    generate(self, key, rng): Question
+        A new Question for a question number, drawn from the given generator and not cached.
+    """
+    def __init__(self, path, factory):
+        """
+        Parameters
+        ----------
+        path: str
+            Path to the question bank, a .json file, a directory of .json shards or a compiled .qbank file.
+        factory: function
+            Called with a template dictionary, and optionally a generator, to build its Question,
+            e.g Question.from_template.
+        """
+        self.path = path
+        self.factory = factory
+        self._templates = None
+        self._questions = {}
+
+    def templates(self):
+        if self._templates is None:
+            if self.path.endswith(".qbank"):
+                self._templates = CompiledBank(self.path)
+            else:
+                # Streamed and validated entry by entry, a bad template fails here instead of mid-game
+                self._templates = load_bank(self.path)
+        return self._templates
+
+    def template(self, key):
+        return self.templates()[key]
+
+    def metadata(self, key):
+        return self.templates().metadata(key)
+
+    def is_loaded(self):
+        return self._templates is not None
+
+    def __getitem__(self, key):
+        question = self._questions.get(key)
+        if question is None:
+            start = metrics.start()
+            question = self._questions[key] = self.factory(self.template(key))
+            metrics.observe(metrics.GENERATION_SECONDS, start, key)
+        return question
+
+    def generate(self, key, rng):
+        start = metrics.start()
+        question = self.factory(self.template(key), rng)
+        metrics.observe(metrics.GENERATION_SECONDS, start, key)
+        return question
+
+    def __contains__(self, key):
+        return key in self.templates()
+
+    def __iter__(self):
+        return iter(self.templates())
+
+    def __len__(self):
+        return len(self.templates())
+
+    def keys(self):
+        return self.templates().keys()
@@ -0,0 +1,118 @@
+import random
+import threading
+from collections import deque
+
+import metrics
+
+# ========== Pool of fresh questions ==========
+# QN_ANS keeps one instance per template, so every game in a process asks a template with the same numbers.
+# Building a new instance on demand puts generation on the interactive path, so instead every template has a
+# ring buffer of ready instances, and a background thread tops up the buffers that fall under their low-water
+# mark. take() is a deque pop. It only builds the question itself when the buffer is empty, e.g. right after
+# start-up without prefill, before the thread has reached that template, or when many players drain the same
+# template at once.
+
+POOL_SIZE = 32
+LOW_WATER = 8
+
+
+class QuestionPool(object):
+    """
+    Per-template ring buffers of pre-generated Question instances, refilled by a background thread.
+
+    Methods
+    -------
+    start(self, prefill): QuestionPool
+        Starts the refill thread, after filling every buffer if prefill. Otherwise start returns at once and
+        the thread fills every buffer in the background.
+
+    stop(self): None
+        Stops the refill thread.
+
+    take(self, key): Question
+        A fresh Question for a question number, never handed out before.
+    """
+    def __init__(self, bank, size=POOL_SIZE, low_water=LOW_WATER, rng=None, compact=False):
+        """
+        Parameters
+        ----------
+        bank: QuestionBank
+            The bank the questions are generated from, e.g main.QN_ANS.
+        size: int
+            Questions kept ready per template.
+        low_water: int
+            A template's buffer is refilled to size once it holds fewer questions than this.
+        rng: random.Random
+            Generator of the refill thread, only used from that thread. Unseeded by default.
+        compact: Bool
+            Keep CompactQuestion instances (see compact_question.py), for large pools. Their text is built
+            when it is read, so taking one is as fast but showing it costs a few microseconds.
+        """
+        if not 0 < low_water <= size:
+            raise ValueError("low_water must be between 1 and size")
+        self.bank = bank
+        self.size = size
+        self.low_water = low_water
+        self.rng = random.Random() if rng is None else rng
+        self.misses = 0
+        if compact:
+            from compact_question import CompactQuestion
+            self._generate = lambda key, rng: CompactQuestion.generate(bank, key, rng)
+        else:
+            self._generate = bank.generate
+        self._buffers = {key: deque(maxlen=size) for key in bank.keys()}
+        self._low = set(self._buffers)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, prefill=True):
+        if prefill:
+            self._refill()
+        else:
+            # Every buffer is still marked low, the thread fills them all as soon as it runs
+            self._wake.set()
+        self._thread = threading.Thread(target=self._run, name="question-pool", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __len__(self):
+        return sum(len(buffer) for buffer in self._buffers.values())
+
+    def take(self, key):
+        buffer = self._buffers[key]
+        try:
+            question = buffer.popleft()
+        except IndexError:
+            # Empty buffer, build this one on the caller's thread. The pool's generator belongs to the refill thread
+            self.misses += 1
+            metrics.count(metrics.POOL_MISSES, key)
+            question = self._generate(key, random)
+        if len(buffer) < self.low_water:
+            with self._lock:
+                self._low.add(key)
+            self._wake.set()
+        return question
+
+    def _refill(self):
+        with self._lock:
+            low, self._low = self._low, set()
+        for key in low:
+            buffer = self._buffers[key]
+            while len(buffer) < self.size and not self._stopped.is_set():
+                buffer.append(self._generate(key, self.rng))
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            if not self._stopped.is_set():
+                self._refill()
@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+
+import main
+import metrics
+from game_engine import GameSession
+from question_pool import QuestionPool
+from sampler import AdaptiveSampler, BankIndex
+from renderer import AsyncRenderer, CHAR_DELAY
+from rng_streams import derive_seed
+from score_store import ScoreStore
+
+# ========== Multi-session quiz server ==========
+# Every connection gets its own GameSession, so one process serves as many players as it has sockets.
+# The protocol is plain lines of text, the same as the terminal game: the server writes the game output
+# followed by the current prompt, the client answers each prompt with one line. `nc localhost 8765` plays.
+
+
+class QuizServer(object):
+    """
+    asyncio server running one GameSession per connection.
+
+    Methods
+    -------
+    handle_player(self, reader, writer): coroutine
+        Plays a full game with the player on the other end of the connection.
+
+    serve(self, host, port, path, backlog): coroutine
+        Accepts players on a TCP port, or on a unix socket if path is given, until cancelled.
+    """
+    def __init__(self, total_qns=10, idle_timeout=600, char_delay=CHAR_DELAY, headless=None, seed=None, pool=None,
+                 adaptive=False, store=None):
+        """
+        Parameters
+        ----------
+        total_qns: int
+            Total number of questions in one round of the game.
+        idle_timeout: float
+            Seconds to wait for a player's answer before dropping the connection.
+        char_delay: float
+            Seconds per character of the typewriter effect.
+        headless: Bool
+            Send all output at once, without the typewriter effect. Defaults to FRESHMORE_HEADLESS.
+        seed: int
+            Root seed of the server. The n-th connection plays the session seeded with derive_seed(seed, "session", n),
+            so every game can be replayed from the seed and its connection number.
+        pool: QuestionPool
+            Pool of fresh questions shared by the unseeded sessions, see question_pool.py.
+        adaptive: Bool
+            Pick every player's questions from their running score, see sampler.py.
+        store: ScoreStore
+            Records every session's answers and results, see score_store.py.
+        """
+        self.total_qns = total_qns
+        self.idle_timeout = idle_timeout
+        self.char_delay = char_delay
+        self.headless = headless
+        self.seed = seed
+        self.pool = pool
+        self.store = store
+        # The bank index is shared, each session only keeps its player's scores
+        self.index = BankIndex(main.QN_ANS) if adaptive else None
+        self.total_sessions = 0
+        self.active_sessions = 0
+        self.finished_sessions = 0
+
+    async def handle_player(self, reader, writer):
+        session_seed = None if self.seed is None else derive_seed(self.seed, "session", self.total_sessions)
+        self.total_sessions += 1
+        sampler = None if self.index is None else AdaptiveSampler(self.index)
+        session = GameSession(main.Game, total_qns=self.total_qns, seed=session_seed, pool=self.pool, sampler=sampler,
+                              store=self.store)
+        renderer = AsyncRenderer(writer, char_delay=self.char_delay, headless=self.headless)
+        self.active_sessions += 1
+        try:
+            await renderer.render(session.start())
+            while not session.done:
+                writer.write(session.prompt.encode("utf-8"))
+                await writer.drain()
+                start = metrics.start()
+                line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                metrics.observe(metrics.INPUT_WAIT_SECONDS, start)
+                if not line:
+                    break
+                await renderer.render(session.send(line.decode("utf-8", errors="replace").rstrip("\r\n")))
+            if session.done:
+                self.finished_sessions += 1
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.active_sessions -= 1
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765, path=None, backlog=4096):
+        # The default listen backlog of 100 stalls bursts of connecting players on SYN retries
+        if path is not None:
+            server = await asyncio.start_unix_server(self.handle_player, path=path, backlog=backlog)
+        else:
+            server = await asyncio.start_server(self.handle_player, host, port, backlog=backlog)
+        async with server:
+            await server.serve_forever()
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Serve the quiz game to many players over local sockets")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this unix socket path instead of TCP")
+    parser.add_argument("--questions", type=int, default=10, help="questions per round")
+    parser.add_argument("--headless", action="store_true", default=None, help="no typewriter effect")
+    parser.add_argument("--seed", type=int, help="root seed, makes every session replayable")
+    parser.add_argument("--adaptive", action="store_true", help="pick questions from each player's running score")
+    parser.add_argument("--scores", help="SQLite database to record sessions and scores in")
+    args = parser.parse_args()
+
+    metrics.configure_from_env()
+    pool = None if args.seed is not None else QuestionPool(main.QN_ANS).start()
+    store = None if args.scores is None else ScoreStore(args.scores)
+    server = QuizServer(total_qns=args.questions, headless=args.headless, seed=args.seed, pool=pool,
+                        adaptive=args.adaptive, store=store)
+    where = args.unix or f"{args.host}:{args.port}"
+    print(f"Serving the quiz on {where}")
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    if store is not None:
+        store.close()
+
+
+if __name__ == "__main__":
+    run()
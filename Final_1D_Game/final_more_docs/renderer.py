@@ -0,0 +1,169 @@
+import os
+import sys
+import time
+
+import metrics
+
+# ========== Terminal renderer ==========
+# Shows the (kind, text) events of the game (see game_engine.py) with the typewriter effect of the
+# original delay_print, but writes a frame of several characters per syscall instead of one, and
+# never sleeps at all in headless mode (FRESHMORE_HEADLESS=1, load tests and automated runs).
+
+CHAR_DELAY = 0.03
+# Seconds of typewriter animation written per write/flush, 0.09 = 3 characters at CHAR_DELAY.
+FRAME_TIME = 0.09
+CLEAR_SCREEN = "\033[2J\033[H"
+
+
+def headless_from_env():
+    return os.environ.get("FRESHMORE_HEADLESS", "") not in ("", "0")
+
+
+def events_to_text(events):
+    """ The text a terminal would have shown for a list of events, with no delays. """
+    pieces = []
+    for kind, text in events:
+        if kind == "print":
+            pieces.append(text + "\n")
+        elif kind == "clear":
+            pieces.append(CLEAR_SCREEN)
+        else:
+            pieces.append(text)
+    return "".join(pieces)
+
+
+def _frames(text, char_delay, frame_time):
+    """ Splits text into the chunks written per frame of the typewriter effect. """
+    size = max(1, int(round(frame_time / char_delay)))
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class Renderer(object):
+    """
+    Renderer for a blocking stream such as sys.stdout.
+
+    Methods
+    -------
+    write(self, text): None
+        Buffers text, written on the next flush.
+
+    slow(self, text): None
+        Typewriter effect, one write per frame. Writes everything at once when headless.
+
+    clear(self): None
+        Clears the terminal.
+
+    render(self, events): None
+        Shows a list of game events, batching consecutive non-animated text into a single write.
+    """
+    def __init__(self, stream=None, char_delay=CHAR_DELAY, frame_time=FRAME_TIME, headless=None, clear_screen=None):
+        """
+        Parameters
+        ----------
+        stream: file
+            Where to write, sys.stdout by default (looked up on every write, so redirection still works).
+        char_delay: float
+            Seconds per character of the typewriter effect.
+        frame_time: float
+            Seconds of animation per write.
+        headless: Bool
+            No delays and no clearing of the screen. Defaults to the FRESHMORE_HEADLESS environment variable.
+        clear_screen: function
+            Called to clear the terminal, defaults to writing the ANSI clear sequence.
+        """
+        self._stream = stream
+        self.headless = headless_from_env() if headless is None else headless
+        self.char_delay = 0 if self.headless else char_delay
+        self.frame_time = frame_time
+        self.clear_screen = clear_screen
+        self._pending = []
+
+    @property
+    def stream(self):
+        return sys.stdout if self._stream is None else self._stream
+
+    def write(self, text):
+        self._pending.append(text)
+
+    def flush(self):
+        if self._pending:
+            self.stream.write("".join(self._pending))
+            self._pending = []
+        self.stream.flush()
+
+    def slow(self, text):
+        if self.char_delay <= 0:
+            self.write(text)
+            self.flush()
+            return
+        self.flush()
+        for frame in _frames(text, self.char_delay, self.frame_time):
+            self.stream.write(frame)
+            self.stream.flush()
+            time.sleep(self.char_delay * len(frame))
+
+    def clear(self):
+        if self.headless:
+            return
+        self.flush()
+        if self.clear_screen is None:
+            self.stream.write(CLEAR_SCREEN)
+        else:
+            self.clear_screen()
+
+    def render(self, events):
+        start = metrics.start()
+        for kind, text in events:
+            if kind == "slow":
+                self.slow(text)
+            elif kind == "clear":
+                self.clear()
+            else:
+                self.write(text + "\n")
+        self.flush()
+        metrics.observe(metrics.RENDER_SECONDS, start)
+
+
+class AsyncRenderer(object):
+    """
+    Renderer for an asyncio StreamWriter. The typewriter effect awaits between frames, so other
+    sessions on the same event loop keep running while one player's text is being typed out.
+
+    Methods
+    -------
+    render(self, events): coroutine
+        Writes a list of game events to the stream.
+    """
+    def __init__(self, writer, char_delay=CHAR_DELAY, frame_time=FRAME_TIME, headless=None):
+        self.writer = writer
+        self.headless = headless_from_env() if headless is None else headless
+        self.char_delay = 0 if self.headless else char_delay
+        self.frame_time = frame_time
+
+    async def render(self, events):
+        start = metrics.start()
+        await self._render(events)
+        metrics.observe(metrics.RENDER_SECONDS, start)
+
+    async def _render(self, events):
+        if self.char_delay <= 0:
+            self.writer.write(events_to_text(events).encode("utf-8"))
+            await self.writer.drain()
+            return
+        # Imported here, asyncio alone costs more than the rest of `import main`
+        import asyncio
+        pending = []
+        for kind, text in events:
+            if kind != "slow":
+                pending.append((kind, text))
+                continue
+            if pending:
+                self.writer.write(events_to_text(pending).encode("utf-8"))
+                pending = []
+            for frame in _frames(text, self.char_delay, self.frame_time):
+                self.writer.write(frame.encode("utf-8"))
+                await self.writer.drain()
+                await asyncio.sleep(self.char_delay * len(frame))
+        if pending:
+            self.writer.write(events_to_text(pending).encode("utf-8"))
+        await self.writer.drain()
@@ -0,0 +1,44 @@
+import hashlib
+import random
+
+# ========== Seeded random streams ==========
+# Question generation used the global `random` state, so a paper depended on everything else the process had
+# drawn before it and could not be replayed. Code that needs to be reproducible takes a generator object
+# instead, and generators for sessions, rounds or workers are split off a root seed by hashing the seed
+# together with a path of keys, e.g stream(seed, "session", 12, "round", 2).
+# The same (seed, keys) gives the same stream in any process, in any order, on any machine.
+
+
+def derive_seed(seed, *keys):
+    """
+    Splits a child seed off a root seed.
+
+    Parameters
+    ----------
+    seed: int or str
+        The root seed.
+    keys: int or str
+        Path identifying the child stream, e.g "paper", 41.
+
+    Returns
+    -------
+    int
+        A 64 bit seed, independent of the seeds of other key paths.
+    """
+    digest = hashlib.blake2b(repr((seed,) + keys).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def stream(seed, *keys):
+    """ A random.Random for the child stream (seed, *keys). With seed None, an unseeded generator. """
+    if seed is None:
+        return random.Random()
+    return random.Random(derive_seed(seed, *keys))
+
+
+def numpy_stream(seed, *keys):
+    """ A numpy Generator for the child stream (seed, *keys), for the batched generators. """
+    import numpy as np
+    if seed is None:
+        return np.random.default_rng()
+    return np.random.default_rng(derive_seed(seed, *keys))
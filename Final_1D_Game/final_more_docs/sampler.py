@@ -0,0 +1,229 @@
+import math
+import random
+from bisect import bisect_right
+
+# ========== Topic index and adaptive sampling ==========
+# Game used to pick its questions uniformly. The bank is now indexed by topic (the callback prefix: geom,
+# deriv, pnc, trigo or vector, "general" for questions without a callback) and difficulty level, and every
+# template has a weight. Templates are laid out bucket by bucket, (topic, level), in one Fenwick tree of
+# weights, so a bucket is a contiguous range, any weight can be changed in O(log n) and a weighted draw
+# within a bucket is one O(log n) search of the tree.
+#
+# An AdaptiveSampler follows one player: it picks a bucket first, favouring the level that matches the
+# player's running accuracy and the topics they get wrong most, then a template of that bucket by weight.
+# Only the few bucket weights change when a score changes, so banks of 100k+ templates cost nothing more.
+
+TOPICS = ("geom", "deriv", "pnc", "trigo", "vector")
+GENERAL_TOPIC = "general"
+LEVELS = (1, 2, 3)
+# Level of templates without a "difficulty" key, by answer type: options make a question easier.
+DEFAULT_LEVELS = {"mcq": 1, "open": 2}
+# How strongly the level distribution peaks around the player's target level.
+LEVEL_SHARPNESS = 1.5
+# Extra weight of a topic the player always gets wrong, relative to one they always get right.
+TOPIC_BOOST = 1.0
+# Pseudo-answers (half right) behind every accuracy estimate, so early answers do not swing it too far.
+PRIOR_ANSWERS = 2
+MAX_REJECTIONS = 32
+
+
+def topic_of(template):
+    """ Topic of a template, from its callback prefix, e.g "trigo" for trigo_3. """
+    prefix = template.get("callback_func", "").split("_")[0]
+    return prefix if prefix in TOPICS else GENERAL_TOPIC
+
+
+def level_of(template):
+    """ Difficulty level of a template, its "difficulty" key if set. """
+    level = template.get("difficulty", DEFAULT_LEVELS.get(template["answer_type"], LEVELS[0]))
+    return min(max(int(level), LEVELS[0]), LEVELS[-1])
+
+
+class FenwickTree(object):
+    """
+    Binary indexed tree of non-negative weights.
+
+    Methods
+    -------
+    update(self, i, weight): None
+        Sets the weight of item i, in O(log n).
+
+    prefix_sum(self, i): float
+        Sum of the weights of items 0 to i - 1, in O(log n).
+
+    find(self, value): int
+        The item i whose cumulative range [prefix_sum(i), prefix_sum(i + 1)) contains value, in O(log n).
+    """
+    def __init__(self, weights):
+        self.weights = list(weights)
+        self.size = len(self.weights)
+        self._tree = [0.0] + self.weights
+        # O(n) construction, each node pushes its sum to its parent
+        for i in range(1, self.size + 1):
+            parent = i + (i & -i)
+            if parent <= self.size:
+                self._tree[parent] += self._tree[i]
+        self._top_bit = 1 << (self.size.bit_length() - 1) if self.size else 0
+
+    def __len__(self):
+        return self.size
+
+    def update(self, i, weight):
+        if weight < 0:
+            raise ValueError("weights must not be negative")
+        delta = weight - self.weights[i]
+        self.weights[i] = weight
+        i += 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, i):
+        total = 0.0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, value):
+        position = 0
+        bit = self._top_bit
+        while bit:
+            child = position + bit
+            if child <= self.size and self._tree[child] <= value:
+                position = child
+                value -= self._tree[child]
+            bit >>= 1
+        # Rounding can land past the end or on a zero weight, step back to the last weighted item
+        position = min(position, self.size - 1)
+        while position > 0 and self.weights[position] == 0:
+            position -= 1
+        return position
+
+
+class BankIndex(object):
+    """
+    Topic and difficulty index over the templates of a question bank, shared by all players.
+
+    Methods
+    -------
+    set_weight(self, key, weight): None
+        Changes how often a template is drawn within its bucket, in O(log n).
+
+    bucket_weight(self, bucket): float
+        Total template weight of a (topic, level) bucket.
+
+    draw(self, bucket, rng): str
+        A question number of the bucket, drawn by weight.
+    """
+    def __init__(self, bank):
+        """
+        Parameters
+        ----------
+        bank: QuestionBank
+            The bank to index. Templates may set "difficulty" (level 1 to 3) and "weight" (1 by default).
+        """
+        entries = []
+        for key in bank.keys():
+            # Only what the index needs, a compiled bank does not decode templates or import topic packs for it
+            template = bank.metadata(key)
+            entries.append(((topic_of(template), level_of(template)), key, float(template.get("weight", 1.0))))
+        entries.sort(key=lambda entry: entry[0])
+        self.keys = [key for _, key, _ in entries]
+        self.positions = {key: i for i, key in enumerate(self.keys)}
+        self.topics = {key: bucket[0] for bucket, key, _ in entries}
+        self.buckets = {}
+        for i, (bucket, _, _) in enumerate(entries):
+            start, _ = self.buckets.get(bucket, (i, i))
+            self.buckets[bucket] = (start, i + 1)
+        self.tree = FenwickTree(weight for _, _, weight in entries)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def set_weight(self, key, weight):
+        self.tree.update(self.positions[key], weight)
+
+    def bucket_weight(self, bucket):
+        start, stop = self.buckets[bucket]
+        return self.tree.prefix_sum(stop) - self.tree.prefix_sum(start)
+
+    def draw(self, bucket, rng):
+        start, stop = self.buckets[bucket]
+        low = self.tree.prefix_sum(start)
+        position = self.tree.find(low + rng.random() * (self.tree.prefix_sum(stop) - low))
+        return self.keys[min(max(position, start), stop - 1)]
+
+
+class AdaptiveSampler(object):
+    """
+    Picks the questions of one player from their running score.
+
+    Methods
+    -------
+    record(self, key, correct): None
+        Updates the player's accuracy after an answer to a question number.
+
+    draw(self, rng, exclude): str
+        The next question number, not in exclude.
+    """
+    def __init__(self, index):
+        """
+        Parameters
+        ----------
+        index: BankIndex
+            The index of the bank, shared between players.
+        """
+        self.index = index
+        self.answered = 0
+        self.correct = 0
+        self.topic_scores = {}
+        self._buckets = None
+        self._cumulative = None
+
+    def accuracy(self, topic=None):
+        answered, correct = (self.answered, self.correct) if topic is None else self.topic_scores.get(topic, (0, 0))
+        return (correct + PRIOR_ANSWERS / 2) / (answered + PRIOR_ANSWERS)
+
+    def record(self, key, correct):
+        topic = self.index.topics[key]
+        answered, topic_correct = self.topic_scores.get(topic, (0, 0))
+        self.topic_scores[topic] = (answered + 1, topic_correct + bool(correct))
+        self.answered += 1
+        self.correct += bool(correct)
+        self._buckets = None
+
+    def bucket_weights(self):
+        """ Current weight of every (topic, level) bucket for this player. """
+        target = LEVELS[0] + self.accuracy() * (LEVELS[-1] - LEVELS[0])
+        weights = {}
+        for bucket in self.index.buckets:
+            topic, level = bucket
+            level_factor = math.exp(-LEVEL_SHARPNESS * (level - target) ** 2)
+            topic_factor = 1 + TOPIC_BOOST * (1 - self.accuracy(topic))
+            weights[bucket] = self.index.bucket_weight(bucket) * level_factor * topic_factor
+        return weights
+
+    def _pick_bucket(self, rng):
+        if self._buckets is None:
+            self._buckets = []
+            self._cumulative = []
+            total = 0.0
+            for bucket, weight in self.bucket_weights().items():
+                if weight > 0:
+                    total += weight
+                    self._buckets.append(bucket)
+                    self._cumulative.append(total)
+        position = bisect_right(self._cumulative, rng.random() * self._cumulative[-1])
+        return self._buckets[min(position, len(self._buckets) - 1)]
+
+    def draw(self, rng=random, exclude=()):
+        for _ in range(MAX_REJECTIONS):
+            key = self.index.draw(self._pick_bucket(rng), rng)
+            if key not in exclude:
+                return key
+        # Only reached when exclude covers most of a small bank
+        remaining = [key for key in self.index.keys if key not in exclude]
+        if not remaining:
+            raise ValueError("every question of the bank has been excluded")
+        return rng.choice(remaining)
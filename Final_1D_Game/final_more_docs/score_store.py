@@ -0,0 +1,345 @@
+import argparse
+import logging
+import queue
+from itertools import groupby
+import sqlite3
+import threading
+import time
+import uuid
+
+import metrics
+
+# ========== Persistent scores ==========
+# Sessions, every answered question and every round result are kept in an SQLite database, so scores
+# outlive the process. The game never waits on the disk: record_* calls only put a row on a queue, and a
+# writer thread commits whatever is queued in one transaction, up to BATCH_SIZE rows at a time, with one
+# executemany per run of rows of the same kind. The database runs in WAL mode, so leaderboard queries read
+# while the writer commits. A batch the database refuses (locked past the timeout, disk full) is logged and
+# lost, and the writer goes on with the next one.
+#
+# Queries that have to stay fast with millions of attempts never scan the attempts table:
+#   leaderboard  walks the (best_percent DESC) index of sessions, k rows for the top k
+#   topic_stats  reads the per-topic running totals, which the writer adds each batch's attempts to
+#
+# Tables:
+#   sessions             id, player, started_at, finished_at, time_taken, health, bootcamp, best_percent
+#   attempts             session_id, round, question, topic, correct, seconds, answered_at
+#   rounds               session_id, round, score, total_qns, percent, passed, recorded_at
+#   topic_totals         topic, answered, correct
+#   player_topic_totals  player, topic, answered, correct
+
+DEFAULT_PATH = "scores.db"
+BATCH_SIZE = 1024
+# Longest a queued row waits before it is committed
+FLUSH_INTERVAL = 0.25
+# Rows waiting for the writer. Past this the writer is far behind the players and new rows are dropped.
+MAX_PENDING = 100000
+# Longest close() waits for the writer to commit what is queued
+CLOSE_TIMEOUT = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    player TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    time_taken REAL,
+    health INTEGER,
+    bootcamp INTEGER,
+    best_percent REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_leaderboard ON sessions (best_percent DESC, started_at);
+CREATE INDEX IF NOT EXISTS sessions_by_player ON sessions (player);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    question TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    correct INTEGER NOT NULL,
+    seconds REAL,
+    answered_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS attempts_by_session ON attempts (session_id, round);
+
+CREATE TABLE IF NOT EXISTS rounds (
+    session_id TEXT NOT NULL,
+    round INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    total_qns INTEGER NOT NULL,
+    percent REAL NOT NULL,
+    passed INTEGER NOT NULL,
+    recorded_at REAL NOT NULL,
+    PRIMARY KEY (session_id, round)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS topic_totals (
+    topic TEXT PRIMARY KEY,
+    answered INTEGER NOT NULL,
+    correct INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS player_topic_totals (
+    player TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    answered INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    PRIMARY KEY (player, topic)
+) WITHOUT ROWID;
+"""
+
+_INSERT_SESSION = "INSERT INTO sessions (id, player, started_at) VALUES (?, ?, ?)"
+_INSERT_ATTEMPT = ("INSERT INTO attempts (session_id, round, question, topic, correct, seconds, answered_at) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_ADD_TOPIC_TOTALS = ("INSERT INTO topic_totals (topic, answered, correct) VALUES (?, ?, ?) "
+                     "ON CONFLICT (topic) DO UPDATE SET answered = answered + excluded.answered, "
+                     "correct = correct + excluded.correct")
+_ADD_PLAYER_TOPIC_TOTALS = ("INSERT INTO player_topic_totals (player, topic, answered, correct) "
+                            "SELECT player, ?, ?, ? FROM sessions WHERE id = ? "
+                            "ON CONFLICT (player, topic) DO UPDATE SET answered = answered + excluded.answered, "
+                            "correct = correct + excluded.correct")
+_INSERT_ROUND = ("INSERT OR REPLACE INTO rounds (session_id, round, score, total_qns, percent, passed, recorded_at) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?)")
+_UPDATE_BEST = "UPDATE sessions SET best_percent = MAX(best_percent, ?) WHERE id = ?"
+_END_SESSION = "UPDATE sessions SET finished_at = ?, time_taken = ?, health = ?, bootcamp = ? WHERE id = ?"
+
+logger = logging.getLogger(__name__)
+
+
+def connect(path):
+    """ A connection to the score database, in WAL mode and with the tables created. """
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    # In WAL mode NORMAL only syncs at checkpoints: a power cut can lose the last commits, never corrupt the file
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+class ScoreStore(object):
+    """
+    SQLite store of sessions, attempts and round results, written by a background thread.
+
+    Methods
+    -------
+    start_session(self, player): str
+        Records a new session of a player and returns its id.
+
+    record_attempt(self, session_id, round_no, question, topic, correct, seconds): None
+        Records the player's answer to one question.
+
+    record_round(self, session_id, round_no, score, total_qns, passed): None
+        Records the result of a round.
+
+    end_session(self, session_id, time_taken, health, bootcamp): None
+        Records how a session ended.
+
+    flush(self, timeout): Bool
+        Waits until everything recorded so far is committed. False on timeout or if the writer is gone.
+
+    close(self, timeout): None
+        Commits what is left and stops the writer thread, waiting at most timeout seconds.
+
+    leaderboard(self, k): list
+        The k sessions with the best round scores.
+
+    topic_stats(self, player): dictionary
+        Answers and accuracy per topic, for one player or everyone.
+    """
+    def __init__(self, path=DEFAULT_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        """
+        Parameters
+        ----------
+        path: str
+            Path to the SQLite database, created if missing.
+        batch_size: int
+            Most rows committed in one transaction.
+        flush_interval: float
+            Seconds a queued row may wait for more rows to share its transaction.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.failed = 0
+        # Created here so a bad path fails in the caller, not in the writer thread
+        connect(path).close()
+        self._queue = queue.Queue(MAX_PENDING)
+        self._thread = threading.Thread(target=self._run, name="score-store", daemon=True)
+        self._thread.start()
+
+    # ===== Recording, never blocks =====
+
+    def _put(self, sql, params):
+        try:
+            self._queue.put_nowait((sql, params))
+        except queue.Full:
+            self.dropped += 1
+            metrics.count(metrics.SCORES_DROPPED)
+
+    def start_session(self, player):
+        # The id is made here rather than by SQLite, so the caller does not wait for the insert
+        session_id = uuid.uuid4().hex
+        self._put(_INSERT_SESSION, (session_id, str(player), time.time()))
+        return session_id
+
+    def record_attempt(self, session_id, round_no, question, topic, correct, seconds=None):
+        self._put(_INSERT_ATTEMPT, (session_id, round_no, question, topic, int(bool(correct)), seconds, time.time()))
+
+    def record_round(self, session_id, round_no, score, total_qns, passed):
+        percent = score / total_qns * 100 if total_qns else 0.0
+        self._put(_INSERT_ROUND, (session_id, round_no, score, total_qns, percent, int(bool(passed)), time.time()))
+
+    def end_session(self, session_id, time_taken, health, bootcamp):
+        self._put(_END_SESSION, (time.time(), time_taken, health, int(bool(bootcamp)), session_id))
+
+    # ===== Writer thread =====
+
+    def _run(self):
+        connection = None
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stopping = None in batch
+            rows = [row for row in batch if row is not None]
+            try:
+                if rows:
+                    if connection is None:
+                        connection = connect(self.path)
+                    self._write(connection, rows)
+            except Exception:
+                # Only this batch is lost, the writer must keep running or flush() and close() would never return
+                self.failed += len(rows)
+                metrics.count(metrics.SCORES_FAILED, amount=len(rows))
+                logger.exception("could not commit %d score rows to %s", len(rows), self.path)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        if connection is not None:
+            connection.close()
+
+    @staticmethod
+    def _write(connection, rows):
+        """ Commits a batch of (sql, params) rows, with the totals and best scores they change. """
+        topic_totals = {}
+        player_topic_totals = {}
+        best_percents = {}
+        for sql, params in rows:
+            if sql is _INSERT_ATTEMPT:
+                session_id, topic, correct = params[0], params[3], params[4]
+                for totals, key in ((topic_totals, topic), (player_topic_totals, (topic, session_id))):
+                    answered, total_correct = totals.get(key, (0, 0))
+                    totals[key] = (answered + 1, total_correct + correct)
+            elif sql is _INSERT_ROUND:
+                session_id, percent = params[0], params[4]
+                best_percents[session_id] = max(percent, best_percents.get(session_id, 0.0))
+        with connection:
+            # Rows keep their order, a session is always inserted before its attempts
+            for sql, run in groupby(rows, key=lambda row: row[0]):
+                connection.executemany(sql, [params for _, params in run])
+            connection.executemany(_ADD_TOPIC_TOTALS, [(topic, answered, correct)
+                                                       for topic, (answered, correct) in topic_totals.items()])
+            connection.executemany(_ADD_PLAYER_TOPIC_TOTALS, [(topic, answered, correct, session_id)
+                                                              for (topic, session_id), (answered, correct)
+                                                              in player_topic_totals.items()])
+            connection.executemany(_UPDATE_BEST, [(percent, session_id) for session_id, percent in best_percents.items()])
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = self._queue.all_tasks_done
+        with done:
+            while self._queue.unfinished_tasks:
+                if self._thread is None or not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                # Woken up regularly to notice a writer that died
+                done.wait(0.1 if remaining is None else min(remaining, 0.1))
+        return True
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        if self._thread is None:
+            return
+        deadline = time.monotonic() + timeout
+        # Waits for a free slot, the stop marker must not be dropped, but not for a writer that is gone
+        while self._thread.is_alive():
+            try:
+                self._queue.put(None, timeout=0.1)
+                break
+            except queue.Full:
+                if time.monotonic() >= deadline:
+                    break
+        self._thread.join(max(0.0, deadline - time.monotonic()))
+        if self._thread.is_alive():
+            logger.warning("score writer still busy after %.1fs, %d rows not committed", timeout,
+                           self._queue.unfinished_tasks)
+        self._thread = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # ===== Queries =====
+
+    def leaderboard(self, k=10):
+        """
+        Returns
+        -------
+        list
+            (player, best_percent, started_at) of the k best sessions, best first, earlier sessions first on ties.
+        """
+        connection = connect(self.path)
+        try:
+            return connection.execute("SELECT player, best_percent, started_at FROM sessions "
+                                      "ORDER BY best_percent DESC, started_at LIMIT ?", (k,)).fetchall()
+        finally:
+            connection.close()
+
+    def topic_stats(self, player=None):
+        """
+        Returns
+        -------
+        dictionary
+            topic -> (answered, correct, accuracy), for player or all players if player is None.
+        """
+        connection = connect(self.path)
+        try:
+            if player is None:
+                rows = connection.execute("SELECT topic, answered, correct FROM topic_totals").fetchall()
+            else:
+                rows = connection.execute("SELECT topic, answered, correct FROM player_topic_totals WHERE player = ?",
+                                          (player,)).fetchall()
+        finally:
+            connection.close()
+        return {topic: (answered, correct, correct / answered if answered else 0.0) for topic, answered, correct in rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the leaderboard and topic accuracy of a score database")
+    parser.add_argument("path", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("-k", type=int, default=10, help="entries in the leaderboard")
+    parser.add_argument("--player", help="topic accuracy of one player instead of everyone")
+    args = parser.parse_args()
+
+    store = ScoreStore(args.path)
+    print("Leaderboard")
+    for rank, (player, percent, started_at) in enumerate(store.leaderboard(args.k), 1):
+        print(f"{rank:3}. {player:<20} {percent:6.1f}%  {time.strftime('%Y-%m-%d %H:%M', time.localtime(started_at))}")
+    print("\nTopic accuracy" + (f" of {args.player}" if args.player else ""))
+    for topic, (answered, correct, accuracy) in sorted(store.topic_stats(args.player).items()):
+        print(f"  {topic:<8} {correct:>8}/{answered:<8} {accuracy:6.1%}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
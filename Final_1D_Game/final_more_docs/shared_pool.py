@@ -0,0 +1,223 @@
+import multiprocessing
+import random
+import struct
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import metrics
+from compact_question import CompactQuestion
+from question_bank import QuestionBank
+
+# ========== Shared-memory question pool ==========
+# QuestionPool fills buffers inside each process, so N worker processes each load the bank and generate
+# their own instances. SharedQuestionPool moves generation to one producer process, which writes questions
+# into a numpy structured array in a multiprocessing.shared_memory block that every worker maps. A slot holds
+# what a CompactQuestion is drawn from (see compact_question.py): the template id, the random inputs as
+# doubles and the packed option order and distractor refs. Taking a question reads one slot in place and
+# wraps it in a CompactQuestion, nothing is pickled or sent over a pipe.
+#
+# Every (worker, template) pair has its own ring of slots, with the producer as the only writer and the
+# worker as the only reader, so claiming a slot needs no lock. Each slot has a sequence number: for the n-th
+# question of a ring, its slot n % slots is free while seq == n and holds the question once seq == n + 1.
+# The producer writes the fields first and seq last, the worker reads the fields and hands the slot back by
+# setting seq to n + slots. A worker whose ring is empty builds the question itself, like QuestionPool.
+#
+#   pool = SharedQuestionPool.create(main.QN_ANS, workers=4).start()
+#   worker_pool = SharedQuestionPool.attach(pool.name, worker, main.QN_ANS)    # in worker process `worker`
+#   GameSession(main.Game, pool=worker_pool)
+
+SLOTS = 32
+# Seconds the producer sleeps once every ring is full
+POLL_INTERVAL = 0.001
+# Layout header: workers, templates, slots, max args (int64 each), then the slots
+_HEADER = struct.Struct("<4q")
+NO_CHOICES = -1
+
+
+def slot_dtype(max_args):
+    return np.dtype([
+        ("seq", "<i8"),
+        # Banks can hold well over 65535 templates
+        ("template", "<u4"),
+        ("nargs", "<u1"),
+        ("args", "<f8", (max(max_args, 1),)),
+        ("choices", "<i8"),
+    ])
+
+
+def _max_args(bank):
+    return max((len(bank.template(key).get("args_ranges") or ()) for key in bank.keys()), default=0)
+
+
+class SharedQuestionPool(object):
+    """
+    Per-worker, per-template rings of questions in shared memory, filled by a producer process.
+
+    Methods
+    -------
+    create(cls, bank, workers, slots): SharedQuestionPool
+        Allocates the shared block, owned by the calling process.
+
+    attach(cls, name, worker, bank): SharedQuestionPool
+        Maps the block created under name, to take the questions of ring set worker.
+
+    start(self): SharedQuestionPool
+        Starts the producer process. Owner only.
+
+    take(self, key): CompactQuestion
+        A fresh question for a question number, never handed out before. Same as QuestionPool.take.
+
+    close(self): None
+        Unmaps the block. The owner also stops the producer and frees the block.
+    """
+    def __init__(self, bank, shm, worker=None, owner=False):
+        self.bank = bank
+        self.owner = owner
+        self.misses = 0
+        self._shm = shm
+        workers, templates, slots, max_args = _HEADER.unpack_from(shm.buf)
+        self.keys = list(bank.keys())
+        if len(self.keys) != templates:
+            raise ValueError(f"shared pool {shm.name} holds {templates} templates, the bank has {len(self.keys)}")
+        self.workers = workers
+        self.slots = slots
+        self._rings = np.ndarray((workers, templates, slots), slot_dtype(max_args), shm.buf, _HEADER.size)
+        self._template_ids = {key: i for i, key in enumerate(self.keys)}
+        self._stop = None
+        self._producer = None
+        if worker is not None:
+            if not 0 <= worker < workers:
+                raise ValueError(f"worker must be between 0 and {workers - 1}")
+            ring = self._rings[worker]
+            # Field views of this worker's rings, indexed [template, slot]
+            self._seq, self._nargs, self._args, self._choices = (ring[field]
+                                                                 for field in ("seq", "nargs", "args", "choices"))
+            self._cursors = [0] * templates
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @classmethod
+    def create(cls, bank, workers, slots=SLOTS):
+        """
+        Allocates the shared block, owned by the calling process.
+
+        Parameters
+        ----------
+        bank: QuestionBank
+            The bank the questions are generated from, e.g main.QN_ANS. The producer loads it from bank.path.
+        workers: int
+            Number of worker processes, each takes from its own rings.
+        slots: int
+            Questions kept ready per worker and template, at least 2.
+        """
+        if slots < 2:
+            raise ValueError("slots must be at least 2")
+        max_args = _max_args(bank)
+        shape = (workers, len(bank.keys()), slots)
+        dtype = slot_dtype(max_args)
+        shm = shared_memory.SharedMemory(create=True, size=_HEADER.size + int(np.prod(shape)) * dtype.itemsize)
+        _HEADER.pack_into(shm.buf, 0, workers, shape[1], slots, max_args)
+        pool = cls(bank, shm, owner=True)
+        # Every slot starts free for the first question of its ring
+        pool._rings["seq"] = np.arange(slots)
+        return pool
+
+    @classmethod
+    def attach(cls, name, worker, bank):
+        # Processes started by multiprocessing share the owner's resource tracker, so only the owner's unlink
+        # in close() frees the block
+        return cls(bank, shared_memory.SharedMemory(name=name), worker)
+
+    def start(self, prefill=True):
+        """ Starts the producer process and, if prefill, waits until every ring is full. """
+        if not self.owner:
+            raise RuntimeError("only the process that created the pool runs its producer")
+        self._stop = multiprocessing.Event()
+        self._producer = multiprocessing.Process(target=produce, args=(self.name, self.bank.path, self._stop),
+                                                 name="shared-question-pool", daemon=True)
+        self._producer.start()
+        if prefill:
+            self.wait_full()
+        return self
+
+    def wait_full(self, timeout=None):
+        """ Waits until the producer has filled every ring. Returns False on timeout. """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while len(self) < self._rings.size:
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
+
+    def __len__(self):
+        """ Questions ready in all rings. """
+        seq = self._rings["seq"]
+        # A slot holds a question while its seq is one past a ticket of that slot
+        return int(np.count_nonzero(seq % self.slots != np.arange(self.slots)))
+
+    def take(self, key):
+        template = self._template_ids[key]
+        cursor = self._cursors[template]
+        slot = cursor % self.slots
+        if self._seq[template, slot] != cursor + 1:
+            # Empty ring, build this one here, from the module generator like QuestionPool does
+            self.misses += 1
+            metrics.count(metrics.POOL_MISSES, key)
+            return CompactQuestion.generate(self.bank, key, random)
+        packed_args = self._args[template, slot, :self._nargs[template, slot]].tobytes()
+        choices = int(self._choices[template, slot])
+        self._seq[template, slot] = cursor + self.slots
+        self._cursors[template] = cursor + 1
+        return CompactQuestion(self.bank, self.keys[template], packed_args, None if choices == NO_CHOICES else choices)
+
+    def close(self):
+        if self._producer is not None:
+            self._stop.set()
+            self._producer.join()
+            self._producer = None
+        # Views into the block must go before it can be unmapped
+        self._rings = self._seq = self._nargs = self._args = self._choices = None
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def produce(name, bank_path, stop):
+    """ Producer process: keeps every ring of the pool named name full until stop is set. """
+    bank = QuestionBank(bank_path, lambda template: None)
+    shm = shared_memory.SharedMemory(name=name)
+    workers, templates, slots, max_args = _HEADER.unpack_from(shm.buf)
+    rings = np.ndarray((workers, templates, slots), slot_dtype(max_args), shm.buf, _HEADER.size)
+    seq, template_ids, nargs, args, choices = (rings[field] for field in ("seq", "template", "nargs", "args", "choices"))
+    keys = list(bank.keys())
+    rng = random.Random()
+    # Next ticket of every ring, the producer being its only writer
+    cursors = np.zeros((workers, templates), dtype=np.int64)
+    try:
+        while not stop.is_set():
+            written = 0
+            for worker in range(workers):
+                for template, key in enumerate(keys):
+                    cursor = int(cursors[worker, template])
+                    while seq[worker, template, cursor % slots] == cursor:
+                        slot = (worker, template, cursor % slots)
+                        question = CompactQuestion.generate(bank, key, rng)
+                        count = len(question.packed_args) // 8
+                        template_ids[slot] = template
+                        nargs[slot] = count
+                        args[slot][:count] = np.frombuffer(question.packed_args, "<f8")
+                        choices[slot] = NO_CHOICES if question.choices is None else question.choices
+                        # Published last: the worker reads the fields only once it sees this
+                        seq[slot] = cursor + 1
+                        cursor += 1
+                        written += 1
+                    cursors[worker, template] = cursor
+            if not written:
+                time.sleep(POLL_INTERVAL)
+    finally:
+        rings = seq = template_ids = nargs = args = choices = None
+        shm.close()
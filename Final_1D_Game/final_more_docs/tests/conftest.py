@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The game modules are flat files imported by name, and main reads qn_ans.json from the working directory
+GAME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, GAME_DIR)
+os.chdir(GAME_DIR)
+os.environ.setdefault("FRESHMORE_HEADLESS", "1")
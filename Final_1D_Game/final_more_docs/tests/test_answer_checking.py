@@ -0,0 +1,66 @@
+import math
+
+import pytest
+
+from answer_checking import answer_identity, answer_key, check_mcq, check_open
+
+FACTORIAL_20 = str(math.factorial(20))
+
+
+@pytest.mark.parametrize("answer,guess", [
+    ("12", " 12 "),
+    ("12", "+12"),
+    ("12", "12.0"),
+    ("12", "12.000"),
+    ("12", "12."),
+    ("-3", "-3.0"),
+    ("12.5", "12.50"),
+    ("12.5", " 12.5"),
+    ("12.5", "12.504"),
+    ("12.5", "12.496"),
+    ("0.25", ".25"),
+    (FACTORIAL_20, FACTORIAL_20),
+    (FACTORIAL_20, FACTORIAL_20 + ".0"),
+    ("(3, 4)", "(3,4)"),
+    ("(3, 4)", "( 3 , 4 )"),
+    ("(1.5, -2.25)", "(1.50, -2.25)"),
+    ("5x^4", "5*x^4"),
+    ("Scalar", "  scalar "),
+    ("is a vector", "is  a VECTOR"),
+])
+def test_spellings_of_the_same_answer_match(answer, guess):
+    assert check_open(answer, guess)
+
+
+@pytest.mark.parametrize("answer,guess", [
+    ("12", "12.5"),
+    ("12", "12.0001"),
+    ("12", "twelve"),
+    ("12", ""),
+    ("12.5", "12.51"),
+    ("12.5", "12.49"),
+    (FACTORIAL_20, str(math.factorial(20) + 1)),
+    (FACTORIAL_20, str(math.factorial(20) + 1) + ".0"),
+    (FACTORIAL_20, FACTORIAL_20 + ".5"),
+    (FACTORIAL_20, "2.43290200817664e18"),
+    ("12", "1" * 5000),
+    ("(3, 4)", "(4, 3)"),
+    ("(3, 4)", "(3, 4.5)"),
+    ("(3, 4)", "3, 4"),
+    ("5x^4", "4x^5"),
+    ("scalar", "vector"),
+])
+def test_different_answers_do_not_match(answer, guess):
+    assert not check_open(answer, guess)
+
+
+def test_identity_is_shared_by_spellings():
+    assert answer_identity("12.5") == answer_identity("12.50")
+    assert answer_identity("(3, 4)") == answer_identity("(3,4)")
+    assert answer_key("5x^4").identity is answer_key("5*x^4").identity
+    assert answer_identity("12") != answer_identity("12.5")
+
+
+def test_mcq_guess_is_the_option_number():
+    assert check_mcq("2", " 2")
+    assert not check_mcq("2", "3")
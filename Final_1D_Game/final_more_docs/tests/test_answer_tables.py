@@ -0,0 +1,45 @@
+import random
+
+import main
+from answer_tables import MAX_TABLE_SIZE, MEMO_SIZE, answer_function
+
+
+def _counting(callback):
+    calls = []
+
+    def counted(*args):
+        calls.append(args)
+        return callback(*args)
+    return counted, calls
+
+
+def test_inputs_outside_the_domain_do_not_evict_it():
+    callback, calls = _counting(lambda a, b: a * b)
+    function = answer_function({"args_ranges": [["int", [1, 5]], ["int", [1, 5]]]}, callback)
+    assert len(calls) == 25
+    for i in range(2 * (MEMO_SIZE + 25)):
+        assert function(100 + i, 2) == str(200 + 2 * i)
+    del calls[:]
+    assert [function(a, b) for a in range(1, 6) for b in range(1, 6)] == [str(a * b) for a in range(1, 6)
+                                                                           for b in range(1, 6)]
+    assert calls == []
+
+
+def test_floats_and_ints_are_memoized_apart():
+    function = answer_function({"args_ranges": [["int", [1, 5]], ["int", [1, 5]]]}, lambda a, b: a * b * 2)
+    assert function(30.0, 1) == "60.0"
+    assert function(30, 1) == "60"
+    memo = answer_function({"args_ranges": [["int", [1, MAX_TABLE_SIZE]], ["int", [1, 2]]]}, lambda a, b: a * b * 3)
+    assert memo(7.0, 1) == "21.0"
+    assert memo(7, 1) == "21"
+
+
+def test_templates_stay_plain_data():
+    rng = random.Random(5)
+    for key in main.QN_ANS.keys():
+        template = main.QN_ANS.template(key)
+        keys_before = set(template)
+        if template["question_type"] == "dynamic":
+            main.Question.from_dynamic(template, rng)
+        assert set(template) == keys_before
+        assert "answer_function" not in template
@@ -0,0 +1,30 @@
+import json
+
+import bank_loader
+from bank_loader import JsonBank, load_bank
+
+STATIC = {"question": "Quelle est la réponse ✓?", "question_type": "static", "answer_type": "open", "answer": "é"}
+
+
+def test_json_bank_matches_json_load(monkeypatch):
+    # Small chunks, so templates straddle chunk boundaries
+    monkeypatch.setattr(bank_loader, "CHUNK_SIZE", 7)
+    with open("qn_ans.json", encoding="utf-8") as in_file:
+        expected = json.load(in_file)
+    bank = load_bank("qn_ans.json")
+    assert isinstance(bank, JsonBank)
+    assert list(bank.keys()) == list(expected)
+    assert all(bank[key] == expected[key] for key in expected)
+    assert bank.metadata("12") == {field: expected["12"][field] for field in ("question_type", "answer_type",
+                                                                               "callback_func")}
+
+
+def test_json_bank_decodes_templates_on_first_access_only(tmp_path):
+    (tmp_path / "000_a.json").write_text(json.dumps({"é1": STATIC, "2": STATIC}, ensure_ascii=False, indent=2),
+                                         encoding="utf-8")
+    (tmp_path / "001_b.json").write_text(json.dumps({"3": STATIC}, ensure_ascii=False), encoding="utf-8")
+    bank = load_bank(str(tmp_path))
+    assert list(bank) == ["é1", "2", "3"]
+    assert not bank._entries
+    assert bank["é1"] == STATIC and bank["3"] == STATIC
+    assert set(bank._entries) == {"é1", "3"}
@@ -0,0 +1,67 @@
+import random
+
+import numpy as np
+import pytest
+
+import callback_registry
+import main
+from math_questions_np import BATCH_CALLBACKS, batch_answers, round_2dp
+
+DYNAMIC_KEYS = [key for key in main.QN_ANS.keys() if main.QN_ANS.template(key)["question_type"] == "dynamic"]
+# Ints up to this keep pnc_2, pnc_3 and pnc_5 on their exact int64 array path
+SMALL_INT = 20
+
+
+def _batch_templates():
+    for key in DYNAMIC_KEYS:
+        template = main.QN_ANS.template(key)
+        if template["callback_func"] in BATCH_CALLBACKS:
+            yield key, template
+
+
+def _small(args_ranges):
+    return [[rng_type, [start, min(stop, SMALL_INT)] if rng_type == "int" else [start, stop]]
+            for rng_type, (start, stop) in args_ranges]
+
+
+@pytest.mark.parametrize("key,template", list(_batch_templates()))
+@pytest.mark.parametrize("small", [False, True])
+def test_batch_answers_match_the_scalar_callback(key, template, small):
+    args_ranges = _small(template["args_ranges"]) if small else template["args_ranges"]
+    columns = main.Question._parse_random_rng_batch(args_ranges, 2000, np.random.default_rng(int(key)))
+    callback = callback_registry.get(template["callback_func"])
+    rows = list(zip(*[column.tolist() for column in columns]))
+    expected = [str(callback(*row)) for row in rows]
+    assert [str(answer) for answer in batch_answers(template["callback_func"], columns).tolist()] == expected
+
+
+def test_round_2dp_rounds_ties_like_round():
+    values = [2.675, 1.005, 0.125, 0.375, -0.125, 10.045, 3.14159, 2.5]
+    assert round_2dp(np.array(values)).tolist() == [round(value, 2) for value in values]
+
+
+@pytest.mark.parametrize("key", DYNAMIC_KEYS)
+def test_batch_questions_have_right_answers_and_distinct_options(key):
+    template = main.QN_ANS.template(key)
+    batch = main.Question.from_dynamic_batch(template, 300, np.random.default_rng(int(key)))
+    callback = callback_registry.get(template["callback_func"])
+    rows = zip(*[column.tolist() for column in batch.columns])
+    for row, question in zip(rows, batch.to_questions()):
+        answer = str(callback(*row))
+        if template["answer_type"] == "mcq":
+            assert len(set(question.options)) == 4
+            assert question.options[int(question.answer) - 1] == answer
+        else:
+            assert question.answer == answer
+
+
+@pytest.mark.parametrize("key", DYNAMIC_KEYS)
+def test_batches_from_the_same_seed_are_identical(key):
+    template = main.QN_ANS.template(key)
+    batches = []
+    for _ in range(2):
+        # Whatever the global generator does in between
+        random.seed()
+        batch = main.Question.from_dynamic_batch(template, 300, np.random.default_rng(1))
+        batches.append([(question.question, question.options, question.answer) for question in batch.to_questions()])
+    assert batches[0] == batches[1]
@@ -0,0 +1,34 @@
+import pytest
+
+import main
+from compact_question import CompactQuestion, _pack_choices, _unpack_choices
+from rng_streams import stream
+
+
+@pytest.mark.parametrize("key", list(main.QN_ANS.keys()))
+def test_compact_question_matches_question_from_the_same_draws(key):
+    for i in range(20):
+        question = main.QN_ANS.generate(key, stream(2021, "question", key, i))
+        compact = CompactQuestion.generate(main.QN_ANS, key, stream(2021, "question", key, i))
+        assert compact.question_type == question.question_type
+        assert compact.question == question.question
+        assert compact.options == question.options
+        assert compact.answer == question.answer
+        if compact.question_type == "mcq":
+            assert len(set(compact.options)) == 4
+            assert compact.options[int(compact.answer) - 1] == question.options[int(question.answer) - 1]
+
+
+@pytest.mark.parametrize("key", list(main.QN_ANS.keys()))
+def test_compact_question_checks_answers_like_question(key):
+    question = main.QN_ANS.generate(key, stream(7, "question", key))
+    compact = CompactQuestion.generate(main.QN_ANS, key, stream(7, "question", key))
+    for guess in {question.answer, "1", "2", "3", "4", "0", "no idea"}:
+        assert compact.check_answer(guess) == question.check_answer(guess)
+
+
+def test_choices_round_trip():
+    order, refs = [2, 0, 3, 1], [-128, 0, 127]
+    assert _unpack_choices(_pack_choices(order, refs)) == (tuple(order), refs)
+    with pytest.raises(ValueError):
+        _pack_choices(order, [0, 0, 128])
@@ -0,0 +1,49 @@
+import time
+from fractions import Fraction
+
+import pytest
+
+import expressions
+import main
+from expressions import MAX_FOLDED_BITS, parse
+
+
+def test_small_integer_powers_are_folded():
+    assert parse("2^10") is parse("1024")
+    assert parse("(2^3)^2") is parse("64")
+    assert parse("2^-2") is parse("1/4")
+    assert parse("x^2*x^3") is parse("x^5")
+
+
+def test_powers_over_the_bit_cap_stay_unevaluated():
+    node = parse("9^2048")
+    assert node.kind == "pow"
+    folded = parse("9^1024")
+    assert folded.kind == "num"
+    assert folded.args[0].numerator.bit_length() <= MAX_FOLDED_BITS
+
+
+def test_nested_powers_do_not_blow_up():
+    start = time.perf_counter()
+    node = parse("((9^1024)^1024)^1024")
+    assert time.perf_counter() - start < 1
+    assert node.kind == "pow"
+
+
+def test_power_bits_bounds_numerator_and_denominator():
+    assert expressions._power_bits(Fraction(1, 9), -3) == 4 * 3
+    assert expressions._power_bits(Fraction(9), 1024) >= (Fraction(9) ** 1024).numerator.bit_length()
+
+
+def test_deeply_nested_or_long_guesses_are_rejected():
+    for text in ("(" * 2000 + "x" + ")" * 2000, "-" * 2000 + "x", "x^" * 2000 + "x", "sin(" * 2000 + "x" + ")" * 2000,
+                 "x+" * 2000 + "x"):
+        with pytest.raises(ValueError):
+            parse(text)
+    assert parse("(" * 20 + "x" + ")" * 20) is parse("x")
+
+
+def test_nested_guesses_are_wrong_answers():
+    question = main.Question("", [], "5x^4")
+    assert not question.check_answer("(" * 2000 + "x" + ")" * 2000)
+    assert question.check_answer("5" + "(" * 20 + "x" + ")" * 20 + "^4")
@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import main
+from grader import answer_key, checked_args, grade_file, grade_lines
+
+
+def _line(record):
+    return json.dumps(record).encode("utf-8")
+
+
+def _valid_record(player="a"):
+    template = main.QN_ANS.template("17")
+    args = [start for _, (start, _) in template["args_ranges"]]
+    return {"player": player, "template": "17", "args": args, "guess": "0"}
+
+
+def test_checked_args_rejects_out_of_range_wrong_count_and_non_numbers():
+    args_ranges = [["float", [0.2, 1]], ["int", [1, 5]]]
+    assert checked_args([0.5, 3], args_ranges) == [0.5, 3]
+    for args in ([0, 3], [0.5, 6], [0.5, 2.5], [0.5], [0.5, 3, 1], [0.5, "3"], [True, 3], "0.5,3"):
+        with pytest.raises(ValueError):
+            checked_args(args, args_ranges)
+
+
+def test_integral_floats_reach_int_callbacks_as_ints():
+    args = checked_args([0.5, 3.0], [["float", [0.2, 1]], ["int", [1, 5]]])
+    assert args == [0.5, 3] and type(args[1]) is int
+    for key in ("6", "13", "15", "22"):
+        ints = [start + 1 for _, (start, _) in main.QN_ANS.template(key)["args_ranges"]]
+        floats = [float(value) for value in ints]
+        assert answer_key({"template": key, "args": floats}) == answer_key({"template": key, "args": ints})
+
+
+def test_bad_records_are_counted_invalid_and_grading_continues():
+    lines = [
+        # Would divide by zero in trigo_2
+        _line({"player": "b", "template": "17", "args": [2, 0, 1], "guess": "1"}),
+        _line({"player": "b", "seed": 7, "paper": 1, "position": 0, "guess": "1"}),
+        _line({"player": "b", "template": "no such template", "guess": "1"}),
+        b"not json",
+        _line(_valid_record()),
+    ]
+    totals, invalid = grade_lines(lines)
+    assert invalid == 4
+    assert totals == {"a": [1, 0]}
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_grade_file_survives_a_bad_record(tmp_path, processes):
+    log = tmp_path / "log.jsonl"
+    log.write_bytes(b"\n".join([_line({"player": "b", "template": "17", "args": [2, 0, 1], "guess": "1"}),
+                                _line(_valid_record())]) + b"\n")
+    totals, records, invalid = grade_file(str(log), processes=processes, chunk_lines=1)
+    assert (records, invalid) == (2, 1)
+    assert totals == {"a": [1, 0]}
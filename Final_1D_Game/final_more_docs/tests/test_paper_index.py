@@ -0,0 +1,48 @@
+import io
+import json
+
+from paper_generator import generate_paper, write_papers
+from paper_index import PaperIndex, paper_digest, question_digest
+
+
+def test_add_rejects_a_digest_seen_before():
+    index = PaperIndex(100)
+    first, second = question_digest("1", "a", []), question_digest("1", "b", [])
+    assert index.add(first)
+    assert first in index and second not in index
+    assert not index.add(first)
+    assert index.add(second)
+    assert len(index) == 2
+
+
+def test_paper_digest_ignores_question_order():
+    paper = generate_paper(3, 7, 10)
+    shuffled = dict(paper, questions=paper["questions"][::-1])
+    assert paper_digest(shuffled) == paper_digest(paper)
+    assert paper_digest(generate_paper(4, 7, 10)) != paper_digest(paper)
+
+
+def test_save_and_load_keep_every_digest(tmp_path):
+    index = PaperIndex(1000, error_rate=1e-3)
+    digests = [question_digest(str(i), "q", []) for i in range(500)]
+    for digest in digests:
+        index.add(digest)
+    path = str(tmp_path / "papers.idx")
+    index.save(path)
+    loaded = PaperIndex.load(path)
+    assert (loaded.bits, loaded.hashes, len(loaded)) == (index.bits, index.hashes, len(index))
+    assert all(digest in loaded for digest in digests)
+
+
+def test_write_papers_redraws_papers_already_in_the_index():
+    index = PaperIndex(100)
+    out_file = io.StringIO()
+    _, redraws = write_papers(out_file, 20, 7, processes=1, report_every=None, paper_index=index)
+    assert redraws == 0
+    # The same seed again makes the same 20 papers, every one of them has to be redrawn
+    again = io.StringIO()
+    _, redraws = write_papers(again, 20, 7, processes=1, report_every=None, paper_index=index)
+    assert redraws >= 20
+    papers = [json.loads(line) for line in (out_file.getvalue() + again.getvalue()).splitlines()]
+    assert len({paper_digest(paper) for paper in papers}) == 40
+    assert all(paper.get("attempt", 0) > 0 for paper in papers[20:])
@@ -0,0 +1,41 @@
+import time
+
+import pytest
+
+import main
+from question_pool import QuestionPool
+
+
+def _wait_full(pool, timeout=30):
+    deadline = time.monotonic() + timeout
+    while len(pool) < pool.size * len(main.QN_ANS.keys()):
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.001)
+    return True
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_buffers_fill_in_the_background_without_prefill(compact):
+    pool = QuestionPool(main.QN_ANS, size=4, low_water=2, compact=compact).start(prefill=False)
+    try:
+        assert _wait_full(pool)
+        for key in main.QN_ANS.keys():
+            for _ in range(pool.size):
+                question = pool.take(key)
+                assert question.check_answer(question.answer)
+        assert pool.misses == 0
+    finally:
+        pool.stop()
+
+
+def test_an_empty_buffer_is_refilled_after_a_miss():
+    pool = QuestionPool(main.QN_ANS, size=4, low_water=2)
+    key = next(iter(main.QN_ANS.keys()))
+    pool.take(key)
+    assert pool.misses == 1
+    pool.start(prefill=False)
+    try:
+        assert _wait_full(pool)
+    finally:
+        pool.stop()
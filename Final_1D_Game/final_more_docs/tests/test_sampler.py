@@ -0,0 +1,91 @@
+import random
+from collections import Counter
+
+import pytest
+
+import main
+from sampler import AdaptiveSampler, BankIndex, FenwickTree
+
+
+class _Bank(object):
+    """ Just what BankIndex reads of a QuestionBank. """
+    def __init__(self, templates):
+        self.templates = templates
+
+    def keys(self):
+        return self.templates.keys()
+
+    def metadata(self, key):
+        return self.templates[key]
+
+
+def _template(callback, weight):
+    return {"callback_func": callback, "answer_type": "open", "weight": weight}
+
+
+WEIGHTS = {"1": 1.0, "2": 2.0, "3": 3.0, "4": 4.0}
+
+
+@pytest.fixture
+def index():
+    return BankIndex(_Bank({key: _template("geom_1", weight) for key, weight in WEIGHTS.items()}))
+
+
+def test_fenwick_tree_sums_finds_and_updates():
+    rng = random.Random(1)
+    weights = [rng.choice([0.0, 0.5, 1.0, 3.0]) for _ in range(37)]
+    tree = FenwickTree(weights)
+    for _ in range(3):
+        for i in range(len(weights) + 1):
+            assert tree.prefix_sum(i) == pytest.approx(sum(weights[:i]))
+        for i, weight in enumerate(weights):
+            if weight:
+                assert tree.find(tree.prefix_sum(i)) == i
+                assert tree.find(tree.prefix_sum(i) + weight / 2) == i
+        # find never lands on a zero weight, even past the total
+        assert weights[tree.find(tree.prefix_sum(len(weights)) * 2)] > 0
+        for _ in range(10):
+            i = rng.randrange(len(weights))
+            weights[i] = rng.choice([0.0, 2.0, 5.0])
+            tree.update(i, weights[i])
+    with pytest.raises(ValueError):
+        tree.update(0, -1)
+
+
+def test_draws_follow_the_weights(index):
+    rng = random.Random(7)
+    draws = 20000
+    counts = Counter(index.draw(("geom", 2), rng) for _ in range(draws))
+    total = sum(WEIGHTS.values())
+    for key, weight in WEIGHTS.items():
+        assert counts[key] / draws == pytest.approx(weight / total, abs=0.02)
+
+
+def test_a_zero_weight_is_never_drawn(index):
+    index.set_weight("3", 0)
+    index.set_weight("4", 0)
+    assert index.bucket_weight(("geom", 2)) == 3.0
+    rng = random.Random(7)
+    assert set(index.draw(("geom", 2), rng) for _ in range(5000)) == {"1", "2"}
+    sampler = AdaptiveSampler(index)
+    assert not {"3", "4"} & set(sampler.draw(rng) for _ in range(5000))
+
+
+def test_excluded_templates_are_not_drawn():
+    sampler = AdaptiveSampler(BankIndex(main.QN_ANS))
+    keys = list(main.QN_ANS.keys())
+    rng = random.Random(3)
+    recent = set(keys[:-2])
+    assert set(sampler.draw(rng, exclude=recent) for _ in range(500)) <= set(keys[-2:])
+    with pytest.raises(ValueError):
+        sampler.draw(rng, exclude=set(keys))
+
+
+def test_a_round_does_not_repeat_its_templates():
+    sampler = AdaptiveSampler(BankIndex(main.QN_ANS))
+    for seed in range(20):
+        game = main.Game(len(main.QN_ANS), random.Random(seed), sampler=sampler)
+        for _ in range(len(main.QN_ANS)):
+            question = game.next_question()
+            game.check(question, question.answer if seed % 2 else "")
+        assert sorted(game.asked) == sorted(main.QN_ANS.keys())
@@ -0,0 +1,50 @@
+import sqlite3
+import time
+
+import score_store
+from score_store import ScoreStore
+
+
+def _sessions(path):
+    connection = sqlite3.connect(path)
+    try:
+        return [player for player, in connection.execute("SELECT player FROM sessions ORDER BY started_at")]
+    finally:
+        connection.close()
+
+
+def test_writer_survives_a_failed_batch(tmp_path, monkeypatch):
+    path = str(tmp_path / "scores.db")
+    write = ScoreStore._write
+    calls = []
+
+    def flaky_write(connection, rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        write(connection, rows)
+
+    monkeypatch.setattr(ScoreStore, "_write", staticmethod(flaky_write))
+    store = ScoreStore(path, flush_interval=0.01)
+    store.start_session("lost")
+    assert store.flush(timeout=5)
+    assert store.failed == 1
+    store.start_session("kept")
+    assert store.flush(timeout=5)
+    store.close(timeout=5)
+    assert _sessions(path) == ["kept"]
+
+
+def test_flush_and_close_do_not_hang_without_a_writer(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_store, "MAX_PENDING", 4)
+    store = ScoreStore(str(tmp_path / "scores.db"), flush_interval=0.01)
+    # Stop the writer behind the store's back, then fill the queue
+    store._queue.put(None)
+    store._thread.join(5)
+    for i in range(10):
+        store.start_session(f"player{i}")
+    assert store.dropped == 6
+    start = time.monotonic()
+    assert not store.flush(timeout=5)
+    store.close(timeout=1)
+    assert time.monotonic() - start < 3
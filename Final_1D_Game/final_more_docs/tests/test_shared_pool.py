@@ -0,0 +1,78 @@
+import random
+import struct
+import threading
+
+import pytest
+
+import main
+from compact_question import CompactQuestion
+from shared_pool import NO_CHOICES, SharedQuestionPool, produce, slot_dtype
+
+
+@pytest.fixture
+def pool():
+    owner = SharedQuestionPool.create(main.QN_ANS, workers=2, slots=4)
+    yield owner
+    owner.close()
+
+
+def _publish(owner, worker, key, cursor, question):
+    """ Writes a question to a worker's ring the way the producer does, seq last. """
+    slot = (worker, owner.keys.index(key), cursor % owner.slots)
+    count = len(question.packed_args) // 8
+    rings = owner._rings
+    rings["template"][slot] = slot[1]
+    rings["nargs"][slot] = count
+    rings["args"][slot][:count] = struct.unpack(f"<{count}d", question.packed_args)
+    rings["choices"][slot] = NO_CHOICES if question.choices is None else question.choices
+    rings["seq"][slot] = cursor + 1
+
+
+def test_template_ids_fit_large_banks():
+    assert slot_dtype(3)["template"].itemsize >= 4
+
+
+def test_take_reads_only_published_slots(pool):
+    worker = SharedQuestionPool.attach(pool.name, 1, main.QN_ANS)
+    try:
+        key = "13"
+        template = pool.keys.index(key)
+        # Nothing published yet: built locally, the ring is left alone
+        worker.take(key)
+        assert worker.misses == 1
+        assert list(pool._rings["seq"][1, template]) == [0, 1, 2, 3]
+
+        question = CompactQuestion.generate(main.QN_ANS, key, random.Random(5))
+        _publish(pool, 1, key, 0, question)
+        taken = worker.take(key)
+        assert worker.misses == 1
+        assert (taken.key, taken.packed_args, taken.choices) == (key, question.packed_args, question.choices)
+        assert taken.answer == question.answer
+        # Handed back for the ticket one lap later, and the next slot is still empty
+        assert pool._rings["seq"][1, template, 0] == pool.slots
+        worker.take(key)
+        assert worker.misses == 2
+        # Worker 0's rings are separate
+        assert list(pool._rings["seq"][0, template]) == [0, 1, 2, 3]
+    finally:
+        worker.close()
+
+
+def test_producer_fills_every_ring_and_refills_taken_slots(pool):
+    stop = threading.Event()
+    producer = threading.Thread(target=produce, args=(pool.name, main.QN_ANS.path, stop), daemon=True)
+    producer.start()
+    worker = SharedQuestionPool.attach(pool.name, 0, main.QN_ANS)
+    try:
+        assert pool.wait_full(timeout=30)
+        for key in pool.keys:
+            for _ in range(pool.slots):
+                question = worker.take(key)
+                assert question.question
+                assert question.check_answer(question.answer)
+        assert worker.misses == 0
+        assert pool.wait_full(timeout=30)
+    finally:
+        stop.set()
+        producer.join(10)
+        worker.close()
@@ -0,0 +1 @@
+# Topic packs of question callbacks, imported on demand by callback_registry.get
@@ -0,0 +1,27 @@
+from callback_registry import register
+
+# ===== Derivative questions: Vitaly ===== 
+
+@register
+def deriv_1(power):
+    """ What is the derivative of x to power {}? """
+    return f"{power}x^{round(power-1, 2)}"
+            
+@register
+def deriv_2(num):
+    return "1/x"
+    
+@register
+def deriv_3(power_e):
+    """ What is the derivative of e^({}x)? """
+    return f"{power_e}e^({power_e}x)"
+    
+@register
+def deriv_4(integer1, integer2, power1):
+    """ What is the derivative of ({}+{}x)^{}? """
+    return f"{power1}*{integer2}*({integer1}+{integer2}x)^{power1 - 1}"
+            
+@register
+def deriv_5(integer1, power1):
+    """ What is the derivative of sin({}x^{})? """
+    return f"{power1}*{integer1}x^{power1 - 1}*cos({integer1}x^{power1})"
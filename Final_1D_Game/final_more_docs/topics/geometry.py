@@ -0,0 +1,30 @@
+import math
+
+from callback_registry import register
+
+# ===== Geometry questions: Javier =====
+
+@register
+def geom_1(length):
+    """ What is the surface area of a cube of length {}?"""
+    return round(length * 6, 2)
+
+@register
+def geom_2(radius):
+    """ What is the volume of half a sphere of radius {}?"""
+    return round(2/3 * math.pi * radius ** 3, 2)
+
+@register
+def geom_3(radius, height):
+    """ What is the surface area of cylinder of radius {} and height {}?"""
+    return round(2 * math.pi * height * radius + 2 * math.pi * radius ** 2, 2)
+
+@register
+def geom_4(base_area, height):
+    """ What is the volume of triangular prism of base area {}, and height of {}?"""
+    return round(0.5 * base_area * height, 2)
+
+@register
+def geom_5(height, first_side, second_side):
+    """ What is the volume of trapezoid of sides {} and {} and height of {}?"""
+    return round(0.5 * height * (first_side + second_side), 2)
@@ -0,0 +1,36 @@
+from callback_registry import register
+# permutation(n, r) and combination(n, r) are exact and memoized, see combinatorics.py
+from combinatorics import permutation, combination
+
+# ===== Permutation and Combination questions: Nada =====
+
+@register
+def pnc_1(previous):
+    """ You are to pick a new 6-digit pin for your bank account and it can't be the same as your previous ones. You've had {} previous codes. How many different possible combinations are there? """
+    answer = 10**6
+    return answer-previous
+
+@register
+def pnc_2(total, mingirls, boys, girls):
+    """ A mixed team of total {} players containing a minimum of {} girls is to be chosen from a group of {} boys and {} girls. How many different teams can be picked? """
+    minboys = total - mingirls
+    return combination(boys, minboys) * combination(girls, mingirls)
+
+
+@register
+def pnc_3(total, selected):
+    """ If you have {total} books and want to arrange {selected} of them on a bookshelf, how many different ways can you do it? """
+    return permutation(total,selected)
+
+@register
+def pnc_4(oranges, apples, mangoes):
+    """ There are {} oranges, {} apples and {} mangoes in a basket. In how many ways can a person select fruits among the fruits in the basket? """
+    answer = 1
+    for i in (oranges, apples, mangoes):
+        answer *= i+1 
+    return answer - 1
+
+@register
+def pnc_5(number):
+    """There are {number} students in a race. In how many different orders can they complete?"""
+    return permutation(number,number)
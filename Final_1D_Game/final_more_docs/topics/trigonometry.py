@@ -0,0 +1,31 @@
+import math
+
+from callback_registry import register
+
+# ===== Trigonometry questions: Reynard ===== 
+# static questions are in json instead
+
+@register
+def trigo_1(b, c, angle):
+    """What is the length of side a of a triangle with other sides, b = {}, c = {}, and angle {}?"""
+    return round(math.sqrt(b ** 2 + c ** 2 - 2 * b * c * math.cos(angle)), 2)
+
+@register
+def trigo_2(b, B, A):
+    "What is the length of side a of a triangle with side b = {}, with angles of A = {}, B = {}?"
+    return round(b * (math.sin(A) / math.sin(B)), 2)
+
+@register
+def trigo_3(a_b, A):
+    "Find the area of an isoceles triangle ABC where a = b = {}, and angle A = {} rad. "
+    return round(0.5 * a_b * a_b * math.sin(math.pi - (2 * A)), 2)
+
+@register
+def trigo_4(a, b):
+    "If sin(A) = a/b (a fraction), then what is the value of sin(90-A)?"
+    return round(math.sqrt(b ** 2 - a ** 2) / b, 2)
+
+@register
+def trigo_5(b, a):
+    "Find the area of a triangle with one of the angles being cos(A) = b/a"
+    return round(0.5 * b * (math.sqrt(a ** 2 - b ** 2)), 2)
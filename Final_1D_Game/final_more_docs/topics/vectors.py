@@ -0,0 +1,29 @@
+import math
+
+from callback_registry import register
+
+# ===== Vector questions: Vainavi =====
+# question 1i and 1ii is static
+@register
+def vector_1(x_1, y_1, x_2, y_2):
+    """Given OA = ({}, {}) and OB = ({}, {}). What is Vector BA?\nHint: Vector OA (RED), Vector OB (BLUE), Vector BA (BLACK)"""
+    # The plot for the hint is rendered off-screen and cached by vector_render.render_vector_1
+    return str((x_1 - x_2, y_1 - y_2))
+
+
+@register
+def vector_2(n_7, n_8, n_9, n_10):
+    #Print the Question and ask for input
+    """Given vector U = ({}, {}) and vector V = ({}, {}). What is U + V?"""
+    return str((n_7 + n_9, n_8 + n_10))
+
+
+@register
+def vector_3(n_11, n_12, n_13):
+    """Given vector N is ({}, {}) and vector M is the scalar multiple of Vector N by {}. What is vector M? """ 
+    return str((n_13 * n_11, n_13 * n_12))
+
+@register
+def vector_4(n_14, n_15):
+    """Given Vector P is ({}, {}). Find the modulus of Vector P. Round off your answer to 2 decimal places."""
+    return round(math.sqrt(n_14 ** 2 + n_15 ** 2), 2)
@@ -0,0 +1,129 @@
+import argparse
+import io
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+# ===== Off-screen plots for the vector questions =====
+# vector_1 used to draw on pyplot's implicit global figure: artists piled up on every call and a GUI
+# backend had to be importable. The plot is now drawn here on one explicit Figure with an Agg canvas,
+# whose arrows are updated in place for every render, and the PNG bytes are cached by the question's args.
+
+RENDER_CACHE_SIZE = 1024
+FIGURE_SIZE = (4, 4)
+DPI = 80
+AXIS_LIMIT = 25
+
+_canvas = None
+
+
+def _get_canvas():
+    """
+    The canvas reused by every render in this process, created on first use.
+
+    Returns
+    -------
+    (canvas, quivers)
+        The Agg canvas of the figure, and the two quiver artists: OA and OB (red, blue) and BA (black).
+        Renders only update the quivers' vectors, nothing is added to the figure.
+    """
+    global _canvas
+    if _canvas is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        figure = Figure(figsize=FIGURE_SIZE, dpi=DPI)
+        canvas = FigureCanvasAgg(figure)
+        axes = figure.add_subplot()
+        origin = [[0, 0], [0, 0]]
+        oa_ob = axes.quiver(*origin, [0, 0], [0, 0], color=['r','b','g'], angles='xy', scale_units='xy', scale=1)
+        ba = axes.quiver(0, 0, 0, 0, angles='xy', scale_units='xy', scale=1)
+        axes.set_xlim([-AXIS_LIMIT, AXIS_LIMIT])
+        axes.set_ylim([-AXIS_LIMIT, AXIS_LIMIT])
+        _canvas = (canvas, (oa_ob, ba))
+    return _canvas
+
+
+def draw_vector_1(quivers, x_1, y_1, x_2, y_2):
+    """ Points the quivers at OA (red), OB (blue) and BA (black), like the old plot in vector_1. """
+    oa_ob, ba = quivers
+    oa_ob.set_UVC([x_1, x_2], [y_1, y_2])
+    ba.set_UVC(x_1 - x_2, y_1 - y_2)
+
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def render_vector_1(x_1, y_1, x_2, y_2):
+    """
+    Renders the plot of a vector_1 question off-screen.
+
+    Parameters
+    ----------
+    x_1, y_1, x_2, y_2: int
+        The question args, OA = (x_1, y_1) and OB = (x_2, y_2).
+
+    Returns
+    -------
+    bytes
+        The plot as a PNG image.
+    """
+    canvas, quivers = _get_canvas()
+    draw_vector_1(quivers, x_1, y_1, x_2, y_2)
+    out = io.BytesIO()
+    canvas.print_png(out)
+    return out.getvalue()
+
+
+def _render_args(args):
+    return render_vector_1(*args)
+
+
+def render_many(args_list, processes=None, chunksize=32):
+    """
+    Renders many vector_1 plots, spread over a process pool.
+
+    Parameters
+    ----------
+    args_list: list
+        List of (x_1, y_1, x_2, y_2) tuples.
+    processes: int
+        Number of worker processes, os.cpu_count() by default. 1 renders in this process.
+
+    Returns
+    -------
+    list
+        PNG bytes for each tuple, in the same order.
+    """
+    if processes == 1:
+        return [render_vector_1(*args) for args in args_list]
+    with ProcessPoolExecutor(processes) as executor:
+        return list(executor.map(_render_args, args_list, chunksize=chunksize))
+
+
+def export_pngs(args_list, out_dir, processes=None):
+    """ Writes the plot of every (x_1, y_1, x_2, y_2) tuple to out_dir. Returns the file paths. """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for args, png in zip(args_list, render_many(args_list, processes)):
+        path = os.path.join(out_dir, "vector_1_{}_{}_{}_{}.png".format(*args))
+        with open(path, "wb") as out_file:
+            out_file.write(png)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export vector_1 question plots as PNG files")
+    parser.add_argument("--count", type=int, default=100, help="number of random questions to render")
+    parser.add_argument("--out", default="vector_plots", help="output directory")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--low", type=int, default=1)
+    parser.add_argument("--high", type=int, default=20)
+    args = parser.parse_args()
+
+    args_list = list({tuple(random.randint(args.low, args.high) for _ in range(4)) for _ in range(args.count)})
+    paths = export_pngs(args_list, args.out, args.processes)
+    print(f"Wrote {len(paths)} plots to {args.out}")
+
+
+if __name__ == "__main__":
+    main()